@@ -27,6 +27,18 @@ from app.schemas.auth import (
 )
 from app.services.google_auth import verify_google_id_token
 from app.services.otp_service import OtpService
+from app.services.embedding_versions import embedding_versions
+from app.services.embeddings import InvalidEmbeddingError, decode_embedding, prepare_embedding
+from app.services.face_quality import assess_frame, parse_box
+from app.services.video_enrollment import (
+    iter_sampled_frames,
+    parse_pose_marks,
+    save_pose_frames,
+    select_pose_frames,
+    video_duration,
+)
+from app.api.deps import get_current_user
+from app.core.file_storage import FileStorageManager
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -395,10 +407,30 @@ def upload_face_image(
     file: UploadFile = File(...),
     face_type: str = Form("straight"),
     embedding: str = Form(None),
+    embedding_encoding: str = Form("json"),
+    embedding_dtype: str = Form("float32"),
+    embedding_dim: int = Form(None),
+    embedding_file: UploadFile = File(None),
+    embedding_model: str = Form(None),
+    face_box: str = Form(None),
     session: Session = Depends(get_session),
     authorization: str = Header(None),
 ):
-    """Upload a face image for the current user, with optional embedding vector."""
+    """Upload a face image for the current user, with optional embedding vector.
+
+    The embedding may be sent as a JSON list (``embedding``), as base64 of
+    packed little-endian float32/float16 (``embedding`` with
+    ``embedding_encoding=base64``), or as a raw binary part
+    (``embedding_file`` with ``embedding_encoding=binary``).
+    ``embedding_model`` names the model version that produced it
+    (default: the active one). Without an embedding, the stored image is
+    embedded in the background when server-side extraction is enabled.
+
+    The frame's sharpness, exposure and (with ``face_box``, "x,y,w,h" in
+    image pixels) face size are scored first; frames below
+    FACE_QUALITY_MIN_SCORE are rejected with a 422 before anything is
+    written.
+    """
     import logging
     from uuid import UUID
     logger = logging.getLogger(__name__)
@@ -430,23 +462,50 @@ def upload_face_image(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found",
             )
+        # Decode and validate the embedding before anything touches disk or DB
+        embedding_vector = None
+        try:
+            model = embedding_versions.resolve(session, embedding_model)
+            if embedding_encoding == "binary" and embedding_file is not None:
+                embedding_vector = decode_embedding(
+                    embedding_file.file.read(), "binary", embedding_dtype, embedding_dim or model.dim
+                )
+            elif embedding:
+                embedding_vector = decode_embedding(
+                    embedding, embedding_encoding, embedding_dtype, embedding_dim or model.dim
+                )
+            if embedding_vector is not None:
+                # Validation only: the record stores the unit vector and this norm itself
+                prepare_embedding(embedding_vector, model.dim)
+        except (InvalidEmbeddingError, ValueError) as emb_err:
+            logger.error(f"❌ Rejected embedding: {emb_err}")
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(emb_err))
+        contents = file.file.read()
+        quality = None
+        if settings.FACE_QUALITY_ENABLED:
+            try:
+                quality = assess_frame(contents, parse_box(face_box))
+            except ValueError as quality_err:
+                logger.error(f"❌ Rejected face image: {quality_err}")
+                raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(quality_err))
+            if quality.score < settings.FACE_QUALITY_MIN_SCORE:
+                logger.warning(f"⚠️ Rejected low-quality face image ({quality.score:.2f}): {', '.join(quality.problems)}")
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail={
+                        "message": "Face image quality too low: " + (", ".join(quality.problems) or "retake the photo"),
+                        "quality": quality._asdict(),
+                    },
+                )
         logger.info(f"📸 Uploading face image for user: {current_user.id}")
         faces_dir = Path("uploads/faces")
         faces_dir.mkdir(parents=True, exist_ok=True)
         import time
         filename = f"{current_user.id}_{int(time.time() * 1000)}.jpg"
         filepath = faces_dir / filename
-        contents = file.file.read()
         with open(filepath, "wb") as f:
             f.write(contents)
         logger.info(f"✓ Face image saved: {filepath}")
-        # Parse embedding if provided
-        embedding_list = None
-        if embedding:
-            try:
-                embedding_list = json.loads(embedding)
-            except Exception as emb_err:
-                logger.error(f"Invalid embedding JSON: {emb_err}")
         try:
             face_record = face_crud.create_face_record(
                 session,
@@ -454,7 +513,10 @@ def upload_face_image(
                 face_type=face_type,
                 file_path=str(filepath),
                 file_name=filename,
-                embedding=embedding_list,
+                embedding=embedding_vector,
+                model_version=model.version,
+                dim=model.dim,
+                quality_score=quality.score if quality else None,
             )
             logger.info(f"✓ Face record created in DB: {face_record.id}")
         except Exception as db_error:
@@ -472,6 +534,7 @@ def upload_face_image(
             "success": True,
             "message": "Face image uploaded successfully",
             "filename": filename,
+            "quality": quality._asdict() if quality else None,
         }
     except HTTPException:
         raise
@@ -482,6 +545,83 @@ def upload_face_image(
             detail=f"Failed to upload face image: {str(e)}",
         )
 
+VIDEO_EXTENSIONS = {"mp4", "mov"}
+
+
+@router.post("/upload-face-video")
+def upload_face_video(
+    file: UploadFile = File(...),
+    pose_marks: str = Form(None),
+    session: Session = Depends(get_session),
+    current_user=Depends(get_current_user),
+):
+    """Enroll from one short mp4/mov clip instead of one image per pose.
+
+    The upload is streamed to a temp file and decoded incrementally at
+    FACE_VIDEO_SAMPLE_FPS. Each sampled frame is quality-scored and bucketed
+    by pose: by ``pose_marks`` ("0:straight,2.5:left,5:right", seconds) when
+    the app sends its prompt timeline, otherwise by splitting the clip into
+    equal segments in FACE_VIDEO_POSES order. Only the best
+    FACE_VIDEO_FRAMES_PER_POSE frames of each pose are stored, as ordinary
+    face records without an embedding.
+    """
+    import logging
+    logger = logging.getLogger(__name__)
+    if Path(file.filename or "").suffix.lower().lstrip(".") not in VIDEO_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Video must be one of: {', '.join(sorted(VIDEO_EXTENSIONS))}",
+        )
+    logger.info(f"🎬 Processing face video upload for user: {current_user.id}")
+    saved, temp_path = FileStorageManager.save_temp(file.file, file.filename)
+    if not saved:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=temp_path)
+    try:
+        duration = video_duration(temp_path)
+        if duration > settings.FACE_VIDEO_MAX_SECONDS:
+            raise ValueError(f"Clip is {duration:.1f}s; the limit is {settings.FACE_VIDEO_MAX_SECONDS:.0f}s")
+        marks = parse_pose_marks(pose_marks, duration)
+        min_score = settings.FACE_QUALITY_MIN_SCORE if settings.FACE_QUALITY_ENABLED else 0.0
+        kept, sampled = select_pose_frames(iter_sampled_frames(temp_path), marks, min_score=min_score)
+    except RuntimeError as video_err:
+        logger.error(f"❌ Video enrollment unavailable: {video_err}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(video_err))
+    except ValueError as video_err:
+        logger.error(f"❌ Rejected face video: {video_err}")
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(video_err))
+    finally:
+        os.remove(temp_path)
+    missing = [pose for pose, frames in kept.items() if not frames]
+    if len(missing) == len(kept):
+        logger.warning(f"⚠️ No usable frames in face video ({sampled} sampled)")
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"No frame of the {sampled} sampled passed the quality check; retake the video",
+        )
+    try:
+        records = save_pose_frames(session, current_user.id, [frame for frames in kept.values() for frame in frames])
+    except Exception as db_error:
+        logger.error(f"⚠️  Saving video frames failed: {str(db_error)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save face records to database: {str(db_error)}",
+        )
+    logger.info(f"✓ Face video enrolled: {len(records)} frames from {sampled} sampled, missing {missing or 'none'}")
+    stored = iter(records)  # same order as kept
+    return {
+        "success": True,
+        "message": "Face video uploaded successfully",
+        "sampled_frames": sampled,
+        "frames": {
+            pose: [
+                {"timestamp": frame.timestamp, "filename": next(stored).file_name, "quality": frame.quality._asdict()}
+                for frame in frames
+            ]
+            for pose, frames in kept.items()
+        },
+        "missing_poses": missing,
+    }
+
 @router.post("/phone/send-otp", response_model=PhoneSendOtpResponse)
 def send_phone_otp(payload: PhoneSendOtpRequest, session: Session = Depends(get_session)):
     import logging
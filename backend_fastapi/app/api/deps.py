@@ -2,6 +2,7 @@ print("DEPS IMPORTED")
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlmodel import Session
+from app.core.config import settings
 from app.core.database import get_session
 from app.core.security import decode_access_token
 from app.crud import user as user_crud
@@ -21,3 +22,14 @@ def get_current_user(
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return user
+
+
+def is_operator(user) -> bool:
+    return str(user.id).lower() in {user_id.lower() for user_id in settings.OPERATOR_USER_IDS}
+
+
+def get_current_operator(user=Depends(get_current_user)):
+    """The current user, if listed in OPERATOR_USER_IDS (review queues, model rollout, scans)."""
+    if not is_operator(user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operator access required")
+    return user
@@ -0,0 +1,418 @@
+import logging
+from typing import Optional
+from uuid import UUID
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
+from app.api.deps import get_current_operator, get_current_user, is_operator
+from app.core.config import settings
+from app.core.database import get_session
+from app.crud import embedding_model as model_crud
+from app.crud import face as face_crud
+from app.crud import face_duplicate as duplicate_crud
+from app.crud import face_template as template_crud
+from app.models.face_duplicate import DUPLICATE_CONFIRMED, DUPLICATE_DISMISSED
+from app.schemas.face import (
+    EmbeddingModelCreate,
+    EmbeddingModelRead,
+    FaceBatchIdentifyRequest,
+    FaceBatchIdentifyResponse,
+    FaceDuplicateRead,
+    FaceDuplicateReview,
+    FaceExtractionStats,
+    FaceIdentifyRequest,
+    FaceIdentifyResponse,
+    FaceIndexStatsResponse,
+    FaceMatch,
+    FaceProbeResult,
+    FaceVerifyRequest,
+    FaceVerifyResponse,
+)
+from app.services.duplicate_detection import duplicate_checker
+from app.services.embedding_versions import BASE_MODEL, ModelVersion, embedding_versions
+from app.services.embeddings import InvalidEmbeddingError, prepare_embedding, prepare_embeddings
+from app.services.face_changes import face_change_feed
+from app.services.face_extraction import extraction_pool, stored_image_embedder
+from app.services.face_index import face_index
+from app.services.face_verification import user_face_cache
+from app.services.identify_cache import identify_cache
+from app.services.quantization import quantized_face_index
+from app.services.sharded_index import sharded_face_index
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/faces", tags=["faces"])
+
+SEARCH_BACKENDS = ("pgvector", "exact", "quantized", "templates", "sharded")
+# Backends that can search embedding model versions other than the base one
+VERSIONED_BACKENDS = ("pgvector", "exact")
+
+
+def _resolve_model(session: Session, version) -> ModelVersion:
+    try:
+        return embedding_versions.resolve(session, version)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+
+
+def _version_arg(model: ModelVersion):
+    """Model version as the CRUD/cache layer takes it: None for the base version."""
+    return None if model.version == BASE_MODEL.version else model.version
+
+
+def _identify_pgvector(
+    session: Session, payload: FaceIdentifyRequest, top_k: int, model: ModelVersion = BASE_MODEL
+) -> list[FaceMatch]:
+    rows = face_crud.search_similar_faces(
+        session,
+        payload.embedding,
+        limit=top_k * settings.FACE_SEARCH_CANDIDATE_FACTOR,
+        ef_search=payload.ef_search or settings.FACE_SEARCH_EF_SEARCH,
+        probes=payload.probes or settings.FACE_SEARCH_IVFFLAT_PROBES,
+        model_version=_version_arg(model),
+        dim=model.dim,
+    )
+    # Rows arrive best-first; keep each user's closest face only
+    matches: list[FaceMatch] = []
+    seen_users = set()
+    for row in rows:
+        if row.user_id in seen_users:
+            continue
+        seen_users.add(row.user_id)
+        matches.append(
+            FaceMatch(
+                user_id=str(row.user_id),
+                face_id=str(row.id),
+                face_type=row.face_type,
+                score=float(row.score),
+                inner_product=float(row.inner_product),
+            )
+        )
+        if len(matches) == top_k:
+            break
+    return matches
+
+
+def _to_matches(hits) -> list[FaceMatch]:
+    return [
+        FaceMatch(
+            user_id=str(hit.user_id),
+            face_id=str(hit.face_id),
+            face_type=hit.face_type,
+            score=hit.score,
+            inner_product=hit.inner_product,
+        )
+        for hit in hits
+    ]
+
+
+def _identify_exact(
+    session: Session, payload: FaceIdentifyRequest, top_k: int, model: ModelVersion = BASE_MODEL
+) -> list[FaceMatch]:
+    index = embedding_versions.index_for(model)
+    index.ensure_loaded(session)
+    return _to_matches(index.search(payload.embedding, top_k))
+
+
+def _identify_quantized(session: Session, payload: FaceIdentifyRequest, top_k: int) -> list[FaceMatch]:
+    quantized_face_index.ensure_loaded(session)
+    return _to_matches(quantized_face_index.search(payload.embedding, top_k, session=session))
+
+
+def _identify_sharded(session: Session, payload: FaceIdentifyRequest, top_k: int) -> tuple[list[FaceMatch], bool]:
+    sharded_face_index.ensure_loaded(session)
+    hits, failed_shards = sharded_face_index.search(payload.embedding, top_k)
+    if failed_shards:
+        logger.warning(f"⚠️ Identify answered without {failed_shards}/{sharded_face_index.shards} shards")
+    return _to_matches(hits), failed_shards > 0
+
+
+def _identify_templates(session: Session, payload: FaceIdentifyRequest, top_k: int) -> list[FaceMatch]:
+    # One vector per identity narrows the field; only the shortlisted users'
+    # raw frames are then scored to pick the matching face.
+    candidates = template_crud.search_templates(
+        session,
+        payload.embedding,
+        limit=top_k * settings.FACE_TEMPLATE_SHORTLIST_FACTOR,
+        ef_search=payload.ef_search or settings.FACE_SEARCH_EF_SEARCH,
+    )
+    frames = face_crud.get_faces_for_users(session, [c.user_id for c in candidates])
+    if not frames:
+        return []
+    query, query_norm = prepare_embedding(payload.embedding)
+    # Stored frames are unit-length: inner product with the unit query is cosine
+    scores = np.asarray([f.embedding for f in frames], dtype=np.float32) @ query
+    best: dict = {}
+    for i, frame in enumerate(frames):
+        if frame.user_id not in best or scores[i] > scores[best[frame.user_id]]:
+            best[frame.user_id] = i
+    ranked = sorted(best.values(), key=lambda i: -scores[i])[:top_k]
+    return [
+        FaceMatch(
+            user_id=str(frames[i].user_id),
+            face_id=str(frames[i].id),
+            face_type=frames[i].face_type,
+            score=float(scores[i]),
+            inner_product=float(scores[i]) * (frames[i].embedding_norm or 1.0) * query_norm,
+        )
+        for i in ranked
+    ]
+
+
+@router.post("/identify", response_model=FaceIdentifyResponse)
+def identify_face(
+    payload: FaceIdentifyRequest,
+    session: Session = Depends(get_session),
+    user=Depends(get_current_user),
+):
+    """Return the top-k enrolled users most similar to a query embedding."""
+    model = _resolve_model(session, payload.model_version)
+    try:
+        probe, probe_norm = prepare_embedding(payload.embedding, model.dim)
+    except InvalidEmbeddingError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    backend = payload.backend or settings.FACE_SEARCH_BACKEND
+    if backend not in SEARCH_BACKENDS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown search backend '{backend}'",
+        )
+    if model.version != BASE_MODEL.version and backend not in VERSIONED_BACKENDS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Search backend '{backend}' only serves embedding model {BASE_MODEL.version}",
+        )
+    top_k = min(payload.top_k, settings.FACE_SEARCH_MAX_TOP_K)
+    cache_key = identify_cache.key(probe, backend, model.version, top_k, payload.ef_search, payload.probes)
+    cached, generation = identify_cache.get(cache_key)
+    if cached is not None:
+        # Near-duplicate probe, possibly another norm: only inner_product scales with it
+        cached_norm, cached_matches = cached
+        matches = [
+            match.copy(update={"inner_product": match.inner_product * probe_norm / cached_norm})
+            for match in cached_matches
+        ]
+        logger.info(f"🔍 Identify ({backend}, {model.version}): {len(matches)} users returned from cache")
+        return FaceIdentifyResponse(matches=matches, partial=False, model_version=model.version)
+    partial = False
+    if backend == "sharded":
+        matches, partial = _identify_sharded(session, payload, top_k)
+    elif backend == "exact":
+        matches = _identify_exact(session, payload, top_k, model)
+    elif backend == "quantized":
+        matches = _identify_quantized(session, payload, top_k)
+    elif backend == "templates":
+        matches = _identify_templates(session, payload, top_k)
+    else:
+        matches = _identify_pgvector(session, payload, top_k, model)
+    if not partial:
+        identify_cache.put(cache_key, generation, (probe_norm, matches))
+    logger.info(f"🔍 Identify ({backend}, {model.version}): {len(matches)} users returned")
+    return FaceIdentifyResponse(matches=matches, partial=partial, model_version=model.version)
+
+
+@router.post("/verify", response_model=FaceVerifyResponse)
+def verify_face(
+    payload: FaceVerifyRequest,
+    session: Session = Depends(get_session),
+    user=Depends(get_current_user),
+):
+    """Check a probe embedding against one claimed user (1:1), defaulting to the caller.
+
+    Only operators may name another user; otherwise the score would let any
+    caller probe how close a face is to everyone enrolled.
+    """
+    model = _resolve_model(session, payload.model_version)
+    try:
+        probe, _ = prepare_embedding(payload.embedding, model.dim)
+        user_id = UUID(payload.user_id) if payload.user_id else user.id
+    except (InvalidEmbeddingError, ValueError) as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    if user_id != user.id and not is_operator(user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Can only verify against your own faces")
+    result = user_face_cache.verify(session, user_id, probe, _version_arg(model))
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No enrolled face embeddings for this user",
+        )
+    threshold = settings.FACE_VERIFY_THRESHOLD
+    match = result.score >= threshold
+    logger.info(f"🔐 Verify {user_id}: score={result.score:.3f} match={match}")
+    return FaceVerifyResponse(
+        user_id=str(user_id),
+        match=match,
+        score=result.score,
+        threshold=threshold,
+        face_id=str(result.face_id),
+        face_type=result.face_type,
+        model_version=model.version,
+    )
+
+
+@router.post("/identify/batch", response_model=FaceBatchIdentifyResponse)
+def identify_faces_batch(
+    payload: FaceBatchIdentifyRequest,
+    session: Session = Depends(get_session),
+    user=Depends(get_current_user),
+):
+    """Top-k users for each of N probes, scored as one matrix multiply per chunk."""
+    if len(payload.embeddings) > settings.FACE_SEARCH_MAX_BATCH_PROBES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {settings.FACE_SEARCH_MAX_BATCH_PROBES} probes per request",
+        )
+    model = _resolve_model(session, payload.model_version)
+    if not payload.embeddings:
+        return FaceBatchIdentifyResponse(results=[], model_version=model.version)
+    try:
+        probes, _ = prepare_embeddings(payload.embeddings, model.dim)
+    except InvalidEmbeddingError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    top_k = min(payload.top_k, settings.FACE_SEARCH_MAX_TOP_K)
+    index = embedding_versions.index_for(model)
+    index.ensure_loaded(session)
+    chunks = index.iter_search_batch(probes, top_k)
+
+    if payload.stream:
+        def ndjson():
+            probe = 0
+            for chunk in chunks:
+                lines = []
+                for hits in chunk:
+                    result = FaceProbeResult(probe=probe, matches=_to_matches(hits))
+                    lines.append(result.json())
+                    probe += 1
+                yield "\n".join(lines) + "\n"
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    results = [
+        FaceProbeResult(probe=probe, matches=_to_matches(hits))
+        for probe, hits in enumerate(hits for chunk in chunks for hits in chunk)
+    ]
+    logger.info(f"🔍 Batch identify ({model.version}): {len(results)} probes scored")
+    return FaceBatchIdentifyResponse(results=results, model_version=model.version)
+
+
+@router.get("/index/stats", response_model=FaceIndexStatsResponse)
+def face_index_stats(
+    session: Session = Depends(get_session),
+    user=Depends(get_current_user),
+):
+    """Memory per vector and measured recall@k of the in-process indexes, plus change feed lag."""
+    face_index.ensure_loaded(session)
+    quantized_face_index.ensure_loaded(session)
+    return FaceIndexStatsResponse(
+        exact=face_index.stats(),
+        quantized=quantized_face_index.stats(),
+        sharded=sharded_face_index.stats() if sharded_face_index.loaded else None,
+        change_feed=face_change_feed.stats(),
+        duplicate_check=duplicate_checker.stats(),
+        identify_cache=identify_cache.stats(),
+        extraction=_extraction_stats() if extraction_pool.running else None,
+    )
+
+
+def _extraction_stats() -> FaceExtractionStats:
+    stored = stored_image_embedder.stats()
+    return FaceExtractionStats(
+        **extraction_pool.stats(),
+        stored_written=stored["written"],
+        stored_failed=stored["failed"],
+        stored_backlog=stored["backlog"],
+    )
+
+
+def _model_read(session: Session, model, serving: ModelVersion) -> EmbeddingModelRead:
+    faces, covered = model_crud.get_coverage(session, model.version)
+    return EmbeddingModelRead(
+        version=model.version,
+        dim=model.dim,
+        status=model.status,
+        faces=faces,
+        covered=covered,
+        serving=model.version == serving.version,
+        created_at=model.created_at,
+        activated_at=model.activated_at,
+    )
+
+
+@router.get("/models", response_model=list[EmbeddingModelRead])
+def list_embedding_models(
+    session: Session = Depends(get_session),
+    user=Depends(get_current_user),
+):
+    """Embedding model versions with their backfill coverage."""
+    serving = embedding_versions.current(session)
+    return [_model_read(session, model, serving) for model in model_crud.get_models(session)]
+
+
+@router.post("/models", response_model=EmbeddingModelRead, status_code=status.HTTP_201_CREATED)
+def register_embedding_model(
+    payload: EmbeddingModelCreate,
+    session: Session = Depends(get_session),
+    user=Depends(get_current_operator),
+):
+    """Register a new model version; it is backfilled in the background and
+    becomes active once every face has an embedding under it."""
+    if model_crud.is_base_version(payload.version) or model_crud.get_model(session, payload.version):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Model version '{payload.version}' already exists",
+        )
+    try:
+        model = model_crud.register_model(session, payload.version, payload.dim)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    logger.info(f"🧬 Registered embedding model {model.version} ({model.dim} dims)")
+    return _model_read(session, model, embedding_versions.current(session))
+
+
+def _duplicate_read(duplicate) -> FaceDuplicateRead:
+    return FaceDuplicateRead(
+        id=str(duplicate.id),
+        face_id=str(duplicate.face_id),
+        user_id=str(duplicate.user_id),
+        matched_face_id=str(duplicate.matched_face_id),
+        matched_user_id=str(duplicate.matched_user_id),
+        score=duplicate.score,
+        status=duplicate.status,
+        created_at=duplicate.created_at,
+        reviewed_at=duplicate.reviewed_at,
+    )
+
+
+@router.get("/duplicates", response_model=list[FaceDuplicateRead])
+def list_face_duplicates(
+    status_filter: Optional[str] = Query("pending", alias="status"),
+    user_id: Optional[UUID] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    session: Session = Depends(get_session),
+    user=Depends(get_current_operator),
+):
+    """Enrollments flagged as matching another user, highest score first."""
+    duplicates = duplicate_crud.get_duplicates(session, status_filter, user_id, limit, offset)
+    return [_duplicate_read(d) for d in duplicates]
+
+
+@router.post("/duplicates/{duplicate_id}/review", response_model=FaceDuplicateRead)
+def review_face_duplicate(
+    duplicate_id: UUID,
+    payload: FaceDuplicateReview,
+    session: Session = Depends(get_session),
+    user=Depends(get_current_operator),
+):
+    """Confirm or dismiss a suspected duplicate."""
+    if payload.status not in (DUPLICATE_CONFIRMED, DUPLICATE_DISMISSED):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Status must be '{DUPLICATE_CONFIRMED}' or '{DUPLICATE_DISMISSED}'",
+        )
+    duplicate = duplicate_crud.review_duplicate(session, duplicate_id, payload.status)
+    if duplicate is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Duplicate not found")
+    logger.info(f"🚩 Duplicate {duplicate_id} marked {payload.status}")
+    return _duplicate_read(duplicate)
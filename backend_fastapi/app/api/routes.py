@@ -2,7 +2,13 @@ print("ROUTES IMPORTED")
 from fastapi import APIRouter
 from .auth import router as auth_router
 from .users import router as users_router
+from .faces import router as faces_router
+from .scans import router as scans_router
+from .voice import router as voice_router
 
 api_router = APIRouter(prefix="/api")
 api_router.include_router(auth_router)
 api_router.include_router(users_router)
+api_router.include_router(faces_router)
+api_router.include_router(scans_router)
+api_router.include_router(voice_router)
@@ -0,0 +1,181 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+import numpy as np
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, status
+from sqlmodel import Session
+from app.api.deps import get_current_user, is_operator
+from app.core.config import settings
+from app.core.database import get_session
+from app.crud import scan as scan_crud
+from app.models.scan import SCAN_DONE, SCAN_SOURCE_API
+from app.schemas.scan import ScanJobRead, ScanMatchRead, ScanStatsResponse, ScanSubmitRequest
+from app.services.embedding_versions import embedding_versions
+from app.services.embeddings import InvalidEmbeddingError, prepare_embeddings
+from app.services.face_extraction import extraction_pool
+from app.services.face_scan import scan_worker_pool, submit_scan
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/scans", tags=["scans"])
+
+
+def _job_read(job) -> ScanJobRead:
+    fps = None
+    if job.status == SCAN_DONE and job.scan_seconds:
+        fps = job.frames / job.scan_seconds
+    return ScanJobRead(
+        id=str(job.id),
+        content_id=job.content_id,
+        source=job.source,
+        status=job.status,
+        frames=job.frames,
+        model_version=job.model_version,
+        threshold=job.threshold,
+        matches=job.matches,
+        scan_seconds=job.scan_seconds,
+        frames_per_second=fps,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+def _visible_job(session: Session, job_id: UUID, user):
+    """A scan the caller submitted (any scan for operators), else 404."""
+    job = scan_crud.get_job(session, job_id)
+    if job is None or (job.submitted_by != user.id and not is_operator(user)):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Scan not found")
+    return job
+
+
+@router.post("", response_model=ScanJobRead, status_code=status.HTTP_202_ACCEPTED)
+def submit_scan_job(
+    payload: ScanSubmitRequest,
+    session: Session = Depends(get_session),
+    user=Depends(get_current_user),
+):
+    """Queue a suspect media item's frame embeddings; a scan worker picks it up."""
+    if not 0 < len(payload.embeddings) <= settings.FACE_SCAN_MAX_FRAMES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Between 1 and {settings.FACE_SCAN_MAX_FRAMES} frames per scan",
+        )
+    try:
+        model = embedding_versions.resolve(session, payload.model_version)
+        frames, _ = prepare_embeddings(payload.embeddings, model.dim)
+    except (InvalidEmbeddingError, ValueError) as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    threshold = settings.FACE_SCAN_THRESHOLD if payload.threshold is None else payload.threshold
+    job = submit_scan(
+        session,
+        payload.content_id,
+        frames,
+        threshold=threshold,
+        model_version=model.version,
+        submitted_by=user.id,
+        source=SCAN_SOURCE_API,
+    )
+    logger.info(f"🎞️ Queued scan {job.id} ({job.content_id}): {job.frames} frames")
+    return _job_read(job)
+
+
+@router.post("/images", response_model=ScanJobRead, status_code=status.HTTP_202_ACCEPTED)
+def submit_scan_images(
+    content_id: str = Form(..., min_length=1, max_length=512),
+    frames: list[UploadFile] = File(...),
+    threshold: Optional[float] = Form(None, ge=-1.0, le=1.0),
+    session: Session = Depends(get_session),
+    user=Depends(get_current_user),
+):
+    """Queue a suspect media item sent as frame images, embedded here by the extraction pool."""
+    if not extraction_pool.running:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server-side embedding extraction is not enabled",
+        )
+    if not 0 < len(frames) <= settings.FACE_SCAN_MAX_FRAMES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Between 1 and {settings.FACE_SCAN_MAX_FRAMES} frames per scan",
+        )
+    # Every frame is queued before waiting, so they share batches
+    futures = [extraction_pool.submit(frame.file.read()) for frame in frames]
+    try:
+        vectors, _ = prepare_embeddings(np.stack([future.result() for future in futures]), extraction_pool.dim)
+    except (InvalidEmbeddingError, ValueError) as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    job = submit_scan(
+        session,
+        content_id,
+        vectors,
+        threshold=settings.FACE_SCAN_THRESHOLD if threshold is None else threshold,
+        model_version=extraction_pool.version,
+        submitted_by=user.id,
+        source=SCAN_SOURCE_API,
+    )
+    logger.info(f"🎞️ Queued scan {job.id} ({job.content_id}): {job.frames} frames extracted from images")
+    return _job_read(job)
+
+
+@router.get("", response_model=list[ScanJobRead])
+def list_scan_jobs(
+    status_filter: Optional[str] = Query(None, alias="status"),
+    content_id: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    session: Session = Depends(get_session),
+    user=Depends(get_current_user),
+):
+    """The caller's scan jobs (every job for operators), newest first."""
+    submitted_by = None if is_operator(user) else user.id
+    jobs = scan_crud.get_jobs(session, status_filter, content_id, limit, offset, submitted_by)
+    return [_job_read(job) for job in jobs]
+
+
+@router.get("/stats", response_model=ScanStatsResponse)
+def scan_stats(
+    session: Session = Depends(get_session),
+    user=Depends(get_current_user),
+):
+    """Queue depth and scoring throughput over the last hour."""
+    jobs, frames, seconds = scan_crud.get_throughput(session, datetime.now(timezone.utc) - timedelta(hours=1))
+    return ScanStatsResponse(
+        pool=scan_worker_pool.stats(),
+        jobs=scan_crud.get_status_counts(session),
+        last_hour_jobs=jobs,
+        last_hour_frames=frames,
+        # Each job is scored by one single-threaded worker
+        frames_per_second_per_core=frames / seconds if seconds else None,
+    )
+
+
+@router.get("/{job_id}", response_model=ScanJobRead)
+def get_scan_job(
+    job_id: UUID,
+    session: Session = Depends(get_session),
+    user=Depends(get_current_user),
+):
+    return _job_read(_visible_job(session, job_id, user))
+
+
+@router.get("/{job_id}/matches", response_model=list[ScanMatchRead])
+def get_scan_matches(
+    job_id: UUID,
+    session: Session = Depends(get_session),
+    user=Depends(get_current_user),
+):
+    """Users found in the scan, highest score first."""
+    _visible_job(session, job_id, user)
+    return [
+        ScanMatchRead(
+            user_id=str(match.user_id),
+            face_id=str(match.face_id) if match.face_id else None,
+            score=match.score,
+            best_frame=match.best_frame,
+            frames_matched=match.frames_matched,
+        )
+        for match in scan_crud.get_matches(session, job_id)
+    ]
@@ -0,0 +1,90 @@
+import logging
+import os
+from pathlib import Path
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from sqlmodel import Session
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.core.database import get_session
+from app.core.file_storage import FileStorageManager
+from app.crud import voice as voice_crud
+from app.schemas.voice import VoiceSampleRead, VoiceSamplesResponse, VoiceUploadResponse
+from app.services.voice_samples import decode_wav, save_voice_sample
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/voice", tags=["voice"])
+
+
+def _sample_read(sample) -> VoiceSampleRead:
+    return VoiceSampleRead(
+        id=str(sample.id),
+        sample_rate=sample.sample_rate,
+        source_sample_rate=sample.source_sample_rate,
+        channels=sample.channels,
+        duration_seconds=sample.duration_seconds,
+        rms=sample.rms,
+        created_at=sample.created_at,
+    )
+
+
+@router.post("/samples", response_model=VoiceUploadResponse, status_code=status.HTTP_201_CREATED)
+def upload_voice_sample(
+    file: UploadFile = File(...),
+    session: Session = Depends(get_session),
+    user=Depends(get_current_user),
+):
+    """Add a voice enrollment sample (PCM WAV) for the current user.
+
+    UploadLimitMiddleware enforces MAX_UPLOAD_SIZE_MB on the incoming body
+    before it is spooled. The upload is then copied to disk in chunks and
+    decoded chunk by chunk to mono float32 at VOICE_SAMPLE_RATE. Neither
+    step holds the whole file in memory. Samples
+    that are too short, too long or near-silent get a 422 and are not kept.
+    """
+    if Path(file.filename or "").suffix.lower() != ".wav":
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Voice samples must be WAV files")
+    saved, temp_path = FileStorageManager.save_temp(file.file, file.filename)
+    if not saved:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=temp_path)
+    try:
+        try:
+            audio = decode_wav(temp_path)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+        if audio.seconds < settings.VOICE_MIN_SECONDS:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Sample is {audio.seconds:.1f}s; record at least {settings.VOICE_MIN_SECONDS:.0f}s",
+            )
+        if audio.rms < settings.VOICE_MIN_RMS:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Sample is almost silent; record closer to the microphone",
+            )
+        sample, replaced = save_voice_sample(session, user, temp_path, file.filename, audio)
+    except HTTPException as exc:
+        logger.warning(f"⚠️ Rejected voice sample from user {user.id}: {exc.detail}")
+        raise
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return VoiceUploadResponse(
+        success=True,
+        sample=_sample_read(sample),
+        samples=len(voice_crud.get_user_samples(session, user.id)),
+        required=settings.VOICE_SAMPLES_PER_USER,
+        replaced=replaced,
+    )
+
+
+@router.get("/samples", response_model=VoiceSamplesResponse)
+def list_voice_samples(
+    session: Session = Depends(get_session),
+    user=Depends(get_current_user),
+):
+    """The current user's voice samples, newest first."""
+    return VoiceSamplesResponse(
+        samples=[_sample_read(sample) for sample in voice_crud.get_user_samples(session, user.id)],
+        required=settings.VOICE_SAMPLES_PER_USER,
+    )
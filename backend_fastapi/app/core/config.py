@@ -25,6 +25,92 @@ class Settings(BaseSettings):
     ZOHO_CLIENT_ID: str = "your-zoho-client-id-here"  # TODO: Set your actual Zoho client ID
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
+    OPERATOR_USER_IDS: List[str] = []  # user ids allowed to use the operator endpoints (duplicate review, model registration)
+    FACE_EMBEDDING_DIM: int = 1536
+    FACE_EMBEDDING_MODEL: str = "v1"  # model version stored in face_data.embedding (the base version)
+    FACE_SEARCH_BACKEND: str = "pgvector"  # "pgvector" (ANN index) or "exact" (in-process NumPy scan)
+    FACE_SEARCH_EF_SEARCH: int = 40  # hnsw.ef_search default per identify query
+    FACE_SEARCH_IVFFLAT_PROBES: int = 10  # ivfflat.probes if an IVFFlat index is used
+    FACE_SEARCH_MAX_TOP_K: int = 100
+    FACE_SEARCH_CANDIDATE_FACTOR: int = 4  # faces fetched per requested user (several frames/poses each)
+    FACE_SEARCH_BATCH_SIZE: int = 256  # probes scored per matrix multiply
+    FACE_SEARCH_MAX_BATCH_PROBES: int = 10000
+    FACE_INDEX_QUANTIZATION: str = "int8"  # "int8" (4x smaller) or "pq" (product quantization)
+    FACE_PQ_SUBVECTORS: int = 96  # PQ code bytes per vector; must divide FACE_EMBEDDING_DIM
+    FACE_QUANTIZER_TRAIN_SIZE: int = 20000
+    FACE_RERANK_FACTOR: int = 4  # shortlist of top_k * factor re-scored at full precision; trades latency for recall
+    FACE_RECALL_EVAL_QUERIES: int = 100  # enrolled faces used as probes to estimate recall at build time
+    FACE_RECALL_EVAL_K: int = 10
+    FACE_TEMPLATE_PER_POSE: bool = True  # also keep straight/left/right templates next to the overall one
+    FACE_TEMPLATE_SHORTLIST_FACTOR: int = 2  # users whose raw frames are re-checked = top_k * factor
+    FACE_INDEX_SNAPSHOT_DIR: str = "storage/face_index"  # memory-mapped warm-start snapshot; "" disables
+    FACE_INDEX_SNAPSHOT_HEADROOM: float = 0.1  # spare rows in the snapshot so appends stay in the mapped pages
+    FACE_INDEX_SNAPSHOT_KEEP: int = 2  # snapshot versions kept on disk
+    FACE_CHANGE_FEED_ENABLED: bool = True  # LISTEN for face_data changes and apply them to this worker's indexes
+    FACE_CHANGE_FEED_POLL_SECONDS: float = 2.0  # max lag if a NOTIFY is missed
+    FACE_CHANGE_FEED_GAP_SECONDS: float = 60.0  # how long an unseen seq below the watermark is waited for
+    FACE_CHANGE_FEED_RETENTION_HOURS: int = 24
+    FACE_SEARCH_SHARDS: int = 0  # search worker processes for backend "sharded"; 0 = one per CPU
+    FACE_SHARD_TIMEOUT_SECONDS: float = 2.0  # shards slower than this are left out of the merged result
+    FACE_SHARD_WRITE_BUFFER: int = 10000  # index updates queued per shard (e.g. while it loads) before it is reloaded instead
+    FACE_VERIFY_THRESHOLD: float = 0.6  # cosine similarity at or above which /faces/verify reports a match
+    FACE_VERIFY_CACHE_SIZE: int = 10000  # users whose normalized vectors are kept hot for verification
+    FACE_VERIFY_CACHE_TTL: float = 30.0  # seconds; bounds staleness from writes served by other workers
+    FACE_IDENTIFY_CACHE_SIZE: int = 10000  # identify results kept per worker; 0 disables the cache
+    FACE_IDENTIFY_CACHE_TTL: float = 30.0  # seconds; bounds staleness when the change feed is off
+    FACE_IDENTIFY_CACHE_BITS: int = 16  # SimHash bits of the probe key; fewer = larger buckets
+    FACE_IDENTIFY_CACHE_PROBE_BITS: int = 8  # weakest key bits a lookup may flip (up to 3 at once)
+    FACE_IDENTIFY_CACHE_MIN_COSINE: float = 0.95  # a cached result answers probes at least this similar
+    FACE_MODEL_REFRESH_SECONDS: float = 15.0  # how often a worker re-reads which embedding model is active
+    FACE_REEMBED_ENABLED: bool = True  # backfill registered model versions in the background
+    FACE_REEMBED_BATCH_SIZE: int = 128  # faces re-embedded and written per transaction
+    FACE_REEMBED_PAUSE_SECONDS: float = 1.0  # sleep between batches so uploads and searches keep the database
+    FACE_REEMBED_RETRY_SECONDS: float = 300.0  # wait before retrying faces whose images failed to embed
+    FACE_DUPLICATE_CHECK_ENABLED: bool = True  # check new enrollments against other users' faces
+    FACE_DUPLICATE_THRESHOLD: float = 0.75  # cosine similarity at or above which a cross-user match is flagged
+    FACE_DUPLICATE_TOP_K: int = 5  # other users checked per new face
+    FACE_DUPLICATE_BATCH_SIZE: int = 64  # new faces scored together
+    FACE_DUPLICATE_BATCH_WAIT_SECONDS: float = 0.5  # how long a batch waits to fill up
+    FACE_DUPLICATE_MAX_PENDING: int = 10000  # queued checks beyond this are dropped (and logged)
+    FACE_RETENTION_PER_POSE: int = 5  # embedded frames kept per user and face_type; 0 keeps every upload
+    FACE_RETENTION_MIN_DISTANCE: float = 0.05  # cosine distance under which a frame duplicates a better kept one
+    FACE_SCAN_ENABLED: bool = False  # also run a scan worker pool inside each API worker (otherwise: python face_scan_workers.py)
+    FACE_SCAN_WORKERS: int = 2  # scan worker processes (one core each); 0 = one per CPU
+    FACE_SCAN_DIR: str = "storage/scans"  # frame embeddings of queued scans (.npy), removed once scanned
+    FACE_SCAN_FEED_DIR: str = ""  # <content_id>.npy frame files dropped here are queued as scans; "" disables
+    FACE_SCAN_THRESHOLD: float = 0.6  # cosine similarity at or above which a scanned frame matches a user
+    FACE_SCAN_BATCH_FRAMES: int = 512  # frames scored per matrix multiply
+    FACE_SCAN_MAX_FRAMES: int = 100000  # frames per submitted scan
+    FACE_SCAN_POLL_SECONDS: float = 1.0  # how often idle workers look for queued scans
+    FACE_SCAN_STALE_MINUTES: int = 30  # scans running this long (worker died) are queued again
+    FACE_EXTRACTOR_BACKEND: str = ""  # server-side embedding: "onnx", or "hash" (deterministic, for tests); "" disables
+    FACE_EXTRACTOR_MODEL_PATH: str = ""  # ONNX model taking a batch of RGB face crops
+    FACE_EXTRACTOR_INPUT_SIZE: int = 112  # side of the square crop the model takes
+    FACE_EXTRACTOR_VERSION: str = ""  # model version its embeddings are stored under; "" = FACE_EMBEDDING_MODEL
+    FACE_EXTRACTOR_DIM: int = 0  # embedding width of the hash backend; 0 = the version's dimension
+    FACE_EXTRACTOR_WORKERS: int = 2  # inference processes (one ONNX thread each); 0 = one per CPU
+    FACE_EXTRACTOR_MAX_BATCH: int = 32  # images per inference call
+    FACE_EXTRACTOR_MAX_WAIT_MS: float = 5.0  # how long a request waits for others to fill its batch
+    FACE_EXTRACTOR_BACKFILL_BATCH: int = 64  # stored images without an embedding embedded per step
+    FACE_EXTRACTOR_BACKFILL_PAUSE_SECONDS: float = 1.0  # sleep between backfill steps
+    FACE_PREPROCESS_WORKERS: int = 0  # decode/align processes feeding onnx inference via shared memory; 0 = inference workers decode
+    FACE_PREPROCESS_SLOTS: int = 0  # shared-memory batch buffers in flight; 0 = two per inference worker
+    FACE_QUALITY_ENABLED: bool = True  # reject blurry, badly exposed or tiny uploads before they are stored
+    FACE_QUALITY_MIN_SCORE: float = 0.35  # overall quality (0-1) below which an upload gets a 422
+    FACE_QUALITY_SIZE: int = 128  # short side of the grayscale copy quality is measured on
+    FACE_QUALITY_SHARPNESS_REF: float = 150.0  # Laplacian variance on that copy that counts as fully sharp
+    FACE_QUALITY_MIN_FACE_PX: int = 80  # face box side (original pixels) that counts as full size
+    FACE_VIDEO_SAMPLE_FPS: float = 5.0  # frames per second decoded and scored from an enrollment clip
+    FACE_VIDEO_MAX_SECONDS: float = 30.0  # longer enrollment clips are rejected
+    FACE_VIDEO_FRAMES_PER_POSE: int = 3  # best frames kept per pose from one clip
+    FACE_VIDEO_MIN_GAP_SECONDS: float = 0.3  # frames kept for one pose are at least this far apart in the clip
+    FACE_VIDEO_POSES: List[str] = ["straight", "left", "right"]  # pose order assumed when the client sends no pose_marks
+    VOICE_SAMPLE_RATE: int = 16000  # voice samples are decoded to mono float32 at this rate
+    VOICE_SAMPLES_PER_USER: int = 3  # enrollment samples kept per user; a new one replaces the oldest
+    VOICE_MIN_SECONDS: float = 1.0  # shorter voice samples are rejected
+    VOICE_MAX_SECONDS: float = 30.0  # longer voice samples are rejected before decoding
+    VOICE_MIN_RMS: float = 0.005  # quieter (near-silent) voice samples are rejected
+    VOICE_DECODE_CHUNK_FRAMES: int = 65536  # WAV frames read per decode step
     class Config:
         env_file = "../.env"
         # Also try loading from backend_fastapi/.env if present
@@ -1,7 +1,8 @@
+import os
 import secrets
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import BinaryIO, Optional
 from app.core.config import settings
 
 
@@ -69,6 +70,39 @@ class FileStorageManager:
         path.write_bytes(content)
         return True, str(path.relative_to(cls.BASE_DIR)).replace("\\", "/")
 
+    @classmethod
+    def save_temp(cls, source: BinaryIO, original_filename: str, chunk_size: int = 1 << 20) -> tuple[bool, str]:
+        """Copy an upload into TEMP_DIR chunk by chunk and return (success, path_or_error).
+
+        The copy never holds the whole file in memory, and it stops at the
+        size limit. This is only a backstop, because Starlette has already
+        received and spooled the body by now. Routes that need to cap what
+        the server receives sit behind UploadLimitMiddleware. The caller
+        deletes the file.
+        """
+        error = cls._validate_file(original_filename, 0)
+        if error:
+            return False, error
+        cls.TEMP_DIR.mkdir(parents=True, exist_ok=True)
+        path = cls.TEMP_DIR / cls._secure_filename(original_filename)
+        written = 0
+        with open(path, "wb") as target:
+            while chunk := source.read(chunk_size):
+                written += len(chunk)
+                if written > cls.MAX_FILE_SIZE:
+                    target.close()
+                    path.unlink(missing_ok=True)
+                    return False, f"File size exceeds {settings.MAX_UPLOAD_SIZE_MB}MB."
+                target.write(chunk)
+        return True, str(path)
+
+    @classmethod
+    def store_voice(cls, user_id: str, temp_path: str, original_filename: str) -> str:
+        """Move a sample streamed by save_temp into the user's voice directory; returns its relative path."""
+        path = cls._user_dir(cls.VOICE_DIR, user_id) / cls._secure_filename(original_filename)
+        os.replace(temp_path, path)
+        return str(path.relative_to(cls.BASE_DIR)).replace("\\", "/")
+
     @classmethod
     def get_file(cls, relative_path: str) -> Optional[bytes]:
         """Retrieve file contents with path traversal validation."""
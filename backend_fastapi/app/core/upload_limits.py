@@ -0,0 +1,75 @@
+import logging
+from typing import Iterable
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+# Room for the multipart boundaries and small form fields around the file itself
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UploadLimitMiddleware:
+    """Cap request bodies on upload routes before Starlette spools them.
+
+    Multipart parsing reads (and spools to disk) the whole body before a
+    route runs, so a size check in the handler comes too late. Here a
+    declared Content-Length over the limit is refused without reading the
+    body, and a chunked body is cut off as soon as the bytes received pass
+    the limit; either way the client gets a 413.
+    """
+
+    def __init__(self, app, paths: Iterable[str], max_bytes: int):
+        self.app = app
+        self.paths = set(paths)
+        self.max_bytes = max_bytes + FORM_OVERHEAD_BYTES
+        self.detail = f"File size exceeds {max_bytes // (1024 * 1024)}MB."
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and (not length.isdigit() or int(length) > self.max_bytes):
+            logger.warning(f"⚠️ Refused {scope['path']} upload of {length.decode(errors='replace')} bytes")
+            await self._reject(scope, receive, send)
+            return
+        received = 0
+        exceeded = False
+        responded = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise UploadTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal responded
+            if exceeded:
+                # The body parser turned the abort into its own error response; answer 413 instead
+                if message["type"] == "http.response.start" and not responded:
+                    responded = True
+                    await self._reject(scope, receive, send)
+                return
+            responded = responded or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLarge:
+            pass
+        if exceeded:
+            logger.warning(f"⚠️ Cut off {scope['path']} upload after {received} bytes")
+            if not responded:
+                await self._reject(scope, receive, send)
+
+    async def _reject(self, scope, receive, send):
+        await JSONResponse({"detail": self.detail}, status_code=413)(scope, receive, send)
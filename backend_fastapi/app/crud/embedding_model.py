@@ -0,0 +1,148 @@
+import re
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import exists, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+from app.core.config import settings
+from app.models.embedding_model import (
+    MODEL_ACTIVE,
+    MODEL_BACKFILLING,
+    MODEL_RETIRED,
+    EmbeddingModel,
+    FaceEmbedding,
+)
+from app.models.face import FaceData
+
+# Versions end up in index names and partial-index predicates
+VERSION_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,31}$")
+# pgvector's HNSW index only covers vectors up to this many dimensions
+MAX_INDEXED_DIM = 2000
+
+
+def is_base_version(version: Optional[str]) -> bool:
+    """True for the version stored in face_data.embedding itself."""
+    return version is None or version == settings.FACE_EMBEDDING_MODEL
+
+
+def get_models(session: Session) -> list[EmbeddingModel]:
+    return session.exec(select(EmbeddingModel).order_by(EmbeddingModel.created_at)).all()
+
+
+def get_model(session: Session, version: str) -> Optional[EmbeddingModel]:
+    return session.get(EmbeddingModel, version)
+
+
+def get_active_model(session: Session) -> EmbeddingModel:
+    """The active version; the base version if none has been recorded yet."""
+    model = session.exec(select(EmbeddingModel).where(EmbeddingModel.status == MODEL_ACTIVE)).first()
+    if model is None:
+        model = EmbeddingModel(
+            version=settings.FACE_EMBEDDING_MODEL, dim=settings.FACE_EMBEDDING_DIM, status=MODEL_ACTIVE
+        )
+    return model
+
+
+def register_model(session: Session, version: str, dim: int) -> EmbeddingModel:
+    """Add a model version to be backfilled, with its own partial HNSW index.
+
+    The index is created while the version has no rows, so it costs nothing
+    to build and is maintained incrementally as the backfill writes.
+    """
+    if not VERSION_PATTERN.match(version):
+        raise ValueError(f"Invalid model version '{version}'")
+    if dim <= 0 or dim > MAX_INDEXED_DIM:
+        raise ValueError(f"Model dimension must be between 1 and {MAX_INDEXED_DIM}")
+    if get_model(session, version) is not None or is_base_version(version):
+        raise ValueError(f"Model version '{version}' already exists")
+    if get_model(session, settings.FACE_EMBEDDING_MODEL) is None:
+        # create_all leaves the table empty; record the base version first
+        active = session.exec(select(EmbeddingModel).where(EmbeddingModel.status == MODEL_ACTIVE)).first()
+        session.add(
+            EmbeddingModel(
+                version=settings.FACE_EMBEDDING_MODEL,
+                dim=settings.FACE_EMBEDDING_DIM,
+                status=MODEL_RETIRED if active is not None else MODEL_ACTIVE,
+            )
+        )
+    model = EmbeddingModel(version=version, dim=dim, status=MODEL_BACKFILLING)
+    session.add(model)
+    session.execute(
+        text(
+            f"CREATE INDEX IF NOT EXISTS {version_index_name(version)} ON face_embeddings "
+            f"USING hnsw ((embedding::vector({int(dim)})) vector_ip_ops) WITH (m = 16, ef_construction = 64) "
+            f"WHERE model_version = '{version}'"
+        )
+    )
+    session.commit()
+    session.refresh(model)
+    return model
+
+
+def version_index_name(version: str) -> str:
+    return "ix_face_embeddings_hnsw_ip_" + re.sub(r"[^A-Za-z0-9_]", "_", version).lower()
+
+
+def get_coverage(session: Session, version: str) -> tuple[int, int]:
+    """(faces, faces with an embedding under ``version``)."""
+    faces = session.exec(select(func.count()).select_from(FaceData)).one()
+    if is_base_version(version):
+        covered = session.exec(select(func.count()).where(FaceData.embedding.isnot(None))).one()
+    else:
+        covered = session.exec(
+            select(func.count()).select_from(FaceEmbedding).where(FaceEmbedding.model_version == version)
+        ).one()
+    return faces, covered
+
+
+def get_faces_missing_embedding(session: Session, version: str, after_id: Optional[UUID], limit: int) -> list:
+    """(id, file_path) of faces with no ``version`` embedding yet, in id order past ``after_id``."""
+    statement = (
+        select(FaceData.id, FaceData.file_path)
+        .where(
+            ~exists().where((FaceEmbedding.face_id == FaceData.id) & (FaceEmbedding.model_version == version))
+        )
+        .order_by(FaceData.id)
+        .limit(limit)
+    )
+    if after_id is not None:
+        statement = statement.where(FaceData.id > after_id)
+    return session.exec(statement).all()
+
+
+def upsert_face_embeddings(session: Session, version: str, face_ids: list, units, norms) -> None:
+    """Write unit vectors (and original norms) for ``version``; faces deleted meanwhile are skipped."""
+    if not face_ids:
+        return
+    live = set(session.exec(select(FaceData.id).where(FaceData.id.in_(face_ids))).all())
+    values = [
+        {"face_id": face_id, "model_version": version, "embedding": unit, "embedding_norm": float(norm)}
+        for face_id, unit, norm in zip(face_ids, units, norms)
+        if face_id in live
+    ]
+    if not values:
+        return
+    statement = insert(FaceEmbedding.__table__).values(values)
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=["face_id", "model_version"],
+            set_={"embedding": statement.excluded.embedding, "embedding_norm": statement.excluded.embedding_norm},
+        )
+    )
+
+
+def activate_model(session: Session, version: str) -> EmbeddingModel:
+    """Make ``version`` the active one and retire the previous one, atomically."""
+    model = session.exec(select(EmbeddingModel).where(EmbeddingModel.version == version).with_for_update()).one()
+    for previous in session.exec(
+        select(EmbeddingModel).where(EmbeddingModel.status == MODEL_ACTIVE).with_for_update()
+    ).all():
+        if previous.version != version:
+            previous.status = MODEL_RETIRED
+            session.add(previous)
+    model.status = MODEL_ACTIVE
+    model.activated_at = func.now()
+    session.add(model)
+    session.commit()
+    session.refresh(model)
+    return model
@@ -1,6 +1,23 @@
+from typing import Optional
 from uuid import UUID
+import numpy as np
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import cast, func, text
 from sqlmodel import Session, select
+from app.core.config import settings
+from app.crud import face_template as template_crud
+from app.crud.embedding_model import is_base_version
+from app.models.embedding_model import FaceEmbedding
 from app.models.face import FaceData
+from app.services import face_retention, pgcopy
+from app.services.duplicate_detection import duplicate_checker
+from app.services.embedding_versions import embedding_versions
+from app.services.face_index import FaceArrays, face_index
+from app.services.identify_cache import identify_cache
+from app.services.embeddings import prepare_embedding
+from app.services.face_verification import user_face_cache
+from app.services.quantization import quantized_face_index
+from app.services.sharded_index import sharded_face_index
 
 
 def create_face_record(
@@ -10,27 +27,126 @@ def create_face_record(
     file_path: str,
     file_name: str,
     embedding: list[float] = None,
+    model_version: Optional[str] = None,
+    dim: Optional[int] = None,
+    quality_score: Optional[float] = None,
 ) -> FaceData:
-    """Create a new face record with optional embedding."""
+    """Create a new face record with optional embedding (list or float32 ndarray).
+
+    The embedding is validated and stored unit-length with its original norm;
+    raises InvalidEmbeddingError for a wrong dimension, NaN/Inf or zero vector.
+    An embedding from a model version other than the base one (``dim`` wide)
+    goes to face_embeddings and that version's index instead of face_data.
+    """
+    if not is_base_version(model_version):
+        return _create_versioned_face_record(
+            session, user_id, face_type, file_path, file_name, embedding, model_version, dim, quality_score
+        )
+    unit, norm = prepare_embedding(embedding) if embedding is not None else (None, None)
+    face_data = FaceData(
+        user_id=user_id,
+        face_type=face_type,
+        file_path=file_path,
+        file_name=file_name,
+        # A list: SQLModel table models silently drop an ndarray, which fails list[float] validation
+        embedding=unit.tolist() if unit is not None else None,
+        embedding_norm=norm,
+        quality_score=quality_score,
+    )
+    session.add(face_data)
+    if unit is not None:
+        template_crud.add_frame_to_templates(session, UUID(str(user_id)), face_type, unit)
+    session.commit()
+    session.refresh(face_data)
+    if face_data.embedding is not None:
+        user_face_cache.invalidate(face_data.user_id)
+        for index in (face_index, quantized_face_index, sharded_face_index):
+            index.add(face_data.id, face_data.user_id, face_data.face_type, face_data.embedding, norm=norm)
+        # Only once the indexes have the face: a result computed in between would be cached as current
+        identify_cache.bump()
+        duplicate_checker.submit(face_data.id, face_data.user_id, unit)
+        face_retention.prune_after_write(session, face_data.user_id, face_type, [face_data.id])
+    return face_data
+
+
+def _create_versioned_face_record(
+    session: Session,
+    user_id: str,
+    face_type: str,
+    file_path: str,
+    file_name: str,
+    embedding,
+    model_version: str,
+    dim: Optional[int],
+    quality_score: Optional[float] = None,
+) -> FaceData:
+    unit, norm = prepare_embedding(embedding, dim) if embedding is not None else (None, None)
     face_data = FaceData(
         user_id=user_id,
         face_type=face_type,
         file_path=file_path,
         file_name=file_name,
-        embedding=embedding if embedding is not None else None,
+        embedding_model=model_version,
+        quality_score=quality_score,
     )
     session.add(face_data)
+    if unit is not None:
+        # Flush first: the version row references the new face
+        session.flush()
+        session.add(
+            FaceEmbedding(
+                face_id=face_data.id,
+                model_version=model_version,
+                # A list, as for face_data.embedding: an ndarray would be silently dropped
+                embedding=unit.tolist(),
+                embedding_norm=norm,
+            )
+        )
     session.commit()
     session.refresh(face_data)
+    if unit is not None:
+        user_face_cache.invalidate(face_data.user_id)
+        embedding_versions.add(model_version, face_data.id, face_data.user_id, face_type, unit, norm=norm)
+        identify_cache.bump()
+        duplicate_checker.submit(face_data.id, face_data.user_id, unit, model_version)
+        face_retention.prune_after_write(session, face_data.user_id, face_type, [face_data.id], model_version)
     return face_data
 
 
+def _embedded_faces(model_version: Optional[str] = None, outer: bool = False):
+    """select (id, user_id, face_type, embedding, embedding_norm) under a model version.
+
+    The base version reads face_data.embedding; other versions join their
+    face_embeddings rows (a left join with ``outer``, leaving embedding NULL).
+    """
+    if is_base_version(model_version):
+        return select(
+            FaceData.id, FaceData.user_id, FaceData.face_type, FaceData.embedding, FaceData.embedding_norm
+        )
+    statement = select(
+        FaceData.id, FaceData.user_id, FaceData.face_type, FaceEmbedding.embedding, FaceEmbedding.embedding_norm
+    )
+    on = (FaceEmbedding.face_id == FaceData.id) & (FaceEmbedding.model_version == model_version)
+    return statement.outerjoin(FaceEmbedding, on) if outer else statement.join(FaceEmbedding, on)
+
+
 def get_user_faces(session: Session, user_id: UUID) -> list[FaceData]:
     """Get all face records for a user."""
     statement = select(FaceData).where(FaceData.user_id == user_id)
     return session.exec(statement).all()
 
 
+def get_user_embeddings(session: Session, user_id: UUID, model_version: Optional[str] = None) -> list:
+    """(id, face_type, embedding) of a user's embedded faces, without the rest of the row."""
+    if not is_base_version(model_version):
+        statement = _embedded_faces(model_version).where(FaceData.user_id == user_id)
+        return session.exec(statement).all()
+    statement = select(FaceData.id, FaceData.face_type, FaceData.embedding).where(
+        (FaceData.user_id == user_id) & FaceData.embedding.isnot(None)
+    )
+    return session.exec(statement).all()
+
+
 def get_face_by_type(
     session: Session,
     user_id: str,
@@ -47,6 +163,359 @@ def delete_user_faces(session: Session, user_id: UUID) -> None:
     """Delete all face records for a user."""
     statement = select(FaceData).where(FaceData.user_id == user_id)
     faces = session.exec(statement).all()
+    for face in faces:
+        session.delete(face)
+    template_crud.delete_user_templates(session, user_id)
+    session.commit()
+    user_face_cache.invalidate(user_id)
+    face_index.remove_user(user_id)
+    quantized_face_index.remove_user(user_id)
+    sharded_face_index.remove_user(user_id)
+    embedding_versions.remove_user(user_id)
+    identify_cache.bump()
+
+
+def get_pose_frames(session: Session, user_id: UUID, face_type: str, model_version: Optional[str] = None) -> list:
+    """(id, user_id, face_type, embedding, embedding_norm, quality_score) of a user's embedded frames
+    of one pose, newest first."""
+    statement = (
+        _embedded_faces(model_version)
+        .add_columns(FaceData.quality_score)
+        .where((FaceData.user_id == user_id) & (FaceData.face_type == face_type))
+        .order_by(FaceData.created_at.desc())
+    )
+    if is_base_version(model_version):
+        statement = statement.where(FaceData.embedding.isnot(None))
+    return session.exec(statement).all()
+
+
+def get_multi_frame_poses(session: Session, model_version: Optional[str] = None) -> list:
+    """(user_id, face_type, frames) of every pose a user has more than one embedded frame of."""
+    frames = func.count(FaceData.id).label("frames")
+    statement = _embedded_faces(model_version).with_only_columns(FaceData.user_id, FaceData.face_type, frames)
+    if is_base_version(model_version):
+        statement = statement.where(FaceData.embedding.isnot(None))
+    statement = statement.group_by(FaceData.user_id, FaceData.face_type).having(frames > 1)
+    return session.exec(statement).all()
+
+
+def delete_faces(session: Session, face_ids: list) -> list[str]:
+    """Delete face records by id; returns the file paths of the deleted rows.
+
+    Their frames are taken out of the templates and of this worker's
+    indexes; other workers see the deletes through the change feed.
+    """
+    if not face_ids:
+        return []
+    faces = session.exec(select(FaceData).where(FaceData.id.in_(face_ids))).all()
+    by_user: dict = {}
+    for face in faces:
+        if face.embedding is not None:
+            by_user.setdefault(face.user_id, []).append((face.face_type, face.embedding))
+    for user_id, frames in by_user.items():
+        template_crud.remove_frames_from_templates(session, user_id, frames)
+    file_paths = [face.file_path for face in faces]
+    user_ids = {face.user_id for face in faces}
     for face in faces:
         session.delete(face)
     session.commit()
+    for user_id in user_ids:
+        user_face_cache.invalidate(user_id)
+    for index in (face_index, quantized_face_index, sharded_face_index, embedding_versions):
+        index.remove_faces(face_ids)
+    identify_cache.bump()
+    return file_paths
+
+
+def search_similar_faces(
+    session: Session,
+    embedding: list[float],
+    limit: int,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    model_version: Optional[str] = None,
+    dim: Optional[int] = None,
+) -> list:
+    """Nearest face records by inner product, served by the embedding ANN index.
+
+    Stored embeddings are unit-length, so ranking the normalized query by
+    inner product is cosine ranking. ``ef_search``/``probes`` tune the
+    HNSW/IVFFlat search for this transaction only. Returns rows of
+    (id, user_id, face_type, score, inner_product) where score is the cosine
+    similarity and inner_product is against the vectors as uploaded.
+    Other model versions (``dim`` wide) are ranked through their partial
+    index over ``face_embeddings.embedding::vector(dim)``.
+    """
+    if ef_search is not None:
+        # HNSW returns at most ef_search candidates, so never go below the limit
+        session.execute(text(f"SET LOCAL hnsw.ef_search = {max(int(ef_search), int(limit))}"))
+    if probes is not None:
+        session.execute(text(f"SET LOCAL ivfflat.probes = {int(probes)}"))
+    query, query_norm = prepare_embedding(embedding, dim)
+    if not is_base_version(model_version):
+        # Same expression as the version's index, so the planner can use it
+        negative_inner_product = cast(FaceEmbedding.embedding, Vector(len(query))).max_inner_product(query)
+        statement = (
+            select(
+                FaceData.id,
+                FaceData.user_id,
+                FaceData.face_type,
+                (-negative_inner_product).label("score"),
+                (-negative_inner_product * func.coalesce(FaceEmbedding.embedding_norm, 1.0) * query_norm).label(
+                    "inner_product"
+                ),
+            )
+            .join(FaceEmbedding, FaceEmbedding.face_id == FaceData.id)
+            .where(FaceEmbedding.model_version == model_version)
+            .order_by(negative_inner_product)
+            .limit(limit)
+        )
+        return session.exec(statement).all()
+    # pgvector's <#> operator yields the negated inner product
+    negative_inner_product = FaceData.embedding.max_inner_product(query)
+    statement = (
+        select(
+            FaceData.id,
+            FaceData.user_id,
+            FaceData.face_type,
+            (-negative_inner_product).label("score"),
+            (-negative_inner_product * func.coalesce(FaceData.embedding_norm, 1.0) * query_norm).label(
+                "inner_product"
+            ),
+        )
+        .where(FaceData.embedding.isnot(None))
+        .order_by(negative_inner_product)
+        .limit(limit)
+    )
+    return session.exec(statement).all()
+
+
+def iter_face_embeddings(
+    session: Session,
+    chunk_size: int = 5000,
+    shard: Optional[tuple[int, int]] = None,
+    model_version: Optional[str] = None,
+):
+    """Yield (id, user_id, face_type, embedding, embedding_norm) rows in id-ordered chunks.
+
+    Keyset pagination keeps memory bounded to one chunk regardless of table size.
+    ``shard=(i, n)`` keeps only users whose id's low 32 bits are i modulo n
+    (see app.services.sharded_index.shard_of). ``model_version`` selects
+    the embeddings of a version other than the base one.
+    """
+    last_id = None
+    while True:
+        statement = _embedded_faces(model_version).order_by(FaceData.id).limit(chunk_size)
+        if is_base_version(model_version):
+            statement = statement.where(FaceData.embedding.isnot(None))
+        if shard is not None:
+            statement = statement.where(
+                text(
+                    "('x' || right(replace(face_data.user_id::text, '-', ''), 8))::bit(32)::bigint % :shards = :shard"
+                ).bindparams(shard=shard[0], shards=shard[1])
+            )
+        if last_id is not None:
+            statement = statement.where(FaceData.id > last_id)
+        rows = session.exec(statement).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+# Rows per binary COPY chunk: ~6 KB each at 1536-d, so a chunk stays near 60 MB
+ARRAY_CHUNK_ROWS = 10000
+# Same shard filter as iter_face_embeddings, written for psycopg2 parameters
+_SHARD_FILTER_SQL = (
+    "('x' || right(replace(face_data.user_id::text, '-', ''), 8))::bit(32)::bigint %% %(shards)s = %(shard)s"
+)
+
+
+def count_embedded_faces(session: Session, model_version: Optional[str] = None) -> int:
+    """How many faces have an embedding under ``model_version``."""
+    statement = _embedded_faces(model_version).with_only_columns(func.count(FaceData.id))
+    if is_base_version(model_version):
+        statement = statement.where(FaceData.embedding.isnot(None))
+    return session.exec(statement).one()
+
+
+def iter_face_arrays(
+    session: Session,
+    dim: int = settings.FACE_EMBEDDING_DIM,
+    chunk_size: int = ARRAY_CHUNK_ROWS,
+    shard: Optional[tuple[int, int]] = None,
+    model_version: Optional[str] = None,
+):
+    """Yield embedded faces as FaceArrays blocks, read with binary COPY.
+
+    The bulk counterpart of iter_face_embeddings (same order, ``shard`` and
+    ``model_version``): each id-ordered chunk is streamed in PostgreSQL's
+    binary format into one reused buffer and decoded with a single
+    structured-dtype view, so no ORM row, list or Python float is created
+    per face. face_type travels as a code into the distinct types.
+    """
+    face_types = sorted(session.exec(select(FaceData.face_type).distinct()).all())
+    layout = pgcopy.tuple_dtype(
+        [
+            ("id", "uuid"),
+            ("user_id", "uuid"),
+            ("face_type", "int2"),
+            ("embedding", pgcopy.vector_field(dim)),
+            ("embedding_norm", "float4"),
+        ]
+    )
+    if is_base_version(model_version):
+        embedding, norm = "face_data.embedding", "face_data.embedding_norm"
+        source = "face_data WHERE face_data.embedding IS NOT NULL"
+    else:
+        embedding, norm = "e.embedding", "e.embedding_norm"
+        source = (
+            "face_data JOIN face_embeddings e ON e.face_id = face_data.id "
+            "AND e.model_version = %(version)s WHERE true"
+        )
+    if shard is not None:
+        source += f" AND {_SHARD_FILTER_SQL}"
+    buffer = pgcopy.CopyBuffer(64 + chunk_size * layout.itemsize)
+    cursor = session.connection().connection.cursor()
+    last_id = None
+    try:
+        while True:
+            # array_position is 1-based; 0 marks a type added since the distinct read
+            sql = cursor.mogrify(
+                "COPY (SELECT face_data.id, face_data.user_id, "
+                "coalesce(array_position(%(types)s::text[], face_data.face_type), 0)::int2, "
+                f"{embedding}, coalesce({norm}, vector_norm({embedding}))::float4 FROM {source} "
+                "AND (%(last)s::uuid IS NULL OR face_data.id > %(last)s::uuid) "
+                "ORDER BY face_data.id LIMIT %(n)s) TO STDOUT WITH (FORMAT binary)",
+                {
+                    "types": face_types,
+                    "version": model_version,
+                    "shard": shard[0] if shard else None,
+                    "shards": shard[1] if shard else None,
+                    "last": last_id,
+                    "n": chunk_size,
+                },
+            ).decode()
+            buffer.clear()
+            cursor.copy_expert(sql, buffer)
+            chunk = _decode_face_arrays(session, layout, buffer, face_types)
+            if not len(chunk.ids):
+                return
+            yield chunk
+            if len(chunk.ids) < chunk_size:
+                return
+            last_id = str(UUID(bytes=chunk.ids[-1].tobytes()))
+    finally:
+        cursor.close()
+
+
+def _decode_face_arrays(session: Session, layout, buffer, face_types: list[str]) -> FaceArrays:
+    # Copies out of the buffer so it can be refilled; the views die with this frame
+    records = pgcopy.decode_tuples(layout, buffer.getbuffer())
+    embeddings = np.empty(records["embedding"].shape, dtype=np.float32)
+    embeddings[:] = records["embedding"]
+    chunk = FaceArrays(
+        ids=np.array(records["id"]),
+        user_ids=np.array(records["user_id"]),
+        face_types=records["face_type"].astype(np.int16) - 1,
+        face_type_names=list(face_types),
+        embeddings=embeddings,
+        norms=records["embedding_norm"].astype(np.float32),
+    )
+    unknown = np.flatnonzero(chunk.face_types < 0)
+    if len(unknown):
+        ids = [UUID(bytes=chunk.ids[i].tobytes()) for i in unknown]
+        names = dict(session.exec(select(FaceData.id, FaceData.face_type).where(FaceData.id.in_(ids))).all())
+        for i, face_id in zip(unknown, ids):
+            name = names.get(face_id, "")
+            if name not in chunk.face_type_names:
+                chunk.face_type_names.append(name)
+            chunk.face_types[i] = chunk.face_type_names.index(name)
+    return chunk
+
+
+def get_faces_updated_since(session: Session, since) -> list:
+    """(id, user_id, face_type, embedding, embedding_norm) of embedded faces written after ``since``."""
+    statement = select(
+        FaceData.id, FaceData.user_id, FaceData.face_type, FaceData.embedding, FaceData.embedding_norm
+    ).where((FaceData.updated_at > since) & FaceData.embedding.isnot(None))
+    return session.exec(statement).all()
+
+
+def get_faces_by_ids(session: Session, face_ids: list, model_version: Optional[str] = None) -> list:
+    """(id, user_id, face_type, embedding, embedding_norm) of the given faces that still exist.
+
+    The embedding is NULL for faces that have none under ``model_version``.
+    """
+    if not face_ids:
+        return []
+    statement = _embedded_faces(model_version, outer=True).where(FaceData.id.in_(face_ids))
+    return session.exec(statement).all()
+
+
+def get_embedded_face_ids(session: Session) -> list[UUID]:
+    """Ids of every face that has an embedding (16 bytes a row, no vectors)."""
+    return session.exec(select(FaceData.id).where(FaceData.embedding.isnot(None))).all()
+
+
+def get_faces_without_embedding(session: Session, after_id: Optional[UUID], limit: int) -> list:
+    """(id, file_path) of faces stored without a base-version embedding, in id order past ``after_id``."""
+    statement = select(FaceData.id, FaceData.file_path).where(FaceData.embedding.is_(None))
+    if after_id is not None:
+        statement = statement.where(FaceData.id > after_id)
+    return session.exec(statement.order_by(FaceData.id).limit(limit)).all()
+
+
+def count_faces_without_embedding(session: Session) -> int:
+    return session.exec(select(func.count()).select_from(FaceData).where(FaceData.embedding.is_(None))).one()
+
+
+def set_face_embeddings(session: Session, face_ids: list, units, norms) -> int:
+    """Give stored faces their (unit) base-version embedding, as if uploaded with it; returns faces written.
+
+    Faces deleted meanwhile, or embedded by someone else, are skipped.
+    """
+    if not face_ids:
+        return 0
+    vectors = {face_id: (unit, float(norm)) for face_id, unit, norm in zip(face_ids, units, norms)}
+    faces = session.exec(
+        select(FaceData).where(FaceData.id.in_(face_ids) & FaceData.embedding.is_(None)).with_for_update()
+    ).all()
+    for face in faces:
+        unit, norm = vectors[face.id]
+        face.embedding = unit
+        face.embedding_norm = norm
+        face.embedding_model = settings.FACE_EMBEDDING_MODEL
+        session.add(face)
+        template_crud.add_frame_to_templates(session, face.user_id, face.face_type, unit)
+    session.commit()
+    for face in faces:
+        unit, norm = vectors[face.id]
+        user_face_cache.invalidate(face.user_id)
+        for index in (face_index, quantized_face_index, sharded_face_index):
+            index.add(face.id, face.user_id, face.face_type, unit, norm=norm)
+        duplicate_checker.submit(face.id, face.user_id, unit)
+    if faces:
+        identify_cache.bump()
+    for user_id, face_type in {(face.user_id, face.face_type) for face in faces}:
+        written = [face.id for face in faces if (face.user_id, face.face_type) == (user_id, face_type)]
+        face_retention.prune_after_write(session, user_id, face_type, written)
+    return len(faces)
+
+
+def get_face_embeddings(session: Session, face_ids: list) -> dict:
+    """Map face id -> full-precision embedding for the given faces."""
+    if not face_ids:
+        return {}
+    statement = select(FaceData.id, FaceData.embedding).where(FaceData.id.in_(face_ids))
+    return {row.id: row.embedding for row in session.exec(statement).all()}
+
+
+def get_faces_for_users(session: Session, user_ids: list) -> list:
+    """(id, user_id, face_type, embedding, embedding_norm) of every embedded face of the given users."""
+    if not user_ids:
+        return []
+    statement = select(
+        FaceData.id, FaceData.user_id, FaceData.face_type, FaceData.embedding, FaceData.embedding_norm
+    ).where(FaceData.user_id.in_(user_ids) & FaceData.embedding.isnot(None))
+    return session.exec(statement).all()
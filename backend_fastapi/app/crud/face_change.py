@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Iterable
+from sqlalchemy import delete, func, or_
+from sqlmodel import Session, select
+from app.models.face_change import FaceDataChange
+
+
+def get_latest_seq(session: Session) -> int:
+    return session.exec(select(func.coalesce(func.max(FaceDataChange.seq), 0))).one()
+
+
+def get_changes_after(session: Session, after_seq: int, missing: Iterable[int] = (), limit: int = 10000) -> list:
+    """Changes past ``after_seq`` plus any earlier ``missing`` seqs, oldest first.
+
+    Seqs are assigned at insert but become visible at commit, so a gap below
+    the watermark may still fill in; callers re-ask for those explicitly.
+    """
+    condition = FaceDataChange.seq > after_seq
+    missing = list(missing)
+    if missing:
+        condition = or_(condition, FaceDataChange.seq.in_(missing))
+    statement = select(FaceDataChange).where(condition).order_by(FaceDataChange.seq).limit(limit)
+    return session.exec(statement).all()
+
+
+def get_changes_since(session: Session, since: datetime) -> list[FaceDataChange]:
+    statement = select(FaceDataChange).where(FaceDataChange.changed_at > since).order_by(FaceDataChange.seq)
+    return session.exec(statement).all()
+
+
+def prune_changes(session: Session, before: datetime) -> int:
+    result = session.execute(delete(FaceDataChange).where(FaceDataChange.changed_at < before))
+    session.commit()
+    return result.rowcount
@@ -0,0 +1,54 @@
+from typing import Optional
+from uuid import UUID, uuid4
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+from app.models.face import FaceData
+from app.models.face_duplicate import DUPLICATE_PENDING, FaceDuplicate
+
+
+def add_duplicates(session: Session, rows: list[dict]) -> int:
+    """Insert suspected duplicates (face_id, user_id, matched_face_id, matched_user_id, score).
+
+    A pair already flagged is left as is, so re-checks never reopen a review.
+    Faces deleted since the check are skipped. Returns the rows inserted.
+    """
+    if not rows:
+        return 0
+    face_ids = {row["face_id"] for row in rows} | {row["matched_face_id"] for row in rows}
+    live = set(session.exec(select(FaceData.id).where(FaceData.id.in_(face_ids))).all())
+    rows = [row for row in rows if row["face_id"] in live and row["matched_face_id"] in live]
+    if not rows:
+        return 0
+    result = session.execute(
+        insert(FaceDuplicate.__table__)
+        .values([{"id": uuid4(), "status": DUPLICATE_PENDING, **row} for row in rows])
+        .on_conflict_do_nothing(constraint="uq_face_duplicates_face_matched_user")
+    )
+    session.commit()
+    return result.rowcount
+
+
+def get_duplicates(
+    session: Session, status: Optional[str] = None, user_id: Optional[UUID] = None, limit: int = 100, offset: int = 0
+) -> list[FaceDuplicate]:
+    """Flagged duplicates, highest score first; ``user_id`` matches either side."""
+    statement = select(FaceDuplicate)
+    if status is not None:
+        statement = statement.where(FaceDuplicate.status == status)
+    if user_id is not None:
+        statement = statement.where((FaceDuplicate.user_id == user_id) | (FaceDuplicate.matched_user_id == user_id))
+    statement = statement.order_by(FaceDuplicate.score.desc()).offset(offset).limit(limit)
+    return session.exec(statement).all()
+
+
+def review_duplicate(session: Session, duplicate_id: UUID, status: str) -> Optional[FaceDuplicate]:
+    duplicate = session.get(FaceDuplicate, duplicate_id)
+    if duplicate is None:
+        return None
+    duplicate.status = status
+    duplicate.reviewed_at = func.now()
+    session.add(duplicate)
+    session.commit()
+    session.refresh(duplicate)
+    return duplicate
@@ -0,0 +1,106 @@
+from typing import Optional
+from uuid import UUID
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+from app.core.config import settings
+from app.models.face_template import ALL_POSES, FaceTemplate
+
+
+def add_frame_to_templates(session: Session, user_id: UUID, face_type: str, embedding) -> None:
+    """Fold one new frame into the user's overall (and per-pose) template.
+
+    Runs inside the caller's transaction; template rows are locked so
+    concurrent uploads for the same user don't lose updates.
+    """
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    if norm == 0:
+        return
+    unit = vector / norm
+    poses = [ALL_POSES, face_type] if settings.FACE_TEMPLATE_PER_POSE else [ALL_POSES]
+    for pose in poses:
+        session.execute(
+            insert(FaceTemplate.__table__)
+            .values(user_id=user_id, face_type=pose, embedding=unit, embedding_sum=np.zeros_like(unit), frame_count=0)
+            .on_conflict_do_nothing(index_elements=["user_id", "face_type"])
+        )
+        template = session.exec(
+            select(FaceTemplate)
+            .where((FaceTemplate.user_id == user_id) & (FaceTemplate.face_type == pose))
+            .with_for_update()
+        ).one()
+        total = np.asarray(template.embedding_sum, dtype=np.float32) + unit
+        total_norm = float(np.linalg.norm(total))
+        template.embedding_sum = total
+        template.embedding = total / total_norm if total_norm > 0 else unit
+        template.frame_count += 1
+        session.add(template)
+
+
+def get_user_templates(session: Session, user_id: UUID) -> list[FaceTemplate]:
+    statement = select(FaceTemplate).where(FaceTemplate.user_id == user_id)
+    return session.exec(statement).all()
+
+
+def search_templates(
+    session: Session,
+    embedding: list[float],
+    limit: int,
+    ef_search: Optional[int] = None,
+) -> list:
+    """Nearest whole-user templates by cosine distance: one vector per identity.
+
+    Returns rows of (user_id, frame_count, distance).
+    """
+    if ef_search is not None:
+        session.execute(text(f"SET LOCAL hnsw.ef_search = {max(int(ef_search), int(limit))}"))
+    distance = FaceTemplate.embedding.cosine_distance(embedding)
+    statement = (
+        select(FaceTemplate.user_id, FaceTemplate.frame_count, distance.label("distance"))
+        .where(FaceTemplate.face_type == ALL_POSES)
+        .order_by(distance)
+        .limit(limit)
+    )
+    return session.exec(statement).all()
+
+
+def delete_user_templates(session: Session, user_id: UUID) -> None:
+    for template in get_user_templates(session, user_id):
+        session.delete(template)
+
+
+def remove_frames_from_templates(session: Session, user_id: UUID, frames: list) -> None:
+    """Take (face_type, embedding) frames back out of the user's templates.
+
+    The inverse of add_frame_to_templates, inside the caller's transaction;
+    a template left without frames is deleted.
+    """
+    removed: dict[str, list] = {}
+    for face_type, embedding in frames:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0:
+            continue
+        removed.setdefault(ALL_POSES, []).append(vector / norm)
+        if settings.FACE_TEMPLATE_PER_POSE:
+            removed.setdefault(face_type, []).append(vector / norm)
+    for pose, units in removed.items():
+        template = session.exec(
+            select(FaceTemplate)
+            .where((FaceTemplate.user_id == user_id) & (FaceTemplate.face_type == pose))
+            .with_for_update()
+        ).first()
+        if template is None:
+            continue
+        template.frame_count -= len(units)
+        if template.frame_count <= 0:
+            session.delete(template)
+            continue
+        total = np.asarray(template.embedding_sum, dtype=np.float32) - np.sum(units, axis=0)
+        total_norm = float(np.linalg.norm(total))
+        template.embedding_sum = total
+        if total_norm > 0:
+            template.embedding = total / total_norm
+        session.add(template)
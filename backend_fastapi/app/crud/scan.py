@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID, uuid4
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+from app.models.face import FaceData
+from app.models.scan import SCAN_DONE, SCAN_FAILED, SCAN_QUEUED, SCAN_RUNNING, ScanJob, ScanMatch
+
+
+def create_job(
+    session: Session,
+    job_id: UUID,
+    content_id: str,
+    frames: int,
+    frames_path: str,
+    threshold: float,
+    model_version: Optional[str] = None,
+    submitted_by: Optional[UUID] = None,
+    source: str = "api",
+) -> ScanJob:
+    job = ScanJob(
+        id=job_id,
+        content_id=content_id,
+        frames=frames,
+        frames_path=frames_path,
+        threshold=threshold,
+        model_version=model_version,
+        submitted_by=submitted_by,
+        source=source,
+        status=SCAN_QUEUED,
+    )
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    return job
+
+
+def claim_next_job(session: Session) -> Optional[ScanJob]:
+    """Mark the oldest queued job running and return it; None if the queue is empty.
+
+    SKIP LOCKED lets any number of workers, in any process, claim
+    concurrently without handing out the same job twice.
+    """
+    job = session.exec(
+        select(ScanJob)
+        .where(ScanJob.status == SCAN_QUEUED)
+        .order_by(ScanJob.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).first()
+    if job is None:
+        session.rollback()
+        return None
+    job.status = SCAN_RUNNING
+    job.started_at = func.now()
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    return job
+
+
+def finish_job(session: Session, job_id: UUID, matches: list[dict], scan_seconds: float) -> None:
+    """Record a scan's matches (user_id, face_id, score, best_frame, frames_matched) and close it."""
+    if matches:
+        # Faces deleted while the scan ran are recorded without a face
+        face_ids = {row["face_id"] for row in matches}
+        live = set(session.exec(select(FaceData.id).where(FaceData.id.in_(face_ids))).all())
+        session.execute(
+            insert(ScanMatch.__table__)
+            .values(
+                [
+                    {"id": uuid4(), "job_id": job_id, **row, "face_id": row["face_id"] if row["face_id"] in live else None}
+                    for row in matches
+                ]
+            )
+            .on_conflict_do_nothing(constraint="uq_scan_matches_job_user")
+        )
+    session.execute(
+        update(ScanJob.__table__)
+        .where(ScanJob.__table__.c.id == job_id)
+        .values(
+            status=SCAN_DONE,
+            matches=len(matches),
+            scan_seconds=scan_seconds,
+            error=None,
+            finished_at=func.now(),
+        )
+    )
+    session.commit()
+
+
+def fail_job(session: Session, job_id: UUID, error: str) -> None:
+    session.rollback()
+    session.execute(
+        update(ScanJob.__table__)
+        .where(ScanJob.__table__.c.id == job_id)
+        .values(status=SCAN_FAILED, error=error[:1000], finished_at=func.now())
+    )
+    session.commit()
+
+
+def requeue_stale_jobs(session: Session, older_than: timedelta) -> int:
+    """Queue again jobs left running by a worker that died; returns how many."""
+    cutoff = datetime.now(timezone.utc) - older_than
+    result = session.execute(
+        update(ScanJob.__table__)
+        .where((ScanJob.__table__.c.status == SCAN_RUNNING) & (ScanJob.__table__.c.started_at < cutoff))
+        .values(status=SCAN_QUEUED, started_at=None)
+    )
+    session.commit()
+    return result.rowcount
+
+
+def get_job(session: Session, job_id: UUID) -> Optional[ScanJob]:
+    return session.get(ScanJob, job_id)
+
+
+def get_jobs(
+    session: Session,
+    status: Optional[str] = None,
+    content_id: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
+    submitted_by: Optional[UUID] = None,
+) -> list[ScanJob]:
+    """Scan jobs, newest first; only ``submitted_by``'s when given."""
+    statement = select(ScanJob)
+    if submitted_by is not None:
+        statement = statement.where(ScanJob.submitted_by == submitted_by)
+    if status is not None:
+        statement = statement.where(ScanJob.status == status)
+    if content_id is not None:
+        statement = statement.where(ScanJob.content_id == content_id)
+    statement = statement.order_by(ScanJob.created_at.desc()).offset(offset).limit(limit)
+    return session.exec(statement).all()
+
+
+def get_matches(session: Session, job_id: UUID) -> list[ScanMatch]:
+    """Users found in a scan, highest score first."""
+    statement = select(ScanMatch).where(ScanMatch.job_id == job_id).order_by(ScanMatch.score.desc())
+    return session.exec(statement).all()
+
+
+def get_status_counts(session: Session) -> dict[str, int]:
+    rows = session.exec(select(ScanJob.status, func.count(ScanJob.id)).group_by(ScanJob.status)).all()
+    return {status: count for status, count in rows}
+
+
+def get_throughput(session: Session, since: datetime) -> tuple[int, int, float]:
+    """(jobs, frames, scoring seconds) of scans finished since ``since``."""
+    jobs, frames, seconds = session.exec(
+        select(
+            func.count(ScanJob.id),
+            func.coalesce(func.sum(ScanJob.frames), 0),
+            func.coalesce(func.sum(ScanJob.scan_seconds), 0.0),
+        ).where((ScanJob.status == SCAN_DONE) & (ScanJob.finished_at >= since))
+    ).one()
+    return int(jobs), int(frames), float(seconds)
@@ -0,0 +1,50 @@
+from uuid import UUID
+from sqlmodel import Session, select
+from app.models.voice import VoiceSample
+
+
+def create_sample(
+    session: Session,
+    user_id: UUID,
+    file_path: str,
+    pcm_path: str,
+    sample_rate: int,
+    source_sample_rate: int,
+    channels: int,
+    duration_seconds: float,
+    rms: float,
+) -> VoiceSample:
+    sample = VoiceSample(
+        user_id=user_id,
+        file_path=file_path,
+        pcm_path=pcm_path,
+        sample_rate=sample_rate,
+        source_sample_rate=source_sample_rate,
+        channels=channels,
+        duration_seconds=duration_seconds,
+        rms=rms,
+    )
+    session.add(sample)
+    session.commit()
+    session.refresh(sample)
+    return sample
+
+
+def get_user_samples(session: Session, user_id: UUID) -> list[VoiceSample]:
+    """A user's voice samples, newest first."""
+    statement = (
+        select(VoiceSample)
+        .where(VoiceSample.user_id == user_id)
+        .order_by(VoiceSample.created_at.desc(), VoiceSample.id)
+    )
+    return list(session.exec(statement).all())
+
+
+def delete_oldest_samples(session: Session, user_id: UUID, keep: int) -> list[VoiceSample]:
+    """Delete all but the newest ``keep`` samples of a user and return the deleted rows."""
+    removed = get_user_samples(session, user_id)[keep:]
+    for sample in removed:
+        session.delete(sample)
+    if removed:
+        session.commit()
+    return removed
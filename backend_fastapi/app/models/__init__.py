@@ -1,4 +1,21 @@
 from .user import User
 from .face import FaceData
+from .face_template import FaceTemplate
+from .face_change import FaceDataChange
+from .embedding_model import EmbeddingModel, FaceEmbedding
+from .face_duplicate import FaceDuplicate
+from .scan import ScanJob, ScanMatch
+from .voice import VoiceSample
 
-__all__ = ["User", "FaceData"]
+__all__ = [
+    "User",
+    "FaceData",
+    "FaceTemplate",
+    "FaceDataChange",
+    "EmbeddingModel",
+    "FaceEmbedding",
+    "FaceDuplicate",
+    "ScanJob",
+    "ScanMatch",
+    "VoiceSample",
+]
@@ -0,0 +1,114 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, DDL, event
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.sql import func
+from sqlmodel import SQLModel, Field
+from app.models.face_change import CHANGE_UPSERT, FACE_CHANGES_CHANNEL
+
+# Lifecycle of a model version: re-embedding existing faces, serving queries, superseded
+MODEL_BACKFILLING = "backfilling"
+MODEL_ACTIVE = "active"
+MODEL_RETIRED = "retired"
+
+
+class EmbeddingModel(SQLModel, table=True):
+    """A face embedding model version and the dimension of its vectors.
+
+    Exactly one version is active at a time; identification and verification
+    use it unless a request names another one.
+    """
+
+    __tablename__ = "embedding_models"
+
+    version: str = Field(
+        sa_column=Column(String(32), primary_key=True),
+    )
+
+    dim: int = Field(
+        sa_column=Column(Integer, nullable=False),
+    )
+
+    status: str = Field(
+        default=MODEL_BACKFILLING,
+        sa_column=Column(String, nullable=False),
+    )
+
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now()),
+    )
+
+    activated_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=True),
+    )
+
+
+class FaceEmbedding(SQLModel, table=True):
+    """A face's embedding under a model version other than the base one.
+
+    face_data.embedding keeps the base version (FACE_EMBEDDING_MODEL); newer
+    versions live here, one row per face and version, so adding a model
+    never rewrites face_data. The column has no fixed dimension; each
+    version gets its own partial HNSW index over ``embedding::vector(dim)``
+    (see crud.embedding_model.register_model).
+    """
+
+    __tablename__ = "face_embeddings"
+
+    face_id: UUID = Field(
+        sa_column=Column(
+            PG_UUID(as_uuid=True),
+            ForeignKey("face_data.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+    )
+
+    model_version: str = Field(
+        sa_column=Column(String(32), ForeignKey("embedding_models.version"), primary_key=True),
+    )
+
+    # L2-normalized like face_data.embedding
+    embedding: list[float] = Field(
+        sa_column=Column(Vector(), nullable=False),
+    )
+
+    embedding_norm: Optional[float] = Field(
+        default=None,
+        sa_column=Column(Float, nullable=True),
+    )
+
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now()),
+    )
+
+
+# New and rewritten version embeddings go through the same change feed as
+# face_data, so every worker's per-version index picks them up. Deletes
+# cascade from face_data, whose own trigger already publishes them.
+FACE_EMBEDDINGS_DDL = f"""
+CREATE OR REPLACE FUNCTION face_embeddings_publish_changes() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO face_data_changes (face_id, user_id, op)
+    SELECT n.face_id, f.user_id, '{CHANGE_UPSERT}' FROM new_rows n JOIN face_data f ON f.id = n.face_id;
+    PERFORM pg_notify('{FACE_CHANGES_CHANNEL}', '');
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS face_embeddings_changes_insert ON face_embeddings;
+CREATE TRIGGER face_embeddings_changes_insert AFTER INSERT ON face_embeddings
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION face_embeddings_publish_changes();
+
+DROP TRIGGER IF EXISTS face_embeddings_changes_update ON face_embeddings;
+CREATE TRIGGER face_embeddings_changes_update AFTER UPDATE ON face_embeddings
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION face_embeddings_publish_changes();
+"""
+
+event.listen(SQLModel.metadata, "after_create", DDL(FACE_EMBEDDINGS_DDL).execute_if(dialect="postgresql"))
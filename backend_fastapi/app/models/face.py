@@ -1,17 +1,29 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 from uuid import UUID, uuid4
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Index
 from pgvector.sqlalchemy import Vector
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.sql import func
 from sqlmodel import SQLModel, Field, Relationship
+from app.core.config import settings
 
 
 class FaceData(SQLModel, table=True):
     """Face image records for user identification."""
 
     __tablename__ = "face_data"
+    __table_args__ = (
+        # ANN index for 1:N identification. Embeddings are stored unit-length,
+        # so inner-product ops rank exactly like cosine without re-normalizing.
+        Index(
+            "ix_face_data_embedding_hnsw_ip",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_ip_ops"},
+        ),
+    )
 
     id: UUID = Field(
         default_factory=uuid4,
@@ -42,25 +54,45 @@ class FaceData(SQLModel, table=True):
         sa_column=Column(String, nullable=False),
     )
     
-    # Face embedding vector (as JSON array)
+    # Face embedding vector, L2-normalized at ingest
     embedding: Optional[list[float]] = Field(
         default=None,
         sa_column=Column(Vector(1536), nullable=True),
         description="Face embedding vector as pgvector",
     )
 
+    # L2 norm of the embedding as uploaded, before normalization
+    embedding_norm: Optional[float] = Field(
+        default=None,
+        sa_column=Column(Float, nullable=True),
+    )
+
+    # Frame quality (0-1) measured at upload; NULL for frames stored before gating
+    quality_score: Optional[float] = Field(
+        default=None,
+        sa_column=Column(Float, nullable=True),
+    )
+
+    # Model version of the embedding column (face_embeddings holds other versions)
+    embedding_model: Optional[str] = Field(
+        default=settings.FACE_EMBEDDING_MODEL,
+        sa_column=Column(String(32), nullable=True, server_default=settings.FACE_EMBEDDING_MODEL),
+    )
+
     # Metadata
     uploaded_at: datetime = Field(
-        default_factory=datetime.utcnow,
+        default_factory=lambda: datetime.now(timezone.utc),
         sa_column=Column(DateTime(timezone=True), server_default=func.now()),
     )
 
     created_at: datetime = Field(
-        default_factory=datetime.utcnow,
+        default_factory=lambda: datetime.now(timezone.utc),
         sa_column=Column(DateTime(timezone=True), server_default=func.now()),
     )
 
+    # Aware UTC: a naive value would be read in the session's TimeZone, and
+    # snapshot catch-up uses this column as its watermark
     updated_at: datetime = Field(
-        default_factory=datetime.utcnow,
+        default_factory=lambda: datetime.now(timezone.utc),
         sa_column=Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now()),
     )
@@ -0,0 +1,83 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import BigInteger, Column, String, DateTime, DDL, event
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.sql import func
+from sqlmodel import SQLModel, Field
+
+# NOTIFY channel woken whenever face_data changes
+FACE_CHANGES_CHANNEL = "face_data_changes"
+
+# Change operations: the face row was inserted/updated, or deleted
+CHANGE_UPSERT = "U"
+CHANGE_DELETE = "D"
+
+
+class FaceDataChange(SQLModel, table=True):
+    """Append-only feed of face_data writes, filled by statement-level triggers.
+
+    Workers tail it by ``seq`` to keep their in-memory indexes current.
+    """
+
+    __tablename__ = "face_data_changes"
+
+    seq: Optional[int] = Field(
+        default=None,
+        sa_column=Column(BigInteger, primary_key=True, autoincrement=True),
+    )
+
+    # No foreign keys: deletes must outlive the rows they describe
+    face_id: UUID = Field(
+        sa_column=Column(PG_UUID(as_uuid=True), nullable=False),
+    )
+
+    user_id: UUID = Field(
+        sa_column=Column(PG_UUID(as_uuid=True), nullable=False),
+    )
+
+    op: str = Field(
+        sa_column=Column(String(1), nullable=False),
+    )
+
+    changed_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True),
+    )
+
+
+# One trigger per event (transition tables allow only one), each firing once
+# per statement, so a bulk COPY/INSERT costs one NOTIFY rather than one per row.
+# Kept idempotent because create_all runs it on every startup.
+FACE_CHANGES_DDL = f"""
+CREATE OR REPLACE FUNCTION face_data_publish_changes() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO face_data_changes (face_id, user_id, op)
+        SELECT id, user_id, '{CHANGE_DELETE}' FROM old_rows;
+    ELSE
+        INSERT INTO face_data_changes (face_id, user_id, op)
+        SELECT id, user_id, '{CHANGE_UPSERT}' FROM new_rows;
+    END IF;
+    PERFORM pg_notify('{FACE_CHANGES_CHANNEL}', '');
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS face_data_changes_insert ON face_data;
+CREATE TRIGGER face_data_changes_insert AFTER INSERT ON face_data
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION face_data_publish_changes();
+
+DROP TRIGGER IF EXISTS face_data_changes_update ON face_data;
+CREATE TRIGGER face_data_changes_update AFTER UPDATE ON face_data
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION face_data_publish_changes();
+
+DROP TRIGGER IF EXISTS face_data_changes_delete ON face_data;
+CREATE TRIGGER face_data_changes_delete AFTER DELETE ON face_data
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION face_data_publish_changes();
+"""
+
+event.listen(SQLModel.metadata, "after_create", DDL(FACE_CHANGES_DDL).execute_if(dialect="postgresql"))
@@ -0,0 +1,76 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID, uuid4
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.sql import func
+from sqlmodel import SQLModel, Field
+
+# Review states of a suspected duplicate
+DUPLICATE_PENDING = "pending"
+DUPLICATE_CONFIRMED = "confirmed"
+DUPLICATE_DISMISSED = "dismissed"
+
+
+class FaceDuplicate(SQLModel, table=True):
+    """A newly enrolled face that closely matches another user's face.
+
+    Written by the enrollment-time duplicate check for manual review; one
+    row per new face and matched user, holding that user's closest face.
+    """
+
+    __tablename__ = "face_duplicates"
+    __table_args__ = (
+        UniqueConstraint("face_id", "matched_user_id", name="uq_face_duplicates_face_matched_user"),
+    )
+
+    id: UUID = Field(
+        default_factory=uuid4,
+        sa_column=Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid4),
+    )
+
+    face_id: UUID = Field(
+        sa_column=Column(PG_UUID(as_uuid=True), ForeignKey("face_data.id", ondelete="CASCADE"), nullable=False),
+    )
+
+    user_id: UUID = Field(
+        sa_column=Column(
+            PG_UUID(as_uuid=True),
+            ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+            index=True,
+        ),
+    )
+
+    matched_face_id: UUID = Field(
+        sa_column=Column(PG_UUID(as_uuid=True), ForeignKey("face_data.id", ondelete="CASCADE"), nullable=False),
+    )
+
+    matched_user_id: UUID = Field(
+        sa_column=Column(
+            PG_UUID(as_uuid=True),
+            ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+            index=True,
+        ),
+    )
+
+    # Cosine similarity of the two faces
+    score: float = Field(
+        sa_column=Column(Float, nullable=False),
+    )
+
+    status: str = Field(
+        default=DUPLICATE_PENDING,
+        sa_column=Column(String, nullable=False, index=True),
+    )
+
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now()),
+    )
+
+    reviewed_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=True),
+    )
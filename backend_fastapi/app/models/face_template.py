@@ -0,0 +1,72 @@
+from datetime import datetime
+from uuid import UUID, uuid4
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index, UniqueConstraint
+from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.sql import func
+from sqlmodel import SQLModel, Field
+from app.core.config import settings
+
+# face_type of the template aggregated over every pose
+ALL_POSES = "all"
+
+
+class FaceTemplate(SQLModel, table=True):
+    """Aggregated enrollment template: L2-normalized centroid of a user's frames."""
+
+    __tablename__ = "face_templates"
+    __table_args__ = (
+        UniqueConstraint("user_id", "face_type", name="uq_face_templates_user_pose"),
+        Index(
+            "ix_face_templates_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+    )
+
+    id: UUID = Field(
+        default_factory=uuid4,
+        sa_column=Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid4),
+    )
+
+    user_id: UUID = Field(
+        sa_column=Column(
+            PG_UUID(as_uuid=True),
+            ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+            index=True,
+        ),
+    )
+
+    # "all" for the whole-user template, otherwise "straight", "left", "right"
+    face_type: str = Field(
+        sa_column=Column(String, nullable=False),
+    )
+
+    # Normalized centroid, the vector searched during identification
+    embedding: list[float] = Field(
+        sa_column=Column(Vector(settings.FACE_EMBEDDING_DIM), nullable=False),
+    )
+
+    # Running sum of the unit-length frame embeddings, so a new frame updates
+    # the centroid without re-reading earlier frames
+    embedding_sum: list[float] = Field(
+        sa_column=Column(Vector(settings.FACE_EMBEDDING_DIM), nullable=False),
+    )
+
+    frame_count: int = Field(
+        default=0,
+        sa_column=Column(Integer, nullable=False, server_default="0"),
+    )
+
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now()),
+    )
+
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now()),
+    )
@@ -0,0 +1,152 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID, uuid4
+from sqlalchemy import Column, String, Float, Integer, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.sql import func
+from sqlmodel import SQLModel, Field
+
+# Lifecycle of a scan job
+SCAN_QUEUED = "queued"
+SCAN_RUNNING = "running"
+SCAN_DONE = "done"
+SCAN_FAILED = "failed"
+
+# Where a scan came from
+SCAN_SOURCE_API = "api"
+SCAN_SOURCE_FEED = "feed"
+
+
+class ScanJob(SQLModel, table=True):
+    """One suspect media item (its frame embeddings) scanned against every enrolled user.
+
+    The frames wait in a .npy file under FACE_SCAN_DIR until a scan worker
+    claims the job; matches land in scan_matches.
+    """
+
+    __tablename__ = "scan_jobs"
+
+    id: UUID = Field(
+        default_factory=uuid4,
+        sa_column=Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid4),
+    )
+
+    # Caller's identifier of the media (URL, hash, file name)
+    content_id: str = Field(
+        sa_column=Column(String, nullable=False, index=True),
+    )
+
+    submitted_by: Optional[UUID] = Field(
+        default=None,
+        sa_column=Column(PG_UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
+    )
+
+    source: str = Field(
+        default=SCAN_SOURCE_API,
+        sa_column=Column(String, nullable=False),
+    )
+
+    status: str = Field(
+        default=SCAN_QUEUED,
+        sa_column=Column(String, nullable=False, index=True),
+    )
+
+    frames: int = Field(
+        sa_column=Column(Integer, nullable=False),
+    )
+
+    frames_path: str = Field(
+        sa_column=Column(String, nullable=False),
+    )
+
+    # Embedding model the frames come from (None: the active one when claimed)
+    model_version: Optional[str] = Field(
+        default=None,
+        sa_column=Column(String(32), nullable=True),
+    )
+
+    # Cosine similarity at or above which a user counts as matched
+    threshold: float = Field(
+        sa_column=Column(Float, nullable=False),
+    )
+
+    matches: Optional[int] = Field(
+        default=None,
+        sa_column=Column(Integer, nullable=True),
+    )
+
+    # Time spent scoring, excluding queueing and index loading
+    scan_seconds: Optional[float] = Field(
+        default=None,
+        sa_column=Column(Float, nullable=True),
+    )
+
+    error: Optional[str] = Field(
+        default=None,
+        sa_column=Column(String, nullable=True),
+    )
+
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now()),
+    )
+
+    started_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=True),
+    )
+
+    finished_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=True),
+    )
+
+
+class ScanMatch(SQLModel, table=True):
+    """An enrolled user found in a scanned media item, with their best-scoring frame."""
+
+    __tablename__ = "scan_matches"
+    __table_args__ = (UniqueConstraint("job_id", "user_id", name="uq_scan_matches_job_user"),)
+
+    id: UUID = Field(
+        default_factory=uuid4,
+        sa_column=Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid4),
+    )
+
+    job_id: UUID = Field(
+        sa_column=Column(PG_UUID(as_uuid=True), ForeignKey("scan_jobs.id", ondelete="CASCADE"), nullable=False),
+    )
+
+    user_id: UUID = Field(
+        sa_column=Column(
+            PG_UUID(as_uuid=True),
+            ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+            index=True,
+        ),
+    )
+
+    # The user's enrolled face closest to the best frame (NULL once deleted)
+    face_id: Optional[UUID] = Field(
+        default=None,
+        sa_column=Column(PG_UUID(as_uuid=True), ForeignKey("face_data.id", ondelete="SET NULL"), nullable=True),
+    )
+
+    # Best cosine similarity over all frames, and the frame it came from
+    score: float = Field(
+        sa_column=Column(Float, nullable=False),
+    )
+
+    best_frame: int = Field(
+        sa_column=Column(Integer, nullable=False),
+    )
+
+    # Frames in which the user scored at or above the threshold
+    frames_matched: int = Field(
+        sa_column=Column(Integer, nullable=False),
+    )
+
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now()),
+    )
@@ -0,0 +1,66 @@
+from datetime import datetime
+from uuid import UUID, uuid4
+from sqlalchemy import Column, String, Float, Integer, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.sql import func
+from sqlmodel import SQLModel, Field
+
+
+class VoiceSample(SQLModel, table=True):
+    """One recorded voice enrollment sample.
+
+    The upload is kept as sent under VOICE_DATA_DIR; ``pcm_path`` points to
+    its decoded mono float32 copy at VOICE_SAMPLE_RATE (.npy).
+    """
+
+    __tablename__ = "voice_samples"
+
+    id: UUID = Field(
+        default_factory=uuid4,
+        sa_column=Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid4),
+    )
+
+    user_id: UUID = Field(
+        sa_column=Column(
+            PG_UUID(as_uuid=True),
+            ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+            index=True,
+        ),
+    )
+
+    # Paths relative to STORAGE_DIR
+    file_path: str = Field(
+        sa_column=Column(String, nullable=False),
+    )
+
+    pcm_path: str = Field(
+        sa_column=Column(String, nullable=False),
+    )
+
+    sample_rate: int = Field(
+        sa_column=Column(Integer, nullable=False),
+    )
+
+    # Rate and channel count of the upload itself
+    source_sample_rate: int = Field(
+        sa_column=Column(Integer, nullable=False),
+    )
+
+    channels: int = Field(
+        sa_column=Column(Integer, nullable=False),
+    )
+
+    duration_seconds: float = Field(
+        sa_column=Column(Float, nullable=False),
+    )
+
+    # Root-mean-square level of the decoded signal (full scale = 1)
+    rms: float = Field(
+        sa_column=Column(Float, nullable=False),
+    )
+
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now()),
+    )
@@ -1,6 +1,6 @@
 from typing import Optional, List
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class FaceDataBase(BaseModel):
     user_id: str
@@ -21,3 +21,172 @@ class FaceDataRead(FaceDataBase):
 
     class Config:
         orm_mode = True
+
+
+class FaceIdentifyRequest(BaseModel):
+    """Query embedding for 1:N identification"""
+    embedding: List[float]
+    top_k: int = Field(5, ge=1)
+    backend: Optional[str] = None  # "pgvector", "exact", "quantized", "templates" or "sharded", defaults to settings
+    ef_search: Optional[int] = Field(None, ge=1, le=1000)  # HNSW search breadth (pgvector caps it at 1000), defaults to settings
+    probes: Optional[int] = Field(None, ge=1)  # IVFFlat lists probed, defaults to settings
+    model_version: Optional[str] = None  # embedding model of the probe, defaults to the active one
+
+
+class FaceMatch(BaseModel):
+    """Best-matching enrolled face for one user"""
+    user_id: str
+    face_id: str
+    face_type: str
+    score: float  # cosine similarity
+    inner_product: float
+
+
+class FaceIdentifyResponse(BaseModel):
+    matches: List[FaceMatch]
+    partial: bool = False  # some index shards did not answer in time
+    model_version: Optional[str] = None  # embedding model the probe was matched under
+
+
+class FaceVerifyRequest(BaseModel):
+    """Probe embedding checked 1:1 against one claimed user"""
+    embedding: List[float]
+    user_id: Optional[str] = None  # defaults to the authenticated user; another user needs an operator
+    model_version: Optional[str] = None  # embedding model of the probe, defaults to the active one
+
+
+class FaceVerifyResponse(BaseModel):
+    user_id: str
+    match: bool
+    score: float  # best cosine similarity over the user's enrolled faces
+    threshold: float
+    face_id: str
+    face_type: str
+    model_version: Optional[str] = None
+
+
+class FaceBatchIdentifyRequest(BaseModel):
+    """Block of N probe embeddings (N x dim) scored in one pass"""
+    embeddings: List[List[float]]
+    top_k: int = Field(5, ge=1)
+    stream: bool = False  # NDJSON, one line per probe, emitted chunk by chunk
+    model_version: Optional[str] = None  # embedding model of the probes, defaults to the active one
+
+
+class FaceProbeResult(BaseModel):
+    probe: int
+    matches: List[FaceMatch]
+
+
+class FaceBatchIdentifyResponse(BaseModel):
+    results: List[FaceProbeResult]
+    model_version: Optional[str] = None
+
+
+class FaceIndexStats(BaseModel):
+    """Size, memory and measured recall of an in-process face index"""
+    method: str
+    size: int
+    bytes_per_vector: int
+    memory_mb: float
+    float32_bytes_per_vector: Optional[int] = None
+    rerank_factor: Optional[int] = None
+    build_seconds: Optional[float] = None
+    recall_k: Optional[int] = None
+    recall_probes: Optional[int] = None
+    approx_recall_at_k: Optional[float] = None  # code-only ranking
+    recall_at_k: Optional[float] = None  # after full-precision re-ranking
+    shards: Optional[int] = None
+    shards_ready: Optional[int] = None  # shards that answered the stats request
+
+
+class FaceChangeFeedStats(BaseModel):
+    """Progress of this worker's face_data change feed"""
+    running: bool
+    last_seq: Optional[int] = None
+    applied: int
+    pending_gaps: int
+    seconds_since_apply: Optional[float] = None
+
+
+class FaceDuplicateCheckStats(BaseModel):
+    """Enrollment-time duplicate checks done by this worker"""
+    running: bool
+    pending: int
+    checked: int
+    flagged: int
+    dropped: int  # not checked because the queue was full
+
+
+class FaceIdentifyCacheStats(BaseModel):
+    """This worker's identify result cache"""
+    size: int
+    capacity: int
+    generation: int  # enrollment changes seen; results from older generations are never served
+    hits: int
+    misses: int
+    hit_rate: Optional[float] = None
+
+
+class FaceExtractionStats(BaseModel):
+    """Server-side embedding extraction in this worker"""
+    running: bool
+    backend: str
+    model_version: str
+    workers: int
+    queue_depth: int  # images waiting for a batch
+    in_flight_batches: int
+    batches: int
+    embedded: int
+    failed: int
+    mean_batch_size: Optional[float] = None
+    images_per_second: Optional[float] = None  # since start
+    images_per_second_per_worker: Optional[float] = None  # inference time only
+    worker_pool_restarts: int = 0  # inference pools replaced after a worker died
+    stored_written: int  # stored images given an embedding in the background
+    stored_failed: int
+    stored_backlog: Optional[int] = None  # faces still without an embedding, as of the last pass
+
+
+class FaceIndexStatsResponse(BaseModel):
+    exact: FaceIndexStats
+    quantized: FaceIndexStats
+    sharded: Optional[FaceIndexStats] = None  # once the sharded backend has been started
+    change_feed: Optional[FaceChangeFeedStats] = None
+    duplicate_check: Optional[FaceDuplicateCheckStats] = None
+    identify_cache: Optional[FaceIdentifyCacheStats] = None
+    extraction: Optional[FaceExtractionStats] = None  # when FACE_EXTRACTOR_BACKEND is set
+
+
+class EmbeddingModelCreate(BaseModel):
+    """New embedding model version to backfill before it becomes active"""
+    version: str = Field(..., min_length=1, max_length=32)
+    dim: int = Field(..., ge=1, le=2000)  # pgvector's HNSW limit for the version's partial index
+
+
+class EmbeddingModelRead(BaseModel):
+    version: str
+    dim: int
+    status: str  # "backfilling", "active" or "retired"
+    faces: int
+    covered: int  # faces that have an embedding under this version
+    serving: bool  # this worker answers queries with it by default
+    created_at: Optional[datetime] = None
+    activated_at: Optional[datetime] = None
+
+
+class FaceDuplicateRead(BaseModel):
+    """New face suspected to show the same person as another user's face"""
+    id: str
+    face_id: str
+    user_id: str
+    matched_face_id: str
+    matched_user_id: str
+    score: float  # cosine similarity
+    status: str  # "pending", "confirmed" or "dismissed"
+    created_at: Optional[datetime] = None
+    reviewed_at: Optional[datetime] = None
+
+
+class FaceDuplicateReview(BaseModel):
+    status: str  # "confirmed" or "dismissed"
@@ -0,0 +1,54 @@
+from typing import Optional, List
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+
+class ScanSubmitRequest(BaseModel):
+    """Frame embeddings (N x dim) of one suspect media item to scan against every enrolled user"""
+    content_id: str = Field(..., min_length=1, max_length=512)
+    embeddings: List[List[float]]
+    threshold: Optional[float] = Field(None, ge=-1.0, le=1.0)  # cosine similarity, defaults to settings
+    model_version: Optional[str] = None  # embedding model of the frames, defaults to the active one
+
+
+class ScanJobRead(BaseModel):
+    id: str
+    content_id: str
+    source: str  # "api" or "feed"
+    status: str  # "queued", "running", "done" or "failed"
+    frames: int
+    model_version: Optional[str] = None
+    threshold: float
+    matches: Optional[int] = None  # users found, once done
+    scan_seconds: Optional[float] = None
+    frames_per_second: Optional[float] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class ScanMatchRead(BaseModel):
+    """Enrolled user found in a scanned media item"""
+    user_id: str
+    face_id: Optional[str] = None  # enrolled face closest to the best frame
+    score: float  # best cosine similarity over all frames
+    best_frame: int
+    frames_matched: int
+
+
+class ScanPoolStats(BaseModel):
+    running: bool
+    workers: int
+    workers_alive: int
+    feed_dir: Optional[str] = None
+    fed: int  # feed files queued by this API worker
+    rejected: int
+
+
+class ScanStatsResponse(BaseModel):
+    pool: ScanPoolStats
+    jobs: dict[str, int]  # jobs per status
+    last_hour_jobs: int
+    last_hour_frames: int
+    frames_per_second_per_core: Optional[float] = None  # scoring throughput of one worker
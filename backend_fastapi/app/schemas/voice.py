@@ -0,0 +1,26 @@
+from typing import Optional, List
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class VoiceSampleRead(BaseModel):
+    id: str
+    sample_rate: int  # of the decoded copy
+    source_sample_rate: int
+    channels: int
+    duration_seconds: float
+    rms: float
+    created_at: Optional[datetime] = None
+
+
+class VoiceUploadResponse(BaseModel):
+    success: bool
+    sample: VoiceSampleRead
+    samples: int  # samples the user now has
+    required: int  # samples needed for a complete enrollment
+    replaced: int  # older samples deleted to make room
+
+
+class VoiceSamplesResponse(BaseModel):
+    samples: List[VoiceSampleRead]
+    required: int
@@ -1,4 +1,5 @@
 from .google_auth import verify_google_id_token
 from .otp_service import OtpService
+from .face_index import FaceIndex, face_index
 
-__all__ = ["verify_google_id_token", "OtpService"]
+__all__ = ["verify_google_id_token", "OtpService", "FaceIndex", "face_index"]
@@ -0,0 +1,190 @@
+import logging
+import queue
+import threading
+import time
+from typing import NamedTuple, Optional
+from uuid import UUID
+import numpy as np
+from sqlmodel import Session
+from app.core.config import settings
+from app.services.embedding_versions import embedding_versions
+from app.services.face_index import FaceHit
+
+logger = logging.getLogger(__name__)
+
+
+class EnrolledFace(NamedTuple):
+    face_id: UUID
+    user_id: UUID
+    embedding: np.ndarray  # unit-length
+    model_version: Optional[str]  # None: the base version
+
+
+class DuplicateChecker:
+    """Flags new enrollments that match another user's face, off the request path.
+
+    Uploads only enqueue the new face. A background thread drains the queue
+    in batches (up to ``batch_size``, waiting ``batch_wait`` for more to
+    arrive) and looks up each face's nearest other users through the
+    existing index: one matrix multiply for the whole batch when this
+    worker holds the exact index in memory, otherwise one pgvector ANN query
+    per face in a single session. Matches at or above ``threshold`` go to
+    face_duplicates for review.
+    """
+
+    def __init__(
+        self,
+        threshold: float = settings.FACE_DUPLICATE_THRESHOLD,
+        top_k: int = settings.FACE_DUPLICATE_TOP_K,
+        batch_size: int = settings.FACE_DUPLICATE_BATCH_SIZE,
+        batch_wait: float = settings.FACE_DUPLICATE_BATCH_WAIT_SECONDS,
+        max_pending: int = settings.FACE_DUPLICATE_MAX_PENDING,
+    ):
+        self.threshold = threshold
+        self.top_k = top_k
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._queue: "queue.Queue[EnrolledFace]" = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.checked = 0
+        self.flagged = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, face_id, user_id, embedding, model_version: Optional[str] = None) -> bool:
+        """Queue a newly enrolled face; never blocks. False if not queued."""
+        if not self.running:
+            return False
+        try:
+            self._queue.put_nowait(
+                EnrolledFace(face_id, user_id, np.asarray(embedding, dtype=np.float32), model_version)
+            )
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"⚠️ Duplicate check queue full; face {face_id} not checked")
+            return False
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="face-duplicate-check", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.batch_wait + 10)
+            self._thread = None
+
+    def check(self, session: Session, faces: list[EnrolledFace]) -> list[dict]:
+        """Score a batch and record the suspected duplicates; returns them."""
+        from app.crud import face_duplicate as duplicate_crud
+
+        flagged = []
+        for face, hits in zip(faces, self._neighbours(session, faces)):
+            for hit in hits:
+                if hit.score >= self.threshold:
+                    flagged.append(
+                        {
+                            "face_id": face.face_id,
+                            "user_id": face.user_id,
+                            "matched_face_id": hit.face_id,
+                            "matched_user_id": hit.user_id,
+                            "score": float(hit.score),
+                        }
+                    )
+        if flagged:
+            duplicate_crud.add_duplicates(session, flagged)
+            logger.warning(f"🚩 {len(flagged)} suspected duplicate enrollments flagged for review")
+        self.checked += len(faces)
+        self.flagged += len(flagged)
+        return flagged
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "pending": self._queue.qsize(),
+            "checked": self.checked,
+            "flagged": self.flagged,
+            "dropped": self.dropped,
+        }
+
+    def _neighbours(self, session: Session, faces: list[EnrolledFace]) -> list[list[FaceHit]]:
+        """Best face of each of the top_k closest other users, per face."""
+        results: list[list[FaceHit]] = [[] for _ in faces]
+        by_version: dict = {}
+        for i, face in enumerate(faces):
+            by_version.setdefault(face.model_version, []).append(i)
+        for version, rows in by_version.items():
+            index = embedding_versions.loaded_index(version)
+            if index is not None:
+                # The uploader holds at most one of the per-user hits
+                queries = np.stack([faces[i].embedding for i in rows])
+                for i, hits in zip(rows, index.search_batch(queries, self.top_k + 1)):
+                    results[i] = [h for h in hits if h.user_id != faces[i].user_id][: self.top_k]
+            else:
+                for i in rows:
+                    results[i] = self._search_pgvector(session, faces[i])
+        return results
+
+    def _search_pgvector(self, session: Session, face: EnrolledFace) -> list[FaceHit]:
+        from app.crud import face as face_crud
+
+        rows = face_crud.search_similar_faces(
+            session,
+            face.embedding,
+            # Room for the uploader's own frames ahead of everyone else's
+            limit=(self.top_k + 1) * settings.FACE_SEARCH_CANDIDATE_FACTOR,
+            ef_search=settings.FACE_SEARCH_EF_SEARCH,
+            model_version=face.model_version,
+            dim=len(face.embedding),
+        )
+        hits: list[FaceHit] = []
+        seen = {face.user_id}
+        for row in rows:
+            if row.user_id in seen:
+                continue
+            seen.add(row.user_id)
+            hits.append(FaceHit(row.id, row.user_id, row.face_type, float(row.score), float(row.inner_product)))
+            if len(hits) == self.top_k:
+                break
+        return hits
+
+    def _next_batch(self) -> list[EnrolledFace]:
+        try:
+            batch = [self._queue.get(timeout=1.0)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        from app.core.database import SessionLocal
+
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                with SessionLocal() as session:
+                    self.check(session, batch)
+            except Exception as exc:
+                logger.error(f"❌ Duplicate check of {len(batch)} faces failed: {exc}")
+
+
+# Started with the app; create_face_record submits every new embedded face
+duplicate_checker = DuplicateChecker()
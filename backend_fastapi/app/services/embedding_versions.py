@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+from typing import NamedTuple, Optional
+from sqlmodel import Session
+from app.core.config import settings
+from app.services.face_changes import face_change_feed
+from app.services.face_index import FaceIndex, face_index
+
+logger = logging.getLogger(__name__)
+
+
+class ModelVersion(NamedTuple):
+    version: str
+    dim: int
+
+
+BASE_MODEL = ModelVersion(settings.FACE_EMBEDDING_MODEL, settings.FACE_EMBEDDING_DIM)
+
+
+class EmbeddingVersions:
+    """Which embedding model this worker serves, plus an exact index per version.
+
+    The active version is re-read from embedding_models every
+    ``refresh_seconds``. When it changes, a worker that already serves the
+    exact backend loads the new version's index in the background and keeps
+    answering with the old one until that finishes, so a cutover never
+    blocks a request on a full index load.
+    """
+
+    def __init__(self, refresh_seconds: float = settings.FACE_MODEL_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._serving: Optional[ModelVersion] = None
+        self._known: dict[str, ModelVersion] = {BASE_MODEL.version: BASE_MODEL}
+        self._checked_at = 0.0
+        # Indexes of versions other than the base one (that is face_index)
+        self._indexes: dict[str, FaceIndex] = {}
+        self._warming: Optional[threading.Thread] = None
+
+    def current(self, session: Session) -> ModelVersion:
+        """The version queries use when they don't name one."""
+        if self._serving is None or time.monotonic() - self._checked_at >= self.refresh_seconds:
+            self._refresh(session)
+        return self._serving
+
+    def resolve(self, session: Session, version: Optional[str] = None) -> ModelVersion:
+        """A named version (ValueError if unknown) or the current one."""
+        current = self.current(session)
+        if version is None:
+            return current
+        model = self._known.get(version)
+        if model is None:
+            self._refresh(session)
+            model = self._known.get(version)
+        if model is None:
+            raise ValueError(f"Unknown embedding model version '{version}'")
+        return model
+
+    def index_for(self, model: ModelVersion) -> FaceIndex:
+        if model.version == BASE_MODEL.version:
+            return face_index
+        with self._lock:
+            index = self._indexes.get(model.version)
+            if index is None:
+                index = FaceIndex(dim=model.dim, model_version=model.version)
+                self._indexes[model.version] = index
+                # Writes from other workers reach it through the change feed
+                face_change_feed.indexes.append(index)
+            return index
+
+    def loaded_index(self, version: Optional[str]) -> Optional[FaceIndex]:
+        """This worker's exact index for a version (None: base) if it is already in memory."""
+        index = face_index if version is None or version == BASE_MODEL.version else self._indexes.get(version)
+        return index if index is not None and index.loaded else None
+
+    def add(self, version: str, face_id, user_id, face_type: str, embedding, norm: Optional[float] = None) -> None:
+        index = self._indexes.get(version)
+        if index is not None:
+            index.add(face_id, user_id, face_type, embedding, norm=norm)
+
+    def remove_faces(self, face_ids) -> None:
+        for index in list(self._indexes.values()):
+            index.remove_faces(face_ids)
+
+    def remove_user(self, user_id) -> None:
+        for index in list(self._indexes.values()):
+            index.remove_user(user_id)
+
+    def stats(self) -> dict:
+        return {
+            "serving": self._serving.version if self._serving else None,
+            "indexes": {version: index.size for version, index in self._indexes.items() if index.loaded},
+        }
+
+    def _refresh(self, session: Session) -> None:
+        from app.crud import embedding_model as model_crud
+
+        models = model_crud.get_models(session)
+        active = model_crud.get_active_model(session)
+        target = ModelVersion(active.version, active.dim)
+        with self._lock:
+            self._known = {BASE_MODEL.version: BASE_MODEL, **{m.version: ModelVersion(m.version, m.dim) for m in models}}
+            self._checked_at = time.monotonic()
+            serving = self._serving
+            if serving is None or serving == target:
+                self._serving = target
+                return
+            old_index = face_index if serving.version == BASE_MODEL.version else self._indexes.get(serving.version)
+            if old_index is None or not old_index.loaded:
+                # Nothing in memory to keep serving from: switch straight away
+                self._serving = target
+                logger.info(f"🔁 Serving embedding model {target.version}")
+                return
+            if self._warming is not None and self._warming.is_alive():
+                return
+            self._warming = threading.Thread(
+                target=self._warm, args=(target,), name=f"face-index-warm-{target.version}", daemon=True
+            )
+            self._warming.start()
+
+    def _warm(self, target: ModelVersion) -> None:
+        from app.core.database import SessionLocal
+
+        started = time.perf_counter()
+        try:
+            with SessionLocal() as session:
+                self.index_for(target).ensure_loaded(session)
+        except Exception as exc:
+            logger.error(f"❌ Could not load the {target.version} face index: {exc}")
+            return
+        with self._lock:
+            self._serving = target
+        logger.info(
+            f"🔁 Serving embedding model {target.version} "
+            f"(index warmed in {time.perf_counter() - started:.1f}s)"
+        )
+
+
+# Process-wide view of the embedding model versions
+embedding_versions = EmbeddingVersions()
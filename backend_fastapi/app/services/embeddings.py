@@ -0,0 +1,94 @@
+import base64
+import binascii
+import json
+from typing import Optional, Union
+import numpy as np
+from app.core.config import settings
+
+# Wire dtypes accepted for binary embeddings (always little-endian)
+EMBEDDING_DTYPES = {"float32": np.dtype("<f4"), "float16": np.dtype("<f2")}
+EMBEDDING_ENCODINGS = ("json", "base64", "binary")
+
+
+class InvalidEmbeddingError(ValueError):
+    """Raised when an embedding fails decoding or ingest validation."""
+
+
+class EmbeddingDecodeError(InvalidEmbeddingError):
+    """Raised when an uploaded embedding cannot be decoded as declared."""
+
+
+def decode_embedding_bytes(raw: bytes, dtype: str = "float32", dim: Optional[int] = None) -> np.ndarray:
+    """Decode raw little-endian float32/float16 bytes into a float32 vector."""
+    wire_dtype = EMBEDDING_DTYPES.get(dtype)
+    if wire_dtype is None:
+        raise EmbeddingDecodeError(f"Unsupported embedding dtype '{dtype}'")
+    expected_dim = dim or settings.FACE_EMBEDDING_DIM
+    if len(raw) != expected_dim * wire_dtype.itemsize:
+        raise EmbeddingDecodeError(
+            f"Expected {expected_dim} {dtype} values ({expected_dim * wire_dtype.itemsize} bytes), got {len(raw)} bytes"
+        )
+    return np.frombuffer(raw, dtype=wire_dtype).astype(np.float32)
+
+
+def decode_embedding(
+    value: Union[str, bytes],
+    encoding: str = "json",
+    dtype: str = "float32",
+    dim: Optional[int] = None,
+) -> np.ndarray:
+    """Decode an uploaded embedding in any supported transport encoding.
+
+    ``json`` is a text list of floats; ``base64`` and ``binary`` carry the
+    packed little-endian vector, skipping decimal parsing entirely.
+    """
+    if encoding == "json":
+        try:
+            return np.asarray(json.loads(value), dtype=np.float32)
+        except (TypeError, ValueError) as exc:
+            raise EmbeddingDecodeError(f"Invalid embedding JSON: {exc}")
+    if encoding == "base64":
+        try:
+            value = base64.b64decode(value, validate=True)
+        except (binascii.Error, ValueError) as exc:
+            raise EmbeddingDecodeError(f"Invalid base64 embedding: {exc}")
+        return decode_embedding_bytes(value, dtype, dim)
+    if encoding == "binary":
+        if not isinstance(value, (bytes, bytearray, memoryview)):
+            raise EmbeddingDecodeError("binary encoding requires embedding_file")
+        return decode_embedding_bytes(value, dtype, dim)
+    raise EmbeddingDecodeError(f"Unsupported embedding encoding '{encoding}'")
+
+
+def prepare_embeddings(vectors, dim: Optional[int] = None) -> tuple[np.ndarray, np.ndarray]:
+    """Validate an (N x dim) block and L2-normalize it in one vectorized pass.
+
+    Every write path stores the unit vector plus its original norm, so search
+    can rank by plain inner product without touching the corpus norms.
+    Returns (unit_vectors, norms).
+    """
+    expected_dim = dim or settings.FACE_EMBEDDING_DIM
+    try:
+        matrix = np.asarray(vectors, dtype=np.float32)
+    except (TypeError, ValueError) as exc:
+        raise InvalidEmbeddingError(f"Embedding is not a numeric vector: {exc}")
+    if matrix.ndim != 2 or matrix.shape[1] != expected_dim:
+        raise InvalidEmbeddingError(f"Embedding must have {expected_dim} dimensions")
+    finite = np.isfinite(matrix).all(axis=1)
+    if not finite.all():
+        raise InvalidEmbeddingError(f"Embedding {int(np.argmin(finite))} contains NaN or Inf values")
+    norms = np.linalg.norm(matrix, axis=1)
+    bad = (norms == 0) | ~np.isfinite(norms)
+    if bad.any():
+        raise InvalidEmbeddingError(f"Embedding {int(np.argmax(bad))} has zero or overflowing norm")
+    return matrix / norms[:, None], norms
+
+
+def prepare_embedding(vector, dim: Optional[int] = None) -> tuple[np.ndarray, float]:
+    """Single-vector form of :func:`prepare_embeddings`; returns (unit_vector, norm)."""
+    try:
+        row = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+    except (TypeError, ValueError) as exc:
+        raise InvalidEmbeddingError(f"Embedding is not a numeric vector: {exc}")
+    unit, norms = prepare_embeddings(row, dim)
+    return unit[0], float(norms[0])
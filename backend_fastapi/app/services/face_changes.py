@@ -0,0 +1,205 @@
+import logging
+import select as select_module
+import threading
+import time
+from datetime import timedelta
+from typing import Iterable, Optional
+from sqlalchemy import func
+from sqlmodel import Session, select
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.models.face_change import CHANGE_DELETE, FACE_CHANGES_CHANNEL
+from app.services.face_index import SNAPSHOT_CATCHUP_MARGIN, face_index
+from app.services.face_verification import UserFaceCache, user_face_cache
+from app.services.identify_cache import IdentifyCache, identify_cache
+from app.services.quantization import quantized_face_index
+from app.services.sharded_index import sharded_face_index
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per poll; a full page is followed by another poll right away
+CHANGE_PAGE_SIZE = 10000
+# Beyond this many unseen seqs, stop waiting for stragglers (a bulk rollback)
+MAX_TRACKED_GAPS = 10000
+
+
+class FaceChangeFeed:
+    """Applies face_data changes from other workers to this worker's indexes.
+
+    The face_data triggers append every write to face_data_changes and
+    NOTIFY; a background thread LISTENs, reads the rows past its ``seq``
+    watermark and re-reads the affected faces, so enrolments and deletions
+    show up everywhere within one poll interval. Applying a change is an
+    idempotent upsert/remove, so replays and this worker's own writes are
+    harmless.
+    """
+
+    def __init__(
+        self,
+        indexes: Iterable,
+        cache: Optional[UserFaceCache] = None,
+        result_cache: Optional[IdentifyCache] = None,
+        poll_seconds: float = settings.FACE_CHANGE_FEED_POLL_SECONDS,
+        gap_seconds: float = settings.FACE_CHANGE_FEED_GAP_SECONDS,
+    ):
+        self.indexes = list(indexes)
+        self.cache = cache
+        self.result_cache = result_cache
+        self.poll_seconds = poll_seconds
+        self.gap_seconds = gap_seconds
+        self.last_seq: Optional[int] = None
+        self.applied = 0
+        self.last_applied_at: Optional[float] = None
+        # Seqs below last_seq not seen yet (uncommitted when last read) -> first noticed
+        self._gaps: dict[int, float] = {}
+        # Index -> watermark of the load it was last replayed for
+        self._synced: dict[int, object] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="face-change-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_seconds + 5)
+            self._thread = None
+
+    def poll(self, session: Session) -> int:
+        """Apply every change committed since the last poll; returns how many."""
+        from app.crud import face_change as change_crud
+
+        if self.last_seq is None:
+            # Start at the head: rows already committed are in any later load
+            self.last_seq = change_crud.get_latest_seq(session)
+        self._replay_reloaded(session)
+        total = 0
+        while True:
+            changes = change_crud.get_changes_after(session, self.last_seq, self._gaps, CHANGE_PAGE_SIZE)
+            self.apply(session, changes)
+            self._advance([c.seq for c in changes])
+            total += len(changes)
+            if len(changes) < CHANGE_PAGE_SIZE:
+                return total
+
+    def apply(self, session: Session, changes: list, indexes: Optional[list] = None) -> None:
+        """Bring ``indexes`` (default: all) in line with the current rows of the changed faces."""
+        from app.crud import face as face_crud
+
+        if not changes:
+            return
+        # Later changes to the same face win
+        latest = {change.face_id: change for change in changes}
+        upserted = [face_id for face_id, change in latest.items() if change.op != CHANGE_DELETE]
+        # Indexes of one embedding model version share a single read
+        by_version: dict = {}
+        for index in indexes or self.indexes:
+            by_version.setdefault(getattr(index, "model_version", None), []).append(index)
+        for version, group in by_version.items():
+            if version is None:
+                fetched = face_crud.get_faces_by_ids(session, upserted)
+            else:
+                fetched = face_crud.get_faces_by_ids(session, upserted, model_version=version)
+            rows = [row for row in fetched if row.embedding is not None]
+            present = {row.id for row in rows}
+            removed = [face_id for face_id in latest if face_id not in present]
+            for index in group:
+                for row in rows:
+                    index.add(row.id, row.user_id, row.face_type, row.embedding, norm=row.embedding_norm)
+                if removed:
+                    index.remove_faces(removed)
+        if self.cache is not None:
+            for user_id in {change.user_id for change in changes}:
+                self.cache.invalidate(user_id)
+        if self.result_cache is not None:
+            self.result_cache.bump()
+        self.applied += len(changes)
+        self.last_applied_at = time.time()
+
+    def stats(self) -> dict:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "last_seq": self.last_seq,
+            "applied": self.applied,
+            "pending_gaps": len(self._gaps),
+            "seconds_since_apply": round(time.time() - self.last_applied_at, 3) if self.last_applied_at else None,
+        }
+
+    def _replay_reloaded(self, session: Session) -> None:
+        # An index (re)loaded from a snapshot or the database may have missed
+        # changes that committed while it loaded; replay those once.
+        from app.crud import face_change as change_crud
+
+        for index in self.indexes:
+            watermark = index.watermark
+            if not index.loaded or watermark is None or self._synced.get(id(index)) == watermark:
+                continue
+            changes = change_crud.get_changes_since(session, watermark - SNAPSHOT_CATCHUP_MARGIN)
+            self.apply(session, changes, [index])
+            self._synced[id(index)] = watermark
+
+    def _advance(self, seqs: list[int]) -> None:
+        now = time.monotonic()
+        for seq in seqs:
+            self._gaps.pop(seq, None)
+        top = max(seqs, default=self.last_seq)
+        if top > self.last_seq:
+            missing = set(range(self.last_seq + 1, top)) - set(seqs)
+            if len(self._gaps) + len(missing) <= MAX_TRACKED_GAPS:
+                for seq in missing:
+                    self._gaps[seq] = now
+            self.last_seq = top
+        self._gaps = {seq: seen for seq, seen in self._gaps.items() if now - seen < self.gap_seconds}
+
+    def _prune(self, session: Session) -> None:
+        from app.crud import face_change as change_crud
+
+        now = session.exec(select(func.now())).one()
+        removed = change_crud.prune_changes(session, now - timedelta(hours=settings.FACE_CHANGE_FEED_RETENTION_HOURS))
+        if removed:
+            logger.info(f"🧹 Pruned {removed} face change rows")
+
+    def _run(self) -> None:
+        last_prune = 0.0
+        while not self._stop.is_set():
+            raw = None
+            try:
+                raw = engine.raw_connection()
+                # A LISTENing autocommit connection must never go back to the pool
+                raw.detach()
+                conn = raw.driver_connection
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {FACE_CHANGES_CHANNEL}")
+                logger.info("👂 Listening for face_data changes")
+                while not self._stop.is_set():
+                    with SessionLocal() as session:
+                        count = self.poll(session)
+                        if time.monotonic() - last_prune > 3600:
+                            self._prune(session)
+                            last_prune = time.monotonic()
+                    if count:
+                        logger.info(f"🔄 Applied {count} face changes (seq {self.last_seq})")
+                    # Wake on NOTIFY, or after poll_seconds so a lost notification costs bounded lag
+                    if select_module.select([conn], [], [], self.poll_seconds)[0]:
+                        conn.poll()
+                        conn.notifies.clear()
+            except Exception as exc:
+                logger.error(f"❌ Face change feed error: {exc}")
+                self._stop.wait(self.poll_seconds)
+            finally:
+                if raw is not None:
+                    try:
+                        raw.close()
+                    except Exception:
+                        pass
+
+
+# Keeps this worker's face indexes and caches in step with the others
+face_change_feed = FaceChangeFeed(
+    [face_index, quantized_face_index, sharded_face_index], cache=user_face_cache, result_cache=identify_cache
+)
@@ -0,0 +1,200 @@
+"""Genuine/impostor score distributions and FAR/FRR/EER over enrolled faces.
+
+Scores are cosine similarities of unit vectors. Pairs are scored in square
+blocks that fit in cache (one GEMM each) and folded straight into fixed
+histograms over [-1, 1], so the N x N matrix never exists and all the
+statistics come from two count arrays.
+
+Genuine pairs (two frames of one user) are always scored exhaustively;
+they are few. Impostor pairs grow quadratically, so above
+``max_impostor_pairs`` a random subset of blocks is scored instead. That
+gives an unbiased impostor distribution whose FAR resolution is about
+1 / impostor_pairs.
+"""
+import math
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Union
+import numpy as np
+
+DEFAULT_BINS = 4000
+DEFAULT_BLOCK_SIZE = 2048
+FAR_TARGETS = (1e-1, 1e-2, 1e-3, 1e-4, 1e-5, 1e-6)
+
+
+def _bin_index(scores: np.ndarray, bins: int) -> np.ndarray:
+    return np.clip(((scores + 1.0) * (bins / 2.0)).astype(np.int64), 0, bins - 1)
+
+
+def genuine_histogram(vectors: np.ndarray, labels: np.ndarray, bins: int = DEFAULT_BINS) -> np.ndarray:
+    """Counts of every same-user pair score (i < j)."""
+    counts = np.zeros(bins, dtype=np.int64)
+    order = np.argsort(labels, kind="stable")
+    boundaries = np.flatnonzero(np.diff(labels[order])) + 1
+    for group in np.split(order, boundaries):
+        if len(group) < 2:
+            continue
+        frames = np.asarray(vectors[np.sort(group)], dtype=np.float32)
+        scores = (frames @ frames.T)[np.triu_indices(len(group), k=1)]
+        counts += np.bincount(_bin_index(scores, bins), minlength=bins)
+    return counts
+
+
+def impostor_block_histogram(
+    vectors: np.ndarray, labels: np.ndarray, row: int, col: int, block_size: int, bins: int
+) -> np.ndarray:
+    """Counts of the different-user pair scores in one (row, col) block, row <= col."""
+    # Clip to the labelled rows: a snapshot's vector file has spare rows at the end
+    n = len(labels)
+    a = slice(row * block_size, min((row + 1) * block_size, n))
+    b = slice(col * block_size, min((col + 1) * block_size, n))
+    scores = np.asarray(vectors[a], dtype=np.float32) @ np.asarray(vectors[b], dtype=np.float32).T
+    mask = labels[a][:, None] != labels[b][None, :]
+    if row == col:
+        mask &= np.triu(np.ones(scores.shape, dtype=bool), k=1)
+    return np.bincount(_bin_index(scores[mask], bins), minlength=bins)
+
+
+def plan_blocks(n: int, block_size: int, max_pairs: Optional[int], seed: int = 0) -> tuple[list[tuple[int, int]], float]:
+    """Upper-triangle blocks to score, and the fraction of all blocks they are.
+
+    Every block when the full triangle fits in ``max_pairs``; otherwise a
+    uniform random sample of blocks holding about ``max_pairs`` pairs.
+    """
+    blocks = math.ceil(n / block_size)
+    total = blocks * (blocks + 1) // 2
+    if not max_pairs or n * (n - 1) // 2 <= max_pairs:
+        return [(i, j) for i in range(blocks) for j in range(i, blocks)], 1.0
+    wanted = max(1, min(total, math.ceil(max_pairs / block_size**2)))
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(total, size=wanted, replace=False)
+    # Map a linear upper-triangle index back to (row, col)
+    starts = np.cumsum([0] + [blocks - i for i in range(blocks)])
+    rows = np.searchsorted(starts, picks, side="right") - 1
+    cols = rows + (picks - starts[rows])
+    return sorted(zip(rows.tolist(), cols.tolist())), wanted / total
+
+
+_worker_state: dict = {}
+
+
+def _init_worker(vectors_path: str, labels: np.ndarray, block_size: int, bins: int) -> None:
+    _worker_state.update(
+        vectors=np.load(vectors_path, mmap_mode="r"), labels=labels, block_size=block_size, bins=bins
+    )
+
+
+def _score_blocks(blocks: list[tuple[int, int]]) -> np.ndarray:
+    state = _worker_state
+    counts = np.zeros(state["bins"], dtype=np.int64)
+    for row, col in blocks:
+        counts += impostor_block_histogram(
+            state["vectors"], state["labels"], row, col, state["block_size"], state["bins"]
+        )
+    return counts
+
+
+def impostor_histogram(
+    vectors: Union[np.ndarray, str],
+    labels: np.ndarray,
+    blocks: list[tuple[int, int]],
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    bins: int = DEFAULT_BINS,
+    workers: int = 1,
+) -> np.ndarray:
+    """Impostor counts over the given blocks, optionally spread over a process pool.
+
+    ``vectors`` may be a ``.npy`` path; workers then map it instead of
+    receiving a copy.
+    """
+    if workers <= 1:
+        matrix = np.load(vectors, mmap_mode="r") if isinstance(vectors, str) else vectors
+        counts = np.zeros(bins, dtype=np.int64)
+        for row, col in blocks:
+            counts += impostor_block_histogram(matrix, labels, row, col, block_size, bins)
+        return counts
+    with tempfile.TemporaryDirectory() as scratch:
+        if not isinstance(vectors, str):
+            path = os.path.join(scratch, "vectors.npy")
+            np.save(path, vectors)
+            vectors = path
+        # Interleave so every task mixes cheap diagonal and full blocks
+        tasks = [blocks[i :: workers * 4] for i in range(workers * 4)]
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(vectors, labels, block_size, bins)
+        ) as pool:
+            return sum(pool.map(_score_blocks, [t for t in tasks if t]), np.zeros(bins, dtype=np.int64))
+
+
+def error_rates(genuine: np.ndarray, impostor: np.ndarray) -> dict:
+    """FAR, FRR, EER and ROC points from the two histograms.
+
+    A threshold t accepts scores >= t; thresholds are the bin lower edges.
+    """
+    bins = len(genuine)
+    thresholds = np.linspace(-1.0, 1.0, bins, endpoint=False)
+    genuine_total = max(int(genuine.sum()), 1)
+    impostor_total = max(int(impostor.sum()), 1)
+    far = np.cumsum(impostor[::-1])[::-1] / impostor_total
+    frr = np.concatenate([[0], np.cumsum(genuine)[:-1]]) / genuine_total
+    crossing = int(np.argmax(far <= frr)) if (far <= frr).any() else bins - 1
+    if crossing > 0:
+        # Interpolate where FAR - FRR changes sign between the two edges
+        d0, d1 = far[crossing - 1] - frr[crossing - 1], far[crossing] - frr[crossing]
+        w = d0 / (d0 - d1) if d0 != d1 else 0.0
+        eer = float(far[crossing - 1] + w * (far[crossing] - far[crossing - 1]))
+        eer_threshold = float(thresholds[crossing - 1] + w * (thresholds[crossing] - thresholds[crossing - 1]))
+    else:
+        eer, eer_threshold = float(far[0]), float(thresholds[0])
+    roc = []
+    for target in FAR_TARGETS:
+        if target < 1.0 / impostor_total:
+            roc.append({"far": target, "threshold": None, "tar": None})  # below what was measured
+            continue
+        i = int(np.argmax(far <= target))
+        roc.append({"far": target, "threshold": float(thresholds[i]), "tar": float(1 - frr[i])})
+    return {
+        "thresholds": thresholds,
+        "far": far,
+        "frr": frr,
+        "eer": eer,
+        "eer_threshold": eer_threshold,
+        "roc": roc,
+    }
+
+
+def rates_at(rates: dict, threshold: float) -> dict:
+    i = int(np.clip(np.searchsorted(rates["thresholds"], threshold, side="left"), 0, len(rates["far"]) - 1))
+    return {"threshold": threshold, "far": float(rates["far"][i]), "frr": float(rates["frr"][i])}
+
+
+def evaluate(
+    vectors: Union[np.ndarray, str],
+    labels: np.ndarray,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    max_impostor_pairs: Optional[int] = None,
+    workers: int = 1,
+    bins: int = DEFAULT_BINS,
+    seed: int = 0,
+) -> dict:
+    """Score genuine and impostor pairs and derive the error rates.
+
+    ``vectors`` is an (N x dim) array of unit vectors or a ``.npy`` path to
+    one; ``labels`` the identity of each row.
+    """
+    matrix = np.load(vectors, mmap_mode="r") if isinstance(vectors, str) else vectors
+    labels = np.asarray(labels)
+    blocks, sampled = plan_blocks(len(labels), block_size, max_impostor_pairs, seed)
+    genuine = genuine_histogram(matrix, labels, bins)
+    impostor = impostor_histogram(vectors, labels, blocks, block_size, bins, workers)
+    return {
+        "faces": int(len(labels)),
+        "identities": int(len(np.unique(labels))),
+        "genuine_pairs": int(genuine.sum()),
+        "impostor_pairs": int(impostor.sum()),
+        "impostor_blocks_fraction": sampled,
+        "genuine_histogram": genuine,
+        "impostor_histogram": impostor,
+        **error_rates(genuine, impostor),
+    }
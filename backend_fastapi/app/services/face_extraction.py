@@ -0,0 +1,539 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import NamedTuple, Optional
+from uuid import UUID
+import numpy as np
+from sqlmodel import Session
+from app.core.config import settings
+from app.services.embeddings import InvalidEmbeddingError, prepare_embedding
+from app.services.face_preprocessing import ImageInput, PreprocessPool, attach_buffer, preprocess_batch
+
+logger = logging.getLogger(__name__)
+
+EXTRACTOR_BACKENDS = ("onnx", "hash")
+
+
+class FaceExtractor:
+    """Turns encoded face images into embeddings, one batch per call.
+
+    ``preprocess`` decodes one image into the model's input (so a bad image
+    fails alone); ``infer`` runs the model once over a stacked batch of
+    them and returns (n x dim) embeddings. Extractors whose input is a
+    square pixel crop set ``input_size`` (and ``channels_first``) and can
+    be fed by a PreprocessPool instead.
+    """
+
+    version: str
+    dim: int
+    input_size: Optional[int] = None
+    channels_first: bool = True
+
+    def preprocess(self, data: bytes) -> np.ndarray:
+        raise NotImplementedError
+
+    def preprocess_batch(self, images: list[ImageInput]) -> tuple[np.ndarray, list[Optional[str]]]:
+        """Inputs of the images that could be read, stacked, and per image None or what went wrong."""
+        inputs, errors = [], []
+        for image in images:
+            try:
+                if isinstance(image, str):
+                    with open(image, "rb") as f:
+                        image = f.read()
+                inputs.append(self.preprocess(image))
+                errors.append(None)
+            except Exception as exc:
+                errors.append(f"could not decode image: {exc}")
+        return (np.stack(inputs) if inputs else np.empty((0,))), errors
+
+    def infer(self, batch: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def embed(self, images: list[bytes]) -> np.ndarray:
+        return self.infer(np.stack([self.preprocess(data) for data in images]))
+
+
+class HashExtractor(FaceExtractor):
+    """Deterministic stand-in for a real model: the same bytes always give the same embedding.
+
+    Lets tests and development setups exercise the whole extraction path
+    without model files or onnxruntime.
+    """
+
+    def __init__(self, version: str, dim: int):
+        self.version = version
+        self.dim = dim
+
+    def preprocess(self, data: bytes) -> np.ndarray:
+        if not data:
+            raise ValueError("empty image")
+        return np.frombuffer(hashlib.sha256(data).digest(), dtype=np.uint8)
+
+    def infer(self, batch: np.ndarray) -> np.ndarray:
+        return np.stack(
+            [
+                np.random.default_rng(np.frombuffer(digest.tobytes(), dtype=np.uint64)).standard_normal(self.dim)
+                for digest in batch
+            ]
+        ).astype(np.float32)
+
+
+class OnnxExtractor(FaceExtractor):
+    """ONNX Runtime on CPU over square RGB crops normalized to [-1, 1].
+
+    The input layout (NCHW or NHWC) is read from the model. Each instance
+    runs single-threaded: parallelism comes from the worker processes.
+    """
+
+    def __init__(self, version: str, model_path: str, input_size: int = 112, threads: int = 1):
+        try:
+            import onnxruntime
+        except ImportError as exc:
+            raise RuntimeError("The onnx extractor backend needs the onnxruntime package") from exc
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self._session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        model_input = self._session.get_inputs()[0]
+        self._input_name = model_input.name
+        self.channels_first = len(model_input.shape) == 4 and model_input.shape[1] == 3
+        self.version = version
+        self.input_size = input_size
+        output_shape = self._session.get_outputs()[0].shape
+        self.dim = output_shape[-1] if isinstance(output_shape[-1], int) else 0
+
+    def preprocess(self, data: bytes) -> np.ndarray:
+        inputs, errors = self.preprocess_batch([data])
+        if errors[0] is not None:
+            raise ValueError(errors[0])
+        return inputs[0]
+
+    def preprocess_batch(self, images: list[ImageInput]) -> tuple[np.ndarray, list[Optional[str]]]:
+        inputs, errors = preprocess_batch(images, self.input_size, channels_first=self.channels_first)
+        failed = [i for i, error in enumerate(errors) if error is not None]
+        return (np.delete(inputs, failed, axis=0) if failed else inputs), errors
+
+    def infer(self, batch: np.ndarray) -> np.ndarray:
+        output = self._session.run(None, {self._input_name: np.ascontiguousarray(batch, dtype=np.float32)})[0]
+        return np.asarray(output, dtype=np.float32).reshape(len(batch), -1)
+
+
+def create_extractor(
+    backend: str,
+    version: str,
+    dim: int,
+    model_path: str = "",
+    input_size: int = settings.FACE_EXTRACTOR_INPUT_SIZE,
+) -> FaceExtractor:
+    if backend == "hash":
+        return HashExtractor(version, dim)
+    if backend == "onnx":
+        if not model_path:
+            raise ValueError("The onnx extractor backend needs FACE_EXTRACTOR_MODEL_PATH")
+        return OnnxExtractor(version, model_path, input_size)
+    raise ValueError(f"Unknown extractor backend '{backend}'; expected one of {', '.join(EXTRACTOR_BACKENDS)}")
+
+
+# Inference process state, set once by _init_worker
+_worker_extractor: Optional[FaceExtractor] = None
+
+
+def _init_worker(options: dict) -> None:
+    global _worker_extractor
+    _worker_extractor = create_extractor(**options)
+
+
+def _embed_batch(images: list[ImageInput]) -> tuple[list, float]:
+    """Inference process: embed what can be decoded; per image, a vector or an error message."""
+    inputs, errors = _worker_extractor.preprocess_batch(images)
+    return _infer_rows(inputs, errors)
+
+
+def _embed_shared(name: str, shape: tuple, errors: list[Optional[str]]) -> tuple[list, float]:
+    """Inference process: embed a batch a PreprocessPool left in shared memory."""
+    pixels = attach_buffer(name, shape)[: len(errors)]
+    failed = [i for i, error in enumerate(errors) if error is not None]
+    return _infer_rows(np.delete(pixels, failed, axis=0) if failed else pixels, errors)
+
+
+def _infer_rows(inputs: np.ndarray, errors: list[Optional[str]]) -> tuple[list, float]:
+    results: list = list(errors)
+    rows = [i for i, error in enumerate(errors) if error is None]
+    started = time.perf_counter()
+    if rows:
+        for i, vector in zip(rows, _worker_extractor.infer(inputs)):
+            results[i] = vector
+    return results, time.perf_counter() - started
+
+
+class _Request(NamedTuple):
+    image: ImageInput
+    future: Future
+
+
+class ExtractionPool:
+    """Inference processes fed by dynamic micro-batching.
+
+    Callers submit one image at a time and get a Future. A dispatcher
+    thread waits until a worker is free, then takes whatever is queued, up
+    to ``max_batch``, waiting at most ``max_wait_ms`` for more, and hands
+    the batch to a worker. Under load batches fill up; when idle a single
+    request waits only a few milliseconds. Stored images are submitted by
+    path and read by the workers, so their bytes never cross processes.
+
+    With ``preprocess_workers``, a pixel-input extractor is fed by a
+    PreprocessPool: batches are decoded and aligned there into shared
+    memory, and the inference worker maps the same buffer, so the
+    inference workers only run the model.
+    """
+
+    def __init__(
+        self,
+        backend: str = settings.FACE_EXTRACTOR_BACKEND,
+        version: str = settings.FACE_EXTRACTOR_VERSION or settings.FACE_EMBEDDING_MODEL,
+        dim: int = settings.FACE_EXTRACTOR_DIM,
+        model_path: str = settings.FACE_EXTRACTOR_MODEL_PATH,
+        workers: int = settings.FACE_EXTRACTOR_WORKERS,
+        max_batch: int = settings.FACE_EXTRACTOR_MAX_BATCH,
+        max_wait_ms: float = settings.FACE_EXTRACTOR_MAX_WAIT_MS,
+        preprocess_workers: int = settings.FACE_PREPROCESS_WORKERS,
+        preprocess_slots: int = settings.FACE_PREPROCESS_SLOTS,
+    ):
+        self.backend = backend
+        self.version = version
+        self.dim = dim
+        self.model_path = model_path
+        self.workers = workers or os.cpu_count() or 1
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.preprocess_workers = preprocess_workers
+        self.preprocess_slots = preprocess_slots or 2 * self.workers
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._slots = threading.Semaphore(self.workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._options: Optional[dict] = None
+        self._preprocessor: Optional[PreprocessPool] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at: Optional[float] = None
+        self.in_flight = 0
+        self.batches = 0
+        self.embedded = 0
+        self.failed = 0
+        self.infer_seconds = 0.0
+        self.restarts = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.dim = self.dim or self._version_dim()
+        options = {"backend": self.backend, "version": self.version, "dim": self.dim, "model_path": self.model_path}
+        # Fail here, not in every worker, on a bad backend or model path
+        extractor = create_extractor(**options)
+        if self.preprocess_workers and extractor.input_size:
+            self._preprocessor = PreprocessPool(
+                extractor.input_size,
+                self.preprocess_workers,
+                self.max_batch,
+                self.preprocess_slots,
+                extractor.channels_first,
+            )
+            self._preprocessor.start()
+            # A batch holds its buffer from decoding through inference
+            self._slots = threading.Semaphore(self.preprocess_slots)
+        self._options = options
+        self._executor = self._new_executor()
+        self._stop.clear()
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="face-extraction", daemon=True)
+        self._thread.start()
+        logger.info(f"🚀 Started {self.workers} {self.backend} extraction workers for model {self.version}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.max_wait + 5)
+            self._thread = None
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            request.future.set_exception(RuntimeError("Extraction pool stopped"))
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        if self._preprocessor is not None:
+            self._preprocessor.stop()
+            self._preprocessor = None
+
+    def submit(self, image: ImageInput) -> Future:
+        """Queue one image (a path or its bytes); the Future resolves to its raw embedding."""
+        if not self.running:
+            raise RuntimeError("Extraction pool is not running")
+        future: Future = Future()
+        self._queue.put(_Request(image, future))
+        return future
+
+    def embed(self, images: list[ImageInput]) -> np.ndarray:
+        """(n x dim) embeddings of ``images``; raises if any fails (a ReembeddingJob embedder)."""
+        futures = [self.submit(image) for image in images]
+        return np.stack([future.result() for future in futures]) if futures else np.empty((0, self.dim), np.float32)
+
+    def stats(self) -> dict:
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            "running": self.running,
+            "backend": self.backend,
+            "model_version": self.version,
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize(),
+            "in_flight_batches": self.in_flight,
+            "batches": self.batches,
+            "embedded": self.embedded,
+            "failed": self.failed,
+            "mean_batch_size": round((self.embedded + self.failed) / self.batches, 2) if self.batches else None,
+            "images_per_second": round(self.embedded / elapsed, 2) if elapsed else None,
+            "images_per_second_per_worker": (
+                round(self.embedded / self.infer_seconds, 2) if self.infer_seconds else None
+            ),
+            "preprocess_workers": self._preprocessor.workers if self._preprocessor else 0,
+            "worker_pool_restarts": self.restarts,
+        }
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self._options,),
+        )
+
+    def _recover(self, executor: ProcessPoolExecutor) -> None:
+        """Replace a pool broken by a worker that died (e.g. crashed in ONNX Runtime).
+
+        A ProcessPoolExecutor fails every later submit once one worker dies,
+        so without a new one the pool would stay running but never embed
+        again. Only the first batch to see the breakage replaces it.
+        """
+        with self._executor_lock:
+            if self._executor is not executor or self._stop.is_set():
+                return
+            self._executor = self._new_executor()
+            self.restarts += 1
+        logger.error(f"❌ An extraction worker died; restarted the {self.workers}-process pool")
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _version_dim(self) -> int:
+        from app.core.database import SessionLocal
+        from app.crud import embedding_model as model_crud
+
+        if model_crud.is_base_version(self.version):
+            return settings.FACE_EMBEDDING_DIM
+        with SessionLocal() as session:
+            model = model_crud.get_model(session, self.version)
+        if model is None:
+            raise ValueError(f"Unknown model version '{self.version}'; register it before extracting with it")
+        return model.dim
+
+    def _next_batch(self) -> list[_Request]:
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                # Whatever is already queued joins even once the wait is over
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            # Requests keep queueing (and batches keep growing) while every worker is busy
+            if not self._slots.acquire(timeout=0.5):
+                continue
+            batch = self._next_batch()
+            if not batch:
+                self._slots.release()
+                continue
+            self.in_flight += 1
+            images = [request.image for request in batch]
+            executor = self._executor
+            try:
+                if self._preprocessor is not None:
+                    pixels = self._preprocessor.submit(images)
+                    pixels.add_done_callback(lambda pixels, batch=batch: self._infer_pixels(batch, pixels))
+                else:
+                    done = executor.submit(_embed_batch, images)
+                    done.add_done_callback(lambda done, batch=batch: self._finish(batch, done, executor=executor))
+            except Exception as exc:
+                self._finish(batch, None, exc, executor)
+
+    def _infer_pixels(self, batch: list[_Request], pixels: Future) -> None:
+        """Hand a preprocessed batch to an inference worker; its buffer is freed once embedded."""
+        if pixels.exception() is not None:
+            self._finish(batch, None, pixels.exception())
+            return
+        pixel_batch = pixels.result()
+
+        executor = self._executor
+
+        def embedded(done: Future) -> None:
+            pixel_batch.release()
+            self._finish(batch, done, executor=executor)
+
+        try:
+            done = executor.submit(
+                _embed_shared, pixel_batch.slot.name, pixel_batch.buffer_shape, pixel_batch.errors
+            )
+        except Exception as exc:
+            pixel_batch.release()
+            self._finish(batch, None, exc, executor)
+            return
+        done.add_done_callback(embedded)
+
+    def _finish(
+        self,
+        batch: list[_Request],
+        done: Optional[Future],
+        error: Optional[Exception] = None,
+        executor: Optional[ProcessPoolExecutor] = None,
+    ) -> None:
+        self.in_flight -= 1
+        self._slots.release()
+        self.batches += 1
+        if error is None:
+            error = done.exception()
+        if isinstance(error, BrokenProcessPool) and executor is not None:
+            self._recover(executor)
+        if error is not None:
+            logger.error(f"❌ Extraction batch of {len(batch)} images failed: {error}")
+            self.failed += len(batch)
+            for request in batch:
+                request.future.set_exception(error)
+            return
+        results, seconds = done.result()
+        self.infer_seconds += seconds
+        for request, result in zip(batch, results):
+            if isinstance(result, str):
+                self.failed += 1
+                request.future.set_exception(ValueError(result))
+            else:
+                self.embedded += 1
+                request.future.set_result(result)
+
+
+class StoredImageEmbedder:
+    """Embeds stored face images that have no embedding under the extractor's version.
+
+    For the base version it walks face_data rows uploaded without an
+    embedding, embeds their images through the pool and writes them like an
+    upload would (templates, indexes, duplicate check, retention). Any
+    other version is registered with the ReembeddingJob, which backfills
+    face_embeddings from the same images.
+    """
+
+    def __init__(
+        self,
+        pool: ExtractionPool,
+        batch_size: int = settings.FACE_EXTRACTOR_BACKFILL_BATCH,
+        pause_seconds: float = settings.FACE_EXTRACTOR_BACKFILL_PAUSE_SECONDS,
+    ):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.cursor: Optional[UUID] = None
+        self.written = 0
+        self.failed = 0
+        self.backlog: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        from app.crud.embedding_model import is_base_version
+        from app.services.reembedding import reembedding_job
+
+        if not is_base_version(self.pool.version):
+            reembedding_job.register_embedder(self.pool.version, self.pool.embed)
+            logger.info(f"🧬 Stored images are backfilled for {self.pool.version} by the re-embedding job")
+            return
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="face-image-embedding", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    def run_once(self, session: Session) -> int:
+        """Embed the next batch of faces without an embedding; returns faces processed."""
+        from app.crud import face as face_crud
+
+        rows = face_crud.get_faces_without_embedding(session, self.cursor, self.batch_size)
+        if not rows:
+            # End of a pass: start over, picking up uploads (and earlier failures) since
+            self.cursor = None
+            self.backlog = face_crud.count_faces_without_embedding(session)
+            return 0
+        self.cursor = rows[-1].id
+        futures = [(row.id, self.pool.submit(row.file_path)) for row in rows]
+        face_ids, units, norms = [], [], []
+        for face_id, future in futures:
+            try:
+                unit, norm = prepare_embedding(future.result(), settings.FACE_EMBEDDING_DIM)
+            except (InvalidEmbeddingError, ValueError, OSError) as exc:
+                self.failed += 1
+                logger.warning(f"⚠️ Stored image of face {face_id} not embedded: {exc}")
+                continue
+            face_ids.append(face_id)
+            units.append(unit)
+            norms.append(norm)
+        written = face_crud.set_face_embeddings(session, face_ids, units, norms)
+        self.written += written
+        if self.backlog is not None:
+            self.backlog = max(self.backlog - written, 0)
+        return len(rows)
+
+    def stats(self) -> dict:
+        return {"running": self.running, "written": self.written, "failed": self.failed, "backlog": self.backlog}
+
+    def _run(self) -> None:
+        from app.core.database import SessionLocal
+
+        while not self._stop.is_set():
+            processed = 0
+            try:
+                with SessionLocal() as session:
+                    processed = self.run_once(session)
+            except Exception as exc:
+                logger.error(f"❌ Stored image embedding step failed: {exc}")
+            # Busy: a short pause between batches; idle: check back now and then
+            self._stop.wait(self.pause_seconds if processed else max(self.pause_seconds, 30.0))
+
+
+# Started with the app when FACE_EXTRACTOR_BACKEND is set
+extraction_pool = ExtractionPool()
+stored_image_embedder = StoredImageEmbedder(extraction_pool)
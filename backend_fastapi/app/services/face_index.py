@@ -0,0 +1,623 @@
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, NamedTuple, Optional
+from uuid import UUID
+import numpy as np
+from sqlalchemy import func
+from sqlmodel import Session, select
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# UUIDs are kept as raw 16-byte values so the id arrays stay flat NumPy buffers
+UUID_DTYPE = np.dtype("V16")
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_POINTER = "CURRENT"
+# Rows written this long before the watermark are re-read on catch-up, which
+# covers transactions that were still in flight when the snapshot was taken
+SNAPSHOT_CATCHUP_MARGIN = timedelta(minutes=5)
+
+
+def uuid_key(value) -> np.void:
+    """Convert a UUID (or its string form) to the 16-byte key used in the index."""
+    if not isinstance(value, UUID):
+        value = UUID(str(value))
+    return np.void(value.bytes)
+
+
+def key_uuid(key: np.void) -> UUID:
+    return UUID(bytes=key.tobytes())
+
+
+class FaceArrays(NamedTuple):
+    """A block of embedded faces as flat arrays (see crud.face.iter_face_arrays)."""
+    ids: np.ndarray  # UUID_DTYPE
+    user_ids: np.ndarray  # UUID_DTYPE
+    face_types: np.ndarray  # codes into face_type_names
+    face_type_names: list[str]
+    embeddings: np.ndarray  # (n x dim) float32
+    norms: np.ndarray  # float32, as uploaded
+
+
+def face_arrays_from_rows(rows: list) -> FaceArrays:
+    """FaceArrays of (id, user_id, face_type, embedding, embedding_norm) rows."""
+    names = sorted({r.face_type for r in rows})
+    embeddings = np.asarray([r.embedding for r in rows], dtype=np.float32)
+    if not rows:
+        embeddings = embeddings.reshape(0, 0)
+    lengths = np.linalg.norm(embeddings, axis=1)
+    return FaceArrays(
+        ids=np.array([uuid_key(r.id) for r in rows], dtype=UUID_DTYPE),
+        user_ids=np.array([uuid_key(r.user_id) for r in rows], dtype=UUID_DTYPE),
+        face_types=np.array([names.index(r.face_type) for r in rows], dtype=np.int16),
+        face_type_names=names,
+        embeddings=embeddings,
+        norms=np.array(
+            [
+                r.embedding_norm if getattr(r, "embedding_norm", None) is not None else length
+                for r, length in zip(rows, lengths)
+            ],
+            dtype=np.float32,
+        ),
+    )
+
+
+class FaceHit(NamedTuple):
+    face_id: UUID
+    user_id: UUID
+    face_type: str
+    score: float  # cosine similarity
+    inner_product: float
+
+
+class UserMatch(NamedTuple):
+    """One user's best showing across a block of probes (see FaceIndex.match_users)."""
+    user_id: UUID
+    face_id: UUID
+    face_type: str
+    score: float  # best cosine similarity over all probes
+    probe: int  # row of the probe that scored it
+    probes_matched: int  # probes scoring the user at or above the threshold
+
+
+class FaceIndex:
+    """Exact in-memory cosine search over enrolled face embeddings.
+
+    Every embedding lives L2-normalized in one contiguous float32 matrix, with
+    parallel face_id/user_id/face_type arrays, so a query is a single
+    matrix-vector product plus ``argpartition``. Removed faces are only
+    flagged in a private ``_deleted`` mask and scored as -inf, so columns
+    mapped from a snapshot stay shared with the other workers; they are
+    compacted away when a snapshot is written, or in memory once more than
+    half the rows are dead.
+    """
+
+    # Per-row arrays, all grown and compacted together; subclasses swap the
+    # vector payload (see QuantizedFaceIndex).
+    _columns = ("_vectors", "_norms", "_face_ids", "_user_ids", "_face_types")
+
+    def __init__(
+        self,
+        dim: int = settings.FACE_EMBEDDING_DIM,
+        snapshot_dir: Optional[str] = None,
+        model_version: Optional[str] = None,
+    ):
+        self.dim = dim
+        self.snapshot_dir = snapshot_dir or None
+        # None: the base version in face_data.embedding (see EmbeddingVersions)
+        self.model_version = model_version
+        self._lock = threading.RLock()
+        self._loaded = False
+        # Database time the loaded rows are complete up to (see load_snapshot)
+        self._watermark: Optional[datetime] = None
+        # face_type is stored as a uint8 code into this list
+        self._face_type_names: list[str] = []
+        self._reset(0)
+        # Bumped on every mutation so callers can tell when results went stale
+        self.generation = 0
+        # (generation, per-row user numbers) for match_users
+        self._user_code_cache: Optional[tuple[int, np.ndarray]] = None
+
+    @property
+    def size(self) -> int:
+        return self._size - self._dead
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def watermark(self) -> Optional[datetime]:
+        """Database time the last (re)load started; later writes may be missing."""
+        return self._watermark
+
+    def load(self, session: Session) -> None:
+        """(Re)build the index from every face that has an embedding (of this model version)."""
+        from app.crud import face as face_crud
+
+        watermark = session.exec(select(func.now())).one()
+        started = time.perf_counter()
+        # Binary COPY straight into arrays: no ORM rows or per-float objects
+        chunks = face_crud.iter_face_arrays(session, dim=self.dim, model_version=self.model_version)
+        self.load_arrays(chunks, watermark, capacity=face_crud.count_embedded_faces(session, self.model_version))
+        label = f"Face index {self.model_version}" if self.model_version is not None else "Face index"
+        logger.info(f"✓ {label} loaded in {time.perf_counter() - started:.2f}s: {self._size} embeddings")
+
+    def load_rows(self, rows: Iterable, watermark: Optional[datetime] = None) -> None:
+        """Replace the contents with (id, user_id, face_type, embedding, embedding_norm) rows."""
+        with self._lock:
+            self._reset(len(rows) if hasattr(rows, "__len__") else 0)
+            for row in rows:
+                self._upsert(row.id, row.user_id, row.face_type, row.embedding, row.embedding_norm)
+            self._watermark = watermark
+            self._loaded = True
+            self.generation += 1
+
+    def load_arrays(self, chunks: Iterable[FaceArrays], watermark: Optional[datetime] = None, capacity: int = 0) -> None:
+        """Replace the contents with blocks of faces, sized up front for ``capacity`` rows."""
+        with self._lock:
+            self._reset(capacity)
+            for chunk in chunks:
+                self._append_arrays(chunk)
+            self._watermark = watermark
+            self._loaded = True
+            self.generation += 1
+
+    def ensure_loaded(self, session: Session) -> None:
+        """Load on first use: from the on-disk snapshot when one is configured
+        and valid, otherwise from the database (then write a snapshot)."""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    if self.snapshot_dir and self.load_snapshot(session, self.snapshot_dir):
+                        return
+                    self.load(session)
+                    if self.snapshot_dir:
+                        try:
+                            self.save_snapshot(self.snapshot_dir)
+                        except OSError as exc:
+                            logger.warning(f"⚠️ Could not write face index snapshot: {exc}")
+
+    def save_snapshot(self, directory: str, keep: int = settings.FACE_INDEX_SNAPSHOT_KEEP) -> str:
+        """Write the index as a new versioned snapshot and point CURRENT at it.
+
+        Every column is a plain ``.npy`` file with spare rows at the end, so
+        workers map it read-only and share one copy through the page cache.
+        Returns the snapshot's path.
+        """
+        with self._lock:
+            if not self._loaded:
+                raise RuntimeError("Face index is not loaded")
+            view = self._view()
+            live = ~view["_deleted"]
+            size = int(live.sum())
+            meta = {
+                "version": SNAPSHOT_VERSION,
+                "kind": type(self).__name__,
+                "dim": self.dim,
+                "size": size,
+                "columns": list(self._columns),
+                "face_type_names": list(self._face_type_names),
+                "watermark": self._watermark.isoformat() if self._watermark else None,
+            }
+        capacity = size + max(int(size * settings.FACE_INDEX_SNAPSHOT_HEADROOM), 64)
+        name = f"snapshot-{datetime.utcnow():%Y%m%d%H%M%S%f}"
+        path = os.path.join(directory, name)
+        os.makedirs(path)
+        # Views stay valid outside the lock: compaction swaps arrays, appends go past size.
+        # Rows removed since the last load are left out here, so tombstones never reach a snapshot.
+        for column in self._columns:
+            values = view[column] if live.all() else view[column][live]
+            out = np.lib.format.open_memmap(
+                os.path.join(path, f"{column.lstrip('_')}.npy"),
+                mode="w+",
+                dtype=values.dtype,
+                shape=(capacity,) + values.shape[1:],
+            )
+            out[:size] = values
+            out.flush()
+            del out
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        pointer = os.path.join(directory, SNAPSHOT_POINTER)
+        with open(f"{pointer}.tmp", "w") as f:
+            f.write(name)
+        os.replace(f"{pointer}.tmp", pointer)
+        # Older versions may still be mapped by other workers; unlinking is safe
+        versions = sorted(d for d in os.listdir(directory) if d.startswith("snapshot-"))
+        for old in versions[: max(len(versions) - keep, 0)]:
+            if old != name:
+                shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+        logger.info(f"💾 Face index snapshot written: {path} ({size} embeddings)")
+        return path
+
+    def load_snapshot(self, session: Session, directory: str) -> bool:
+        """Map the current snapshot and catch up with the database.
+
+        Rows written after the snapshot's watermark are upserted and faces
+        deleted since are dropped. Returns False (index untouched) when there
+        is no usable snapshot.
+        """
+        from app.crud import face as face_crud
+
+        started = time.perf_counter()
+        try:
+            with open(os.path.join(directory, SNAPSHOT_POINTER)) as f:
+                path = os.path.join(directory, f.read().strip())
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if (
+            meta.get("version") != SNAPSHOT_VERSION
+            or meta.get("kind") != type(self).__name__
+            or meta.get("dim") != self.dim
+            or meta.get("columns") != list(self._columns)
+            or not meta.get("watermark")
+        ):
+            logger.warning(f"⚠️ Ignoring incompatible face index snapshot {path}")
+            return False
+        try:
+            # Copy-on-write: untouched pages stay shared with every other worker
+            columns = {
+                name: np.load(os.path.join(path, f"{name.lstrip('_')}.npy"), mmap_mode="c")
+                for name in self._columns
+            }
+        except (OSError, ValueError) as exc:
+            logger.warning(f"⚠️ Could not map face index snapshot {path}: {exc}")
+            return False
+        watermark = datetime.fromisoformat(meta["watermark"])
+        size = meta["size"]
+        with self._lock:
+            for name, values in columns.items():
+                setattr(self, name, values)
+            self._size = size
+            self._deleted = np.zeros(self._norms.shape[0], dtype=bool)
+            self._dead = 0
+            self._face_type_names = list(meta["face_type_names"])
+            raw = self._face_ids[:size].tobytes()
+            self._row_of = {raw[i * 16 : (i + 1) * 16]: i for i in range(size)}
+            now = session.exec(select(func.now())).one()
+            changed = face_crud.get_faces_updated_since(session, watermark - SNAPSHOT_CATCHUP_MARGIN)
+            for row in changed:
+                self._upsert(row.id, row.user_id, row.face_type, row.embedding, row.embedding_norm)
+            live_ids = face_crud.get_embedded_face_ids(session)
+            live = np.frombuffer(b"".join(UUID(str(f)).bytes for f in live_ids), dtype=UUID_DTYPE)
+            keep = np.isin(self._face_ids[: self._size].view("S16"), live.view("S16"))
+            self._tombstone(np.flatnonzero(~keep))
+            self._watermark = now
+            self._loaded = True
+            self.generation += 1
+        logger.info(
+            f"✓ Face index mapped from snapshot in {time.perf_counter() - started:.2f}s: "
+            f"{size} embeddings, {len(changed)} caught up, {int((~keep).sum())} removed"
+        )
+        return True
+
+    def add(self, face_id, user_id, face_type: str, embedding, norm: Optional[float] = None) -> None:
+        """Insert or replace one face. No-op until the index has been loaded.
+
+        ``norm`` is the embedding's norm as uploaded when ``embedding`` has
+        already been normalized at ingest.
+        """
+        with self._lock:
+            if not self._loaded:
+                return
+            self._upsert(face_id, user_id, face_type, embedding, norm)
+            self.generation += 1
+
+    def remove_faces(self, face_ids: Iterable) -> None:
+        with self._lock:
+            if not self._loaded:
+                return
+            rows = [self._row_of.get(uuid_key(f).tobytes()) for f in face_ids]
+            self._tombstone(np.array([r for r in rows if r is not None], dtype=np.int64))
+
+    def remove_user(self, user_id) -> None:
+        with self._lock:
+            if not self._loaded:
+                return
+            self._tombstone(np.flatnonzero(self._user_ids[: self._size] == uuid_key(user_id)))
+
+    def search(self, embedding, k: int, per_user: bool = True) -> list[FaceHit]:
+        """Top-k faces (or, with ``per_user``, each of the top-k users' best face)."""
+        query = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        return self.search_batch(query, k, per_user)[0]
+
+    def search_batch(self, embeddings, k: int, per_user: bool = True) -> list[list[FaceHit]]:
+        """Top-k hits for each row of an (N x dim) block of probes."""
+        results: list[list[FaceHit]] = []
+        for chunk in self.iter_search_batch(embeddings, k, per_user):
+            results.extend(chunk)
+        return results
+
+    def iter_search_batch(self, embeddings, k: int, per_user: bool = True, batch_size: Optional[int] = None):
+        """Yield per-probe hit lists chunk by chunk, one GEMM per chunk of probes.
+
+        Chunking bounds the (chunk x enrolled) score matrix and lets callers
+        stream results for large N.
+        """
+        queries, query_norms = self._prepare_queries(embeddings)
+        view = self._view()
+        n = len(view["_norms"])
+        batch_size = batch_size or settings.FACE_SEARCH_BATCH_SIZE
+        for start in range(0, queries.shape[0], batch_size):
+            block = queries[start : start + batch_size]
+            if n == 0 or k <= 0:
+                yield [[] for _ in range(block.shape[0])]
+                continue
+            scores = self._live_scores(block, view)
+            # Frames of one user cluster together, so shortlist a few per wanted
+            # user and widen only for probes whose shortlist covers too few users.
+            m = min(k * settings.FACE_SEARCH_CANDIDATE_FACTOR if per_user else k, n)
+            if m < n:
+                shortlist = np.argpartition(-scores, m - 1, axis=1)[:, :m]
+            else:
+                shortlist = np.broadcast_to(np.arange(n), (block.shape[0], n))
+            chunk = []
+            for i in range(block.shape[0]):
+                row_scores = scores[i]
+                candidates = shortlist[i]
+                while True:
+                    order = candidates[np.argsort(-row_scores[candidates], kind="stable")]
+                    hits = self._collect(order, row_scores, k, per_user, float(query_norms[start + i]), view)
+                    if len(hits) == k or len(candidates) == n:
+                        break
+                    m2 = min(2 * len(candidates), n)
+                    candidates = np.argpartition(-row_scores, m2 - 1)[:m2] if m2 < n else np.arange(n)
+                chunk.append(hits)
+            yield chunk
+
+    def stats(self) -> dict:
+        bytes_per_vector = self.dim * 4 + self._row_overhead_bytes()
+        return {
+            "method": "float32",
+            "size": self.size,
+            "bytes_per_vector": bytes_per_vector,
+            "memory_mb": round(self.size * bytes_per_vector / 2**20, 2),
+        }
+
+    def _row_overhead_bytes(self) -> int:
+        """Bytes per row besides the vector payload.
+
+        The columns hold a norm, face/user ids, a face type code and a deleted
+        flag. The face id -> row dict costs more than all of them together:
+        its share of the hash table, plus one bytes key and one int object per row.
+        """
+        rows = max(len(self._row_of), 1)
+        key_and_row = sys.getsizeof(bytes(UUID_DTYPE.itemsize)) + sys.getsizeof(1 << 30)
+        lookup = sys.getsizeof(self._row_of) / rows + key_and_row
+        return 4 + 2 * UUID_DTYPE.itemsize + 1 + 1 + round(lookup)
+
+    def match_users(self, embeddings, threshold: float, batch_size: Optional[int] = None) -> list[UserMatch]:
+        """Every user scoring at or above ``threshold`` against any of N probes, best first.
+
+        Scores one (batch x enrolled) GEMM per block of probes and folds the
+        hits into per-user best score and match counts with array ops only,
+        so cost per probe is the matrix multiply, not Python.
+        """
+        queries, _ = self._prepare_queries(embeddings)
+        with self._lock:
+            view = self._view()
+            generation = self.generation
+        n = len(view["_norms"])
+        if n == 0 or queries.shape[0] == 0:
+            return []
+        user_codes = self._user_codes(view, generation)
+        users = int(user_codes.max()) + 1
+        best = np.full(users, -np.inf, dtype=np.float32)
+        best_row = np.zeros(users, dtype=np.int64)
+        best_probe = np.zeros(users, dtype=np.int64)
+        matched = np.zeros(users, dtype=np.int64)
+        batch_size = batch_size or settings.FACE_SEARCH_BATCH_SIZE
+        for start in range(0, queries.shape[0], batch_size):
+            scores = self._live_scores(queries[start : start + batch_size], view)
+            probes, rows = np.nonzero(scores >= threshold)
+            if len(rows) == 0:
+                continue
+            hit_scores = scores[probes, rows]
+            hit_users = user_codes[rows]
+            # A probe counts once per user however many of their faces it matches
+            matched += np.bincount(np.unique(probes * users + hit_users) % users, minlength=users)
+            # Highest-scoring hit of each user in this block
+            order = np.lexsort((-hit_scores, hit_users))
+            first = order[np.flatnonzero(np.r_[True, np.diff(hit_users[order]) != 0])]
+            improved = first[hit_scores[first] > best[hit_users[first]]]
+            best[hit_users[improved]] = hit_scores[improved]
+            best_row[hit_users[improved]] = rows[improved]
+            best_probe[hit_users[improved]] = start + probes[improved]
+        found = np.flatnonzero(matched)
+        found = found[np.argsort(-best[found], kind="stable")]
+        names = list(self._face_type_names)
+        return [
+            UserMatch(
+                user_id=key_uuid(view["_user_ids"][best_row[u]]),
+                face_id=key_uuid(view["_face_ids"][best_row[u]]),
+                face_type=names[view["_face_types"][best_row[u]]],
+                score=float(best[u]),
+                probe=int(best_probe[u]),
+                probes_matched=int(matched[u]),
+            )
+            for u in found
+        ]
+
+    def _user_codes(self, view: dict[str, np.ndarray], generation: int) -> np.ndarray:
+        """Dense user number of every row, kept until the index next changes."""
+        cached = self._user_code_cache
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        _, codes = np.unique(view["_user_ids"].view("S16"), return_inverse=True)
+        self._user_code_cache = (generation, codes)
+        return codes
+
+    def _prepare_queries(self, embeddings) -> tuple[np.ndarray, np.ndarray]:
+        queries = np.asarray(embeddings, dtype=np.float32)
+        if queries.ndim != 2 or queries.shape[1] != self.dim:
+            raise ValueError(f"Embeddings must have shape (N, {self.dim})")
+        query_norms = np.linalg.norm(queries, axis=1)
+        return queries / np.where(query_norms > 0, query_norms, 1.0)[:, None], query_norms
+
+    def _view(self) -> dict[str, np.ndarray]:
+        """Consistent [:size] views of every column (and the deleted mask) for a lock-free scan."""
+        with self._lock:
+            view = {name: getattr(self, name)[: self._size] for name in self._columns}
+            view["_deleted"] = self._deleted[: self._size]
+            return view
+
+    def _score(self, queries: np.ndarray, view: dict[str, np.ndarray]) -> np.ndarray:
+        return queries @ view["_vectors"].T
+
+    def _live_scores(self, queries: np.ndarray, view: dict[str, np.ndarray]) -> np.ndarray:
+        """_score with removed rows at -inf, so they rank last and never pass a threshold."""
+        scores = self._score(queries, view)
+        if view["_deleted"].any():
+            scores[:, view["_deleted"]] = -np.inf
+        return scores
+
+    def _collect(self, order, scores, k, per_user, query_norm, view) -> list[FaceHit]:
+        hits: list[FaceHit] = []
+        seen = set()
+        for row in order:
+            score = float(scores[row])
+            if score == -np.inf:
+                break  # only removed rows from here on
+            if per_user:
+                user = view["_user_ids"][row].tobytes()
+                if user in seen:
+                    continue
+                seen.add(user)
+            hits.append(
+                FaceHit(
+                    face_id=key_uuid(view["_face_ids"][row]),
+                    user_id=key_uuid(view["_user_ids"][row]),
+                    face_type=self._face_type_names[view["_face_types"][row]],
+                    score=score,
+                    inner_product=score * float(view["_norms"][row]) * query_norm,
+                )
+            )
+            if len(hits) == k:
+                break
+        return hits
+
+    def _empty_column(self, name: str, capacity: int) -> np.ndarray:
+        if name == "_vectors":
+            return np.empty((capacity, self.dim), dtype=np.float32)
+        if name == "_norms":
+            return np.empty(capacity, dtype=np.float32)
+        if name == "_face_types":
+            return np.empty(capacity, dtype=np.uint8)
+        return np.empty(capacity, dtype=UUID_DTYPE)
+
+    def _store_vector(self, row: int, unit_vector: np.ndarray) -> None:
+        self._vectors[row] = unit_vector
+
+    def _store_vectors(self, start: int, end: int, unit_vectors: np.ndarray) -> None:
+        self._vectors[start:end] = unit_vectors
+
+    def _face_type_code(self, face_type: str) -> int:
+        try:
+            return self._face_type_names.index(face_type)
+        except ValueError:
+            self._face_type_names.append(face_type)
+            return len(self._face_type_names) - 1
+
+    def _reset(self, capacity: int) -> None:
+        self._size = 0
+        self._row_of: dict[bytes, int] = {}
+        for name in self._columns:
+            setattr(self, name, self._empty_column(name, capacity))
+        self._deleted = np.zeros(capacity, dtype=bool)
+        self._dead = 0
+
+    def _reserve(self, capacity: int) -> None:
+        current = self._norms.shape[0]
+        if capacity <= current:
+            return
+        capacity = max(capacity, 2 * current, 64)
+        n = self._size
+        for name in self._columns:
+            old = getattr(self, name)
+            new = self._empty_column(name, capacity)
+            new[:n] = old[:n]
+            setattr(self, name, new)
+        deleted = np.zeros(capacity, dtype=bool)
+        deleted[:n] = self._deleted[:n]
+        self._deleted = deleted
+
+    def _upsert(self, face_id, user_id, face_type: str, embedding, norm: Optional[float] = None) -> None:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        if vector.shape[0] != self.dim:
+            logger.warning(f"Skipping face {face_id}: embedding has {vector.shape[0]} dimensions")
+            return
+        key = uuid_key(face_id)
+        row = self._row_of.get(key.tobytes())
+        if row is None:
+            self._reserve(self._size + 1)
+            row = self._size
+            self._size += 1
+            self._row_of[key.tobytes()] = row
+        length = float(np.linalg.norm(vector))
+        self._store_vector(row, vector / length if length > 0 else vector)
+        self._norms[row] = norm if norm is not None else length
+        self._face_ids[row] = key
+        self._user_ids[row] = uuid_key(user_id)
+        self._face_types[row] = self._face_type_code(face_type)
+
+    def _append_arrays(self, chunk: FaceArrays) -> Optional[np.ndarray]:
+        """Append a block of new faces in one pass; returns their unit vectors."""
+        n = len(chunk.ids)
+        if n == 0:
+            return None
+        if chunk.embeddings.shape[1] != self.dim:
+            logger.warning(f"Skipping {n} faces: embeddings have {chunk.embeddings.shape[1]} dimensions")
+            return None
+        units = np.array(chunk.embeddings, dtype=np.float32)
+        lengths = np.linalg.norm(units, axis=1)
+        units /= np.where(lengths > 0, lengths, 1.0)[:, None]
+        start, end = self._size, self._size + n
+        self._reserve(end)
+        self._store_vectors(start, end, units)
+        self._norms[start:end] = chunk.norms
+        self._face_ids[start:end] = chunk.ids
+        self._user_ids[start:end] = chunk.user_ids
+        codes = np.array([self._face_type_code(name) for name in chunk.face_type_names], dtype=np.uint8)
+        self._face_types[start:end] = codes[chunk.face_types]
+        raw = np.ascontiguousarray(chunk.ids).tobytes()
+        self._row_of.update((raw[i * 16 : (i + 1) * 16], start + i) for i in range(n))
+        self._size = end
+        return units
+
+    def _tombstone(self, rows: np.ndarray) -> None:
+        """Remove rows from search by flagging them; the (possibly shared) columns are not written."""
+        rows = rows[~self._deleted[rows]]
+        if not len(rows):
+            return
+        self._deleted[rows] = True
+        self._dead += len(rows)
+        for key in self._face_ids[rows]:
+            self._row_of.pop(key.tobytes(), None)
+        self.generation += 1
+        # Past half dead, scanning them costs more than a private copy of the live rows
+        if 2 * self._dead > self._size:
+            self._compact(~self._deleted[: self._size])
+
+    def _compact(self, keep: np.ndarray) -> None:
+        # Copy into fresh arrays so searches holding the old views are unaffected
+        for name in self._columns:
+            setattr(self, name, np.ascontiguousarray(getattr(self, name)[: self._size][keep]))
+        self._size = int(keep.sum())
+        self._deleted = np.zeros(self._size, dtype=bool)
+        self._dead = 0
+        self._row_of = {self._face_ids[i].tobytes(): i for i in range(self._size)}
+        self.generation += 1
+
+
+# Process-wide index shared by the API and the face CRUD write paths
+face_index = FaceIndex(snapshot_dir=settings.FACE_INDEX_SNAPSHOT_DIR)
@@ -0,0 +1,105 @@
+import io
+import logging
+from typing import NamedTuple, Optional
+import numpy as np
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class FrameQuality(NamedTuple):
+    """How usable a face frame is for matching; every component is in [0, 1], higher is better."""
+    score: float  # geometric mean of the components below
+    sharpness: float
+    exposure: float
+    face_size: Optional[float]  # only when the client sent the face box
+    problems: list[str]
+
+
+def parse_box(value: Optional[str]) -> Optional[tuple[float, float, float, float]]:
+    """"x,y,width,height" in image pixels; None when not given. Raises ValueError when malformed."""
+    if not value:
+        return None
+    parts = [float(part) for part in value.split(",")]
+    if len(parts) != 4 or parts[2] <= 0 or parts[3] <= 0:
+        raise ValueError("face_box must be 'x,y,width,height' with a positive width and height")
+    return parts[0], parts[1], parts[2], parts[3]
+
+
+def load_gray(data: bytes, size: int = settings.FACE_QUALITY_SIZE) -> np.ndarray:
+    """Grayscale float32 copy of an encoded image with its short side near ``size``.
+
+    JPEGs are decoded straight to grayscale at a reduced DCT scale, so a
+    full-resolution phone frame costs a few milliseconds, not a full decode.
+    Raises ValueError for data that is not a readable image.
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.format == "JPEG":
+                image.draft("L", (size, size))
+            gray = image.convert("L")
+    except Exception as exc:
+        raise ValueError(f"not a readable image: {exc}") from exc
+    factor = min(gray.size) // size
+    if factor > 1:
+        gray = gray.reduce(factor)
+    return np.asarray(gray, dtype=np.float32)
+
+
+def laplacian_variance(gray: np.ndarray) -> float:
+    """Variance of the 4-neighbour Laplacian: low when edges are smeared by blur or defocus."""
+    if gray.shape[0] < 3 or gray.shape[1] < 3:
+        return 0.0
+    laplacian = (
+        gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:] - 4.0 * gray[1:-1, 1:-1]
+    )
+    return float(laplacian.var())
+
+
+def exposure_score(gray: np.ndarray) -> float:
+    """1 for a mid-grey, unclipped histogram; falls off with the mean's distance from mid-grey
+    and with the share of crushed shadows or blown highlights."""
+    histogram = np.bincount(gray.astype(np.uint8).ravel(), minlength=256)
+    total = histogram.sum()
+    if total == 0:
+        return 0.0
+    mean = float(histogram @ np.arange(256)) / total
+    clipped = float(histogram[:16].sum() + histogram[240:].sum()) / total
+    return float(max(0.0, 1.0 - ((mean - 127.5) / 127.5) ** 2) * (1.0 - clipped))
+
+
+def assess_frame(
+    data: bytes,
+    box: Optional[tuple[float, float, float, float]] = None,
+    min_score: float = settings.FACE_QUALITY_MIN_SCORE,
+) -> FrameQuality:
+    """Score an encoded frame's sharpness, exposure and (given its box) face size.
+
+    Raises ValueError when the data is not a readable image.
+    """
+    return assess_gray(load_gray(data), box, min_score)
+
+
+def assess_gray(
+    gray: np.ndarray,
+    box: Optional[tuple[float, float, float, float]] = None,
+    min_score: float = settings.FACE_QUALITY_MIN_SCORE,
+) -> FrameQuality:
+    """Score a grayscale copy already reduced to about FACE_QUALITY_SIZE pixels across."""
+    components = {
+        "blurry": min(1.0, laplacian_variance(gray) / settings.FACE_QUALITY_SHARPNESS_REF),
+        "badly exposed": exposure_score(gray),
+    }
+    if box is not None:
+        components["face too small"] = min(1.0, min(box[2], box[3]) / settings.FACE_QUALITY_MIN_FACE_PX)
+    values = np.array(list(components.values()))
+    score = float(np.exp(np.log(np.maximum(values, 1e-6)).mean()))
+    return FrameQuality(
+        score=round(score, 4),
+        sharpness=round(components["blurry"], 4),
+        exposure=round(components["badly exposed"], 4),
+        face_size=round(components["face too small"], 4) if box is not None else None,
+        problems=[problem for problem, value in components.items() if value < min_score],
+    )
@@ -0,0 +1,112 @@
+import logging
+import os
+from typing import Iterable, Optional
+from uuid import UUID
+import numpy as np
+from sqlmodel import Session
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def select_frames(
+    vectors,
+    quality,
+    keep: int = settings.FACE_RETENTION_PER_POSE,
+    min_distance: float = settings.FACE_RETENTION_MIN_DISTANCE,
+    pinned: Iterable[int] = (),
+) -> np.ndarray:
+    """Mask of the frames to keep out of one user's frames of one pose.
+
+    ``vectors`` are unit-length, ``quality`` scores them (higher is better;
+    tuples compare item by item).
+    Rows in ``pinned`` are always kept and count towards ``keep``. The rest
+    are taken best first, skipping any within ``min_distance`` cosine
+    distance of a frame already kept, until ``keep`` are kept. Ties keep the
+    earlier row, so callers list newer frames first to prefer them.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    mask = np.zeros(len(vectors), dtype=bool)
+    if keep <= 0 or len(vectors) == 0:
+        return mask
+    kept: list[int] = sorted(set(pinned))
+    # sorted() stays stable in reverse
+    order = sorted(range(len(vectors)), key=lambda i: quality[i], reverse=True)
+    for i in order:
+        if len(kept) >= keep:
+            break
+        if i in kept:
+            continue
+        if kept and float(np.max(vectors[kept] @ vectors[i])) > 1.0 - min_distance:
+            continue
+        kept.append(int(i))
+    mask[kept] = True
+    return mask
+
+
+def prune_user_frames(
+    session: Session,
+    user_id: UUID,
+    face_type: str,
+    model_version: Optional[str] = None,
+    keep: int = settings.FACE_RETENTION_PER_POSE,
+    min_distance: float = settings.FACE_RETENTION_MIN_DISTANCE,
+    dry_run: bool = False,
+    keep_ids: Iterable[UUID] = (),
+) -> list[UUID]:
+    """Keep a user's best ``keep`` distinct frames of one pose; returns the pruned face ids.
+
+    Frames rank by the quality measured at upload; frames stored before
+    quality gating rank after them, by their norm as uploaded. Faces in
+    ``keep_ids`` are never pruned. Pruned records are deleted (templates and
+    indexes follow) and their image files removed; ``keep`` <= 0 turns
+    retention off.
+    """
+    from app.crud import face as face_crud
+
+    if keep <= 0:
+        return []
+    rows = face_crud.get_pose_frames(session, user_id, face_type, model_version)
+    if len(rows) < 2:
+        return []
+    keep_ids = {UUID(str(face_id)) for face_id in keep_ids}
+    mask = select_frames(
+        [row.embedding for row in rows],
+        [
+            (row.quality_score is not None, row.quality_score or 0.0, row.embedding_norm or 0.0)
+            for row in rows
+        ],
+        keep,
+        min_distance,
+        pinned=[i for i, row in enumerate(rows) if row.id in keep_ids],
+    )
+    pruned = [row.id for row, kept in zip(rows, mask) if not kept]
+    if dry_run or not pruned:
+        return pruned
+    for path in face_crud.delete_faces(session, pruned):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            logger.warning(f"⚠️ Could not remove pruned face image {path}: {exc}")
+    logger.info(f"🧹 Pruned {len(pruned)} of {len(rows)} {face_type} frames of user {user_id}")
+    return pruned
+
+
+def prune_after_write(
+    session: Session, user_id: UUID, face_type: str, written: Iterable[UUID], model_version: Optional[str] = None
+) -> None:
+    """prune_user_frames for a write that is already committed: a failure is logged, never raised.
+
+    The ``written`` faces are kept, since their upload has already been
+    reported as stored (and queued for the duplicate check); they compete
+    with the rest from the next write on. Pruning must not turn the
+    enrollment into an error either; the next write or
+    ``face_retention.py`` retries.
+    """
+    try:
+        prune_user_frames(session, user_id, face_type, model_version, keep_ids=written)
+    except Exception as exc:
+        session.rollback()
+        logger.error(f"❌ Pruning {face_type} frames of user {user_id} failed: {exc}")
@@ -0,0 +1,270 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Optional
+from uuid import UUID, uuid4
+import numpy as np
+from sqlmodel import Session
+from app.core.config import settings
+from app.models.scan import SCAN_SOURCE_API, SCAN_SOURCE_FEED
+from app.services.embedding_versions import embedding_versions
+from app.services.embeddings import prepare_embeddings
+
+logger = logging.getLogger(__name__)
+
+# One single-threaded GEMM per core beats BLAS threads of every worker competing
+WORKER_ENV = {"OMP_NUM_THREADS": "1", "OPENBLAS_NUM_THREADS": "1", "MKL_NUM_THREADS": "1"}
+
+
+def save_frames(job_id: UUID, frames: np.ndarray, directory: str = settings.FACE_SCAN_DIR) -> str:
+    """Write a scan's unit-length frames where the workers will map them; returns the path."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{job_id}.npy")
+    with open(f"{path}.tmp", "wb") as f:
+        np.save(f, np.ascontiguousarray(frames, dtype=np.float32))
+    os.replace(f"{path}.tmp", path)
+    return path
+
+
+def submit_scan(
+    session: Session,
+    content_id: str,
+    frames: np.ndarray,
+    threshold: float = settings.FACE_SCAN_THRESHOLD,
+    model_version: Optional[str] = None,
+    submitted_by: Optional[UUID] = None,
+    source: str = SCAN_SOURCE_API,
+):
+    """Queue validated, unit-length frame embeddings of one media item; returns the ScanJob."""
+    from app.crud import scan as scan_crud
+
+    job_id = uuid4()
+    path = save_frames(job_id, frames)
+    try:
+        return scan_crud.create_job(
+            session,
+            job_id,
+            content_id,
+            frames=len(frames),
+            frames_path=path,
+            threshold=threshold,
+            model_version=model_version,
+            submitted_by=submitted_by,
+            source=source,
+        )
+    except Exception:
+        os.remove(path)
+        raise
+
+
+def run_scan(session: Session, job, batch_size: int = settings.FACE_SCAN_BATCH_FRAMES) -> int:
+    """Score a claimed job's frames against every enrolled user and record the matches.
+
+    Returns the number of users matched. A job whose frames cannot be read
+    or don't fit the model is marked failed instead.
+    """
+    from app.crud import scan as scan_crud
+
+    try:
+        model = embedding_versions.resolve(session, job.model_version)
+        index = embedding_versions.index_for(model)
+        index.ensure_loaded(session)
+        frames = np.load(job.frames_path, mmap_mode="r")
+        started = time.perf_counter()
+        found = index.match_users(frames, job.threshold, batch_size)
+        seconds = time.perf_counter() - started
+    except (OSError, ValueError) as exc:
+        logger.error(f"❌ Scan {job.id} ({job.content_id}) failed: {exc}")
+        scan_crud.fail_job(session, job.id, str(exc))
+        return 0
+    scan_crud.finish_job(
+        session,
+        job.id,
+        [
+            {
+                "user_id": match.user_id,
+                "face_id": match.face_id,
+                "score": match.score,
+                "best_frame": match.probe,
+                "frames_matched": match.probes_matched,
+            }
+            for match in found
+        ],
+        seconds,
+    )
+    del frames
+    try:
+        os.remove(job.frames_path)
+    except OSError as exc:
+        logger.warning(f"⚠️ Could not remove scanned frames {job.frames_path}: {exc}")
+    logger.info(
+        f"🎞️ Scan {job.id} ({job.content_id}): {job.frames} frames, {len(found)} users matched, "
+        f"{job.frames / max(seconds, 1e-9):,.0f} frames/s"
+    )
+    return len(found)
+
+
+def _worker_main(number: int, stop, poll_seconds: float) -> None:
+    """Scan worker process: claim queued jobs one at a time until stopped."""
+    from app.core.database import SessionLocal
+    from app.crud import scan as scan_crud
+    from app.services.face_changes import face_change_feed
+
+    # Enrollment changes reach this process's indexes like any API worker's
+    if settings.FACE_CHANGE_FEED_ENABLED:
+        face_change_feed.start()
+    while not stop.is_set():
+        try:
+            with SessionLocal() as session:
+                job = scan_crud.claim_next_job(session)
+                if job is not None:
+                    run_scan(session, job)
+                    continue
+        except Exception as exc:
+            logger.error(f"❌ Scan worker {number}: {exc}")
+        stop.wait(poll_seconds)
+    face_change_feed.stop()
+
+
+class ScanWorkerPool:
+    """Worker processes that drain the scan queue, one core each.
+
+    Jobs live in scan_jobs and are claimed with SKIP LOCKED, so pools in
+    several API workers (or a dedicated scan box running
+    face_scan_workers.py) share one queue. Every process keeps its own exact
+    index, mapped from the shared snapshot when one is configured, and
+    scores a job's frames in large blocks with single-threaded BLAS so the
+    processes scale with the cores. With ``feed_dir`` set, a thread queues
+    every ``<content_id>.npy`` file of frame embeddings dropped there.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.FACE_SCAN_WORKERS,
+        poll_seconds: float = settings.FACE_SCAN_POLL_SECONDS,
+        feed_dir: str = settings.FACE_SCAN_FEED_DIR,
+        stale_after: timedelta = timedelta(minutes=settings.FACE_SCAN_STALE_MINUTES),
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.poll_seconds = poll_seconds
+        self.feed_dir = feed_dir or None
+        self.stale_after = stale_after
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: list = []
+        self._stop = None
+        self._feed_stop = threading.Event()
+        self._feed_thread: Optional[threading.Thread] = None
+        self.fed = 0
+        self.rejected = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._processes)
+
+    def start(self) -> None:
+        from app.core.database import SessionLocal
+        from app.crud import scan as scan_crud
+
+        if self.running:
+            return
+        try:
+            with SessionLocal() as session:
+                requeued = scan_crud.requeue_stale_jobs(session, self.stale_after)
+            if requeued:
+                logger.warning(f"⚠️ Re-queued {requeued} scans left running by a stopped worker")
+        except Exception as exc:
+            logger.error(f"❌ Could not re-queue stale scans: {exc}")
+        self._stop = self._context.Event()
+        # Children copy the environment at start; BLAS reads it on import
+        saved = {key: os.environ.get(key) for key in WORKER_ENV}
+        os.environ.update(WORKER_ENV)
+        try:
+            for number in range(self.workers):
+                process = self._context.Process(
+                    target=_worker_main,
+                    args=(number, self._stop, self.poll_seconds),
+                    name=f"face-scan-{number}",
+                    daemon=True,
+                )
+                process.start()
+                self._processes.append(process)
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+        if self.feed_dir:
+            self._feed_stop.clear()
+            self._feed_thread = threading.Thread(target=self._run_feed, name="face-scan-feed", daemon=True)
+            self._feed_thread.start()
+        logger.info(f"🚀 Started {self.workers} scan workers" + (f", watching {self.feed_dir}" if self.feed_dir else ""))
+
+    def stop(self) -> None:
+        self._feed_stop.set()
+        if self._feed_thread is not None:
+            self._feed_thread.join(timeout=self.poll_seconds + 5)
+            self._feed_thread = None
+        if self._stop is not None:
+            self._stop.set()
+        processes, self._processes = self._processes, []
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+
+    def feed_once(self, session: Session) -> int:
+        """Queue every frame file in the feed directory; returns how many were queued.
+
+        Files that are not an (N x dim) array of valid embeddings are renamed
+        to ``*.rejected`` and left for inspection.
+        """
+        queued = 0
+        model = embedding_versions.current(session)
+        for path in sorted(Path(self.feed_dir).glob("*.npy")):
+            try:
+                frames = np.load(path)
+                if frames.ndim != 2 or not 0 < len(frames) <= settings.FACE_SCAN_MAX_FRAMES:
+                    raise ValueError(f"expected 1 to {settings.FACE_SCAN_MAX_FRAMES} frames of {model.dim} values")
+                units, _ = prepare_embeddings(frames, model.dim)
+            except (OSError, ValueError) as exc:
+                logger.warning(f"⚠️ Rejected scan feed file {path.name}: {exc}")
+                os.replace(path, path.with_suffix(".rejected"))
+                self.rejected += 1
+                continue
+            submit_scan(session, path.stem, units, model_version=model.version, source=SCAN_SOURCE_FEED)
+            os.remove(path)
+            queued += 1
+        self.fed += queued
+        return queued
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "workers_alive": sum(p.is_alive() for p in self._processes),
+            "feed_dir": self.feed_dir,
+            "fed": self.fed,
+            "rejected": self.rejected,
+        }
+
+    def _run_feed(self) -> None:
+        from app.core.database import SessionLocal
+
+        while not self._feed_stop.is_set():
+            try:
+                with SessionLocal() as session:
+                    queued = self.feed_once(session)
+                if queued:
+                    logger.info(f"📥 Queued {queued} scans from {self.feed_dir}")
+            except Exception as exc:
+                logger.error(f"❌ Scan feed failed: {exc}")
+            self._feed_stop.wait(self.poll_seconds)
+
+
+# Started with the app; its processes drain scan_jobs
+scan_worker_pool = ScanWorkerPool()
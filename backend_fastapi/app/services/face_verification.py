@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+from uuid import UUID
+import numpy as np
+from sqlmodel import Session
+from app.core.config import settings
+
+
+class UserFaces(NamedTuple):
+    """A user's enrolled frames, unit-length, one row per face."""
+    face_ids: list[UUID]
+    face_types: list[str]
+    vectors: np.ndarray  # (frames x dim) float32
+
+
+class VerifyResult(NamedTuple):
+    score: float  # best cosine similarity over the user's frames
+    face_id: UUID
+    face_type: str
+    frames: int
+
+
+class UserFaceCache:
+    """LRU cache of per-user normalized face vectors for 1:1 verification.
+
+    A hit is one small matrix-vector product; only misses go to the database.
+    Entries are dropped whenever this process changes the user's faces; the
+    TTL bounds how long a write made by another worker can go unseen. Each
+    entry holds one embedding model version; asking for another reloads it.
+    """
+
+    def __init__(self, capacity: int = settings.FACE_VERIFY_CACHE_SIZE, ttl: float = settings.FACE_VERIFY_CACHE_TTL):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # user_id -> (loaded_at, model_version, faces), least recently used first
+        self._entries: "OrderedDict[UUID, tuple[float, Optional[str], UserFaces]]" = OrderedDict()
+        # Bumped by invalidate(); a load that raced with a write is not cached
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session: Session, user_id: UUID, model_version: Optional[str] = None) -> UserFaces:
+        with self._lock:
+            cached = self._entries.get(user_id)
+            if cached is not None and cached[1] == model_version and time.monotonic() - cached[0] < self.ttl:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return cached[2]
+            self.misses += 1
+            epoch = self._epoch
+        loaded_at = time.monotonic()
+        entry = self._load(session, user_id, model_version)
+        with self._lock:
+            if self._epoch == epoch and self.capacity > 0:
+                self._entries[user_id] = (loaded_at, model_version, entry)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, user_id) -> None:
+        if not isinstance(user_id, UUID):
+            user_id = UUID(str(user_id))
+        with self._lock:
+            self._epoch += 1
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def verify(
+        self, session: Session, user_id: UUID, probe: np.ndarray, model_version: Optional[str] = None
+    ) -> Optional[VerifyResult]:
+        """Score a unit-length probe against the user's frames; None if none are enrolled.
+
+        ``model_version`` picks the embeddings the probe is comparable with
+        (None: the base version in face_data).
+        """
+        entry = self.get(session, user_id, model_version)
+        if not entry.face_ids:
+            return None
+        scores = entry.vectors @ probe
+        best = int(np.argmax(scores))
+        return VerifyResult(
+            score=float(scores[best]),
+            face_id=entry.face_ids[best],
+            face_type=entry.face_types[best],
+            frames=len(entry.face_ids),
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "capacity": self.capacity, "hits": self.hits, "misses": self.misses}
+
+    @staticmethod
+    def _load(session: Session, user_id: UUID, model_version: Optional[str] = None) -> UserFaces:
+        # Imported here: the face CRUD module invalidates this cache on writes
+        from app.crud import face as face_crud
+
+        if model_version is None:
+            rows = face_crud.get_user_embeddings(session, user_id)
+        else:
+            rows = face_crud.get_user_embeddings(session, user_id, model_version=model_version)
+        vectors = np.asarray([row.embedding for row in rows], dtype=np.float32)
+        if not rows:
+            vectors = np.empty((0, settings.FACE_EMBEDDING_DIM), dtype=np.float32)
+        return UserFaces(
+            face_ids=[row.id for row in rows],
+            face_types=[row.face_type for row in rows],
+            vectors=np.ascontiguousarray(vectors),
+        )
+
+
+# Process-wide cache shared by the verify endpoint and the face CRUD write paths
+user_face_cache = UserFaceCache()
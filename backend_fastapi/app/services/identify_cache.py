@@ -0,0 +1,129 @@
+import hashlib
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+import numpy as np
+from app.core.config import settings
+
+# Lookups try the probe's own code and every code with up to this many of its weakest bits flipped
+MAX_FLIPPED_BITS = 3
+
+
+class IdentifyKey(NamedTuple):
+    params: str  # digest of everything besides the probe that shapes the result
+    code: int  # SimHash of the probe; the bucket a fresh result is stored in
+    probe: np.ndarray  # unit probe, to confirm a near-duplicate on lookup
+    codes: tuple  # buckets to look in, nearest first
+
+
+class IdentifyCache:
+    """LRU/TTL cache of identify results keyed by a locality-sensitive hash of the probe.
+
+    The key is a ``bits``-bit SimHash: the signs of the unit probe's
+    projections on fixed random hyperplanes. Probes a few degrees apart
+    agree on most bits, and the bits they disagree on are the ones whose
+    projection is near zero, so a lookup also tries the codes with up to
+    MAX_FLIPPED_BITS of the probe's ``probe_bits`` weakest bits flipped. A
+    bucket only answers when its stored probe is within ``min_cosine`` of
+    the new one, so a re-encoded frame or a re-upload of the same face hits
+    while other faces that share a bucket do not. Every entry is tagged
+    with the enrollment generation it was computed at; ``bump()`` (on any
+    local write or change-feed apply) makes all older entries misses. The
+    TTL bounds staleness when the change feed is off.
+    """
+
+    def __init__(
+        self,
+        capacity: int = settings.FACE_IDENTIFY_CACHE_SIZE,
+        ttl: float = settings.FACE_IDENTIFY_CACHE_TTL,
+        bits: int = settings.FACE_IDENTIFY_CACHE_BITS,
+        probe_bits: int = settings.FACE_IDENTIFY_CACHE_PROBE_BITS,
+        min_cosine: float = settings.FACE_IDENTIFY_CACHE_MIN_COSINE,
+    ):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.bits = bits
+        self.probe_bits = min(probe_bits, bits)
+        self.min_cosine = min_cosine
+        self._lock = threading.Lock()
+        # (params, code) -> (stored_at, generation, probe, result), least recently used first
+        self._entries: "OrderedDict[tuple[str, int], tuple[float, int, np.ndarray, Any]]" = OrderedDict()
+        self._planes: dict[int, np.ndarray] = {}  # hyperplanes per probe dimension
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, probe: np.ndarray, *params) -> IdentifyKey:
+        """SimHash of the unit probe, plus a digest of whatever else shapes the result."""
+        probe = np.asarray(probe, dtype=np.float32).reshape(-1)
+        projections = self._hyperplanes(probe.shape[0]) @ probe
+        weights = 1 << np.arange(self.bits, dtype=np.int64)
+        code = int(weights[projections > 0].sum())
+        weakest = weights[np.argsort(np.abs(projections))[: self.probe_bits]].tolist()
+        codes = [code]
+        for flips in range(1, MAX_FLIPPED_BITS + 1):
+            codes.extend(code ^ sum(flipped) for flipped in itertools.combinations(weakest, flips))
+        return IdentifyKey(hashlib.sha1(repr(params).encode()).hexdigest(), code, probe, tuple(codes))
+
+    def get(self, key: IdentifyKey) -> tuple[Optional[Any], int]:
+        """(cached result for a near-duplicate probe or None, generation to store a fresh result under)."""
+        with self._lock:
+            generation = self.generation
+            now = time.monotonic()
+            for code in key.codes:
+                bucket = (key.params, code)
+                cached = self._entries.get(bucket)
+                if cached is None:
+                    continue
+                if cached[1] != generation or now - cached[0] >= self.ttl:
+                    del self._entries[bucket]
+                    continue
+                if float(cached[2] @ key.probe) >= self.min_cosine:
+                    self._entries.move_to_end(bucket)
+                    self.hits += 1
+                    return cached[3], generation
+            self.misses += 1
+            return None, generation
+
+    def put(self, key: IdentifyKey, generation: int, result: Any) -> None:
+        """Store a result computed at ``generation``; dropped if enrollment changed since."""
+        with self._lock:
+            if generation != self.generation or self.capacity <= 0:
+                return
+            bucket = (key.params, key.code)
+            self._entries[bucket] = (time.monotonic(), generation, key.probe, result)
+            self._entries.move_to_end(bucket)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def bump(self) -> None:
+        """Enrollment changed: every cached result is stale."""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def _hyperplanes(self, dim: int) -> np.ndarray:
+        planes = self._planes.get(dim)
+        if planes is None:
+            # Fixed seed: the same probe gets the same code in every worker and after a restart
+            planes = np.random.default_rng(dim).standard_normal((self.bits, dim)).astype(np.float32)
+            self._planes[dim] = planes
+        return planes
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "generation": self.generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+# Process-wide cache in front of /faces/identify; face writes and the change feed bump it
+identify_cache = IdentifyCache()
@@ -0,0 +1,129 @@
+"""PostgreSQL binary COPY tuples as NumPy structured arrays.
+
+Every column of a face row has a fixed width (uuid, int, float, vector(dim)),
+so one COPY tuple is a fixed-size record: a field count, then a length
+prefix and value per field, all big-endian. Describing that record as a
+structured dtype turns encoding a block of rows into one ``tobytes()``,
+and decoding a COPY ... TO STDOUT stream into one ``np.frombuffer``.
+"""
+import struct
+from typing import Iterable, Union
+import numpy as np
+
+COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+# Signature, flags (no OIDs) and an empty header extension
+COPY_HEADER = COPY_SIGNATURE + struct.pack(">ii", 0, 0)
+COPY_TRAILER = struct.pack(">h", -1)
+
+# Column kinds -> big-endian wire dtype of the value
+FIELD_DTYPES = {
+    "uuid": np.dtype("V16"),
+    "int2": np.dtype(">i2"),
+    "int4": np.dtype(">i4"),
+    "int8": np.dtype(">i8"),
+    "float4": np.dtype(">f4"),
+    "float8": np.dtype(">f8"),
+}
+
+
+def vector_field(dim: int) -> tuple[str, int]:
+    """Column kind of a pgvector ``vector(dim)``: int2 dim, int2 unused, dim x float4."""
+    return ("vector", dim)
+
+
+FieldKind = Union[str, tuple[str, int]]
+
+
+def tuple_dtype(fields: Iterable[tuple[str, FieldKind]]) -> np.dtype:
+    """Structured dtype of one COPY tuple with the given (name, kind) columns."""
+    fields = list(fields)
+    layout = [("_fields", ">i2")]
+    for name, kind in fields:
+        layout.append((f"_{name}_len", ">i4"))
+        if isinstance(kind, tuple) and kind[0] == "vector":
+            layout += [(f"_{name}_dim", ">i2"), (f"_{name}_unused", ">i2"), (name, ">f4", (kind[1],))]
+        else:
+            layout.append((name, FIELD_DTYPES[kind]))
+    return np.dtype(layout)
+
+
+def _value_fields(dtype: np.dtype) -> list[tuple[str, int, int]]:
+    """(name, wire length, vector dim or 0) of every column of a tuple dtype."""
+    fields = []
+    for name in dtype.names:
+        if name.startswith("_"):
+            continue
+        field = dtype.fields[name][0]
+        if field.subdtype is not None:
+            fields.append((name, 4 + 4 * field.shape[0], field.shape[0]))
+        else:
+            fields.append((name, field.itemsize, 0))
+    return fields
+
+
+def encode_tuples(dtype: np.dtype, columns: dict[str, np.ndarray]) -> bytes:
+    """Encode equally long column arrays as COPY tuple bytes (no header/trailer)."""
+    count = len(next(iter(columns.values())))
+    records = np.zeros(count, dtype=dtype)
+    fields = _value_fields(dtype)
+    records["_fields"] = len(fields)
+    for name, length, dim in fields:
+        records[f"_{name}_len"] = length
+        if dim:
+            records[f"_{name}_dim"] = dim
+        records[name] = columns[name]
+    return records.tobytes()
+
+
+def decode_tuples(dtype: np.dtype, data) -> np.ndarray:
+    """Zero-copy structured view of a complete binary COPY stream (header to trailer).
+
+    Raises ValueError when the stream is not made of ``dtype`` tuples: a
+    different column count, a NULL or a vector of another dimension.
+    """
+    view = memoryview(data)
+    if bytes(view[: len(COPY_SIGNATURE)]) != COPY_SIGNATURE:
+        raise ValueError("Not a binary COPY stream")
+    flags, extension = struct.unpack_from(">ii", view, len(COPY_SIGNATURE))
+    if flags & (1 << 16):
+        raise ValueError("COPY streams with OIDs are not supported")
+    start = len(COPY_SIGNATURE) + 8 + extension
+    end = len(view) - len(COPY_TRAILER)
+    if end < start or bytes(view[end:]) != COPY_TRAILER:
+        raise ValueError("Truncated binary COPY stream")
+    if (end - start) % dtype.itemsize:
+        raise ValueError(f"COPY data is not a whole number of {dtype.itemsize}-byte tuples")
+    records = np.frombuffer(view[start:end], dtype=dtype)
+    fields = _value_fields(dtype)
+    if (records["_fields"] != len(fields)).any():
+        raise ValueError(f"COPY tuples do not have {len(fields)} columns")
+    for name, length, dim in fields:
+        if (records[f"_{name}_len"] != length).any() or (dim and (records[f"_{name}_dim"] != dim).any()):
+            raise ValueError(f"COPY column {name} is NULL or not {length} bytes wide in some tuples")
+    return records
+
+
+class CopyBuffer:
+    """File-like target for ``cursor.copy_expert`` that fills one reusable buffer.
+
+    COPY output lands in a single bytearray that only grows when a stream
+    outgrows it, so decoding chunk after chunk allocates nothing per row.
+    """
+
+    def __init__(self, capacity: int = 0):
+        self._buffer = bytearray(capacity)
+        self.size = 0
+
+    def write(self, data) -> int:
+        end = self.size + len(data)
+        if end > len(self._buffer):
+            self._buffer.extend(bytes(max(end - len(self._buffer), len(self._buffer))))
+        self._buffer[self.size : end] = data
+        self.size = end
+        return len(data)
+
+    def getbuffer(self) -> memoryview:
+        return memoryview(self._buffer)[: self.size]
+
+    def clear(self) -> None:
+        self.size = 0
@@ -0,0 +1,282 @@
+import itertools
+import logging
+import time
+from datetime import datetime
+from typing import Iterable, Optional
+import numpy as np
+from sqlalchemy import func
+from sqlmodel import Session, select
+from app.core.config import settings
+from app.services.face_index import FaceArrays, FaceHit, FaceIndex, face_arrays_from_rows, key_uuid
+
+logger = logging.getLogger(__name__)
+
+# Rows decoded per block while scoring, bounds the float32 scratch buffer
+SCORE_BLOCK_ROWS = 65536
+# Rows encoded per bulk append when loading from a flat row iterable
+LOAD_CHUNK_ROWS = 5000
+
+
+class ScalarQuantizer:
+    """Per-dimension affine int8 codes: 1 byte per dimension."""
+
+    code_dtype = np.int8
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.code_size = dim
+        # Untrained default covers the [-1, 1] range of unit-vector components
+        self.offset = np.full(dim, -1.0, dtype=np.float32)
+        self.scale = np.full(dim, 2.0 / 255.0, dtype=np.float32)
+
+    def train(self, sample: np.ndarray) -> None:
+        lo = sample.min(axis=0)
+        hi = sample.max(axis=0)
+        self.offset = lo.astype(np.float32)
+        self.scale = np.maximum((hi - lo) / 255.0, 1e-12).astype(np.float32)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        levels = np.rint((vectors - self.offset) / self.scale)
+        return (np.clip(levels, 0, 255) - 128).astype(np.int8)
+
+    def score(self, codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """Approximate inner products of (b x dim) queries against all codes."""
+        scaled = (queries * self.scale).astype(np.float32)
+        bias = queries @ (self.offset + 128.0 * self.scale)
+        out = np.empty((queries.shape[0], codes.shape[0]), dtype=np.float32)
+        for start in range(0, codes.shape[0], SCORE_BLOCK_ROWS):
+            block = codes[start : start + SCORE_BLOCK_ROWS].astype(np.float32)
+            out[:, start : start + block.shape[0]] = scaled @ block.T
+        return out + bias[:, None]
+
+
+class ProductQuantizer:
+    """Product quantization: one uint8 centroid id per sub-vector."""
+
+    code_dtype = np.uint8
+
+    def __init__(self, dim: int, subvectors: int, iterations: int = 10):
+        if dim % subvectors:
+            raise ValueError(f"Embedding dim {dim} is not divisible by {subvectors} sub-vectors")
+        self.dim = dim
+        self.code_size = subvectors
+        self.dsub = dim // subvectors
+        self.iterations = iterations
+        self.centroids: Optional[np.ndarray] = None  # (subvectors, ksub, dsub)
+
+    def train(self, sample: np.ndarray) -> None:
+        rng = np.random.default_rng(0)
+        ksub = min(256, sample.shape[0])
+        self.centroids = np.empty((self.code_size, ksub, self.dsub), dtype=np.float32)
+        for j in range(self.code_size):
+            part = sample[:, j * self.dsub : (j + 1) * self.dsub]
+            self.centroids[j] = _kmeans(part, ksub, self.iterations, rng)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.empty((vectors.shape[0], self.code_size), dtype=np.uint8)
+        for j in range(self.code_size):
+            part = vectors[:, j * self.dsub : (j + 1) * self.dsub]
+            centroids = self.centroids[j]
+            distances = (centroids ** 2).sum(axis=1) - 2.0 * part @ centroids.T
+            codes[:, j] = distances.argmin(axis=1)
+        return codes
+
+    def score(self, codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """Asymmetric distance computation: per-query lookup tables summed over sub-vectors."""
+        parts = queries.reshape(queries.shape[0], self.code_size, self.dsub)
+        tables = np.einsum("bmd,mkd->bmk", parts, self.centroids)
+        out = np.zeros((queries.shape[0], codes.shape[0]), dtype=np.float32)
+        for j in range(self.code_size):
+            out += tables[:, j, codes[:, j]]
+        return out
+
+
+def _kmeans(points: np.ndarray, k: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    centroids = points[rng.choice(points.shape[0], k, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        distances = (centroids ** 2).sum(axis=1) - 2.0 * points @ centroids.T
+        assign = distances.argmin(axis=1)
+        counts = np.bincount(assign, minlength=k)
+        filled = counts > 0
+        for d in range(points.shape[1]):
+            sums = np.bincount(assign, weights=points[:, d], minlength=k)
+            centroids[filled, d] = sums[filled] / counts[filled]
+    return centroids
+
+
+def _unit_vectors(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def make_quantizer(method: str, dim: int):
+    if method == "int8":
+        return ScalarQuantizer(dim)
+    if method == "pq":
+        return ProductQuantizer(dim, settings.FACE_PQ_SUBVECTORS)
+    raise ValueError(f"Unknown quantization method '{method}'")
+
+
+class QuantizedFaceIndex(FaceIndex):
+    """Face index holding compressed codes, with exact re-ranking from face_data.
+
+    Search scores every code approximately, keeps a shortlist of
+    ``top_k * rerank_factor`` faces, then re-scores that shortlist against the
+    full-precision embeddings fetched from the database.
+    """
+
+    _columns = ("_codes", "_norms", "_face_ids", "_user_ids", "_face_types")
+
+    def __init__(
+        self,
+        dim: int = settings.FACE_EMBEDDING_DIM,
+        method: str = settings.FACE_INDEX_QUANTIZATION,
+        rerank_factor: int = settings.FACE_RERANK_FACTOR,
+    ):
+        self.method = method
+        self.quantizer = make_quantizer(method, dim)
+        self.rerank_factor = rerank_factor
+        self.recall: dict = {}
+        self.build_seconds: Optional[float] = None
+        super().__init__(dim)
+
+    def load(self, session: Session) -> None:
+        """Stream face_data once: train on the first rows, then encode every chunk."""
+        from app.crud import face as face_crud
+
+        watermark = session.exec(select(func.now())).one()
+        self.load_chunks(face_crud.iter_face_arrays(session, dim=self.dim), watermark)
+
+    def load_rows(self, rows: Iterable, watermark: Optional[datetime] = None) -> None:
+        rows = iter(rows)
+        chunks = iter(lambda: list(itertools.islice(rows, LOAD_CHUNK_ROWS)), [])
+        self.load_chunks(
+            (face_arrays_from_rows([r for r in chunk if len(r.embedding) == self.dim]) for chunk in chunks), watermark
+        )
+
+    def load_chunks(self, chunks: Iterable[FaceArrays], watermark: Optional[datetime] = None) -> None:
+        """Train on the first rows, then encode every FaceArrays block."""
+        started = time.perf_counter()
+        eval_k = settings.FACE_RECALL_EVAL_K
+        with self._lock:
+            self._reset(0)
+            self.recall = {}
+            chunks = (c for c in chunks if len(c.ids) and c.embeddings.shape[1] == self.dim)
+            # Buffer blocks until there are enough rows to train the quantizer
+            buffered = []
+            for chunk in chunks:
+                buffered.append(chunk)
+                if sum(len(c.ids) for c in buffered) >= settings.FACE_QUANTIZER_TRAIN_SIZE:
+                    break
+            queries = self._train(buffered) if buffered else None
+            truth = None
+            for chunk in itertools.chain(buffered, chunks):
+                first_row = self._size
+                vectors = self._append_arrays(chunk)
+                truth = self._merge_truth(vectors, first_row, queries, truth, eval_k)
+            self._watermark = watermark
+            self._loaded = True
+            self.generation += 1
+            self.build_seconds = time.perf_counter() - started
+            if truth is not None and self._size > eval_k:
+                self.recall = self._estimate_recall(queries, truth[1], eval_k)
+        logger.info(f"✓ Quantized face index ({self.method}) loaded: {self._size} embeddings, recall {self.recall}")
+
+    def search(self, embedding, k: int, per_user: bool = True, session: Optional[Session] = None) -> list[FaceHit]:
+        """Approximate top-k, re-ranked at full precision when a session is given."""
+        if session is None:
+            return super().search(embedding, k, per_user)
+        from app.crud import face as face_crud
+
+        queries, query_norms = self._prepare_queries(np.asarray(embedding, dtype=np.float32).reshape(1, -1))
+        view = self._view()
+        n = len(view["_norms"])
+        if n == 0 or k <= 0:
+            return []
+        approx = self._live_scores(queries, view)[0]
+        m = min(k * (settings.FACE_SEARCH_CANDIDATE_FACTOR if per_user else 1) * self.rerank_factor, n)
+        shortlist = np.argpartition(-approx, m - 1)[:m] if m < n else np.arange(n)
+        sub = {name: column[shortlist] for name, column in view.items()}
+        face_ids = [key_uuid(key) for key in sub["_face_ids"]]
+        full = face_crud.get_face_embeddings(session, face_ids)
+        exact = np.full(m, -np.inf, dtype=np.float32)
+        for i, face_id in enumerate(face_ids):
+            vector = None if sub["_deleted"][i] else full.get(face_id)
+            if vector is not None:  # skip rows removed from the index or deleted since they were indexed
+                vector = np.asarray(vector, dtype=np.float32)
+                norm = float(np.linalg.norm(vector))
+                exact[i] = vector @ queries[0] / norm if norm > 0 else 0.0
+        order = np.argsort(-exact, kind="stable")
+        order = order[np.isfinite(exact[order])]
+        return self._collect(order, exact, k, per_user, float(query_norms[0]), sub)
+
+    def stats(self) -> dict:
+        overhead = self._row_overhead_bytes()
+        code_bytes = self.quantizer.code_size * np.dtype(self.quantizer.code_dtype).itemsize
+        return {
+            "method": self.method,
+            "size": self.size,
+            "bytes_per_vector": code_bytes + overhead,
+            "float32_bytes_per_vector": self.dim * 4 + overhead,
+            "memory_mb": round(self.size * (code_bytes + overhead) / 2**20, 2),
+            "rerank_factor": self.rerank_factor,
+            "build_seconds": self.build_seconds,
+            **self.recall,
+        }
+
+    def _empty_column(self, name: str, capacity: int) -> np.ndarray:
+        if name == "_codes":
+            return np.empty((capacity, self.quantizer.code_size), dtype=self.quantizer.code_dtype)
+        return super()._empty_column(name, capacity)
+
+    def _store_vector(self, row: int, unit_vector: np.ndarray) -> None:
+        self._codes[row] = self.quantizer.encode(unit_vector[None, :])[0]
+
+    def _score(self, queries: np.ndarray, view: dict[str, np.ndarray]) -> np.ndarray:
+        return self.quantizer.score(view["_codes"], queries)
+
+    def _store_vectors(self, start: int, end: int, unit_vectors: np.ndarray) -> None:
+        self._codes[start:end] = self.quantizer.encode(unit_vectors)
+
+    def _train(self, chunks: list[FaceArrays]) -> np.ndarray:
+        vectors = _unit_vectors(np.concatenate([c.embeddings for c in chunks]))
+        self.quantizer.train(vectors)
+        # The first rows double as recall probes; ground truth is gathered while streaming
+        return vectors[: settings.FACE_RECALL_EVAL_QUERIES]
+
+    def _merge_truth(self, vectors, first_row, queries, truth, k):
+        """Fold one chunk into the running exact top-k (scores, rows) of every recall probe."""
+        scores = queries @ vectors.T
+        row_ids = np.broadcast_to(np.arange(first_row, first_row + len(vectors)), scores.shape)
+        # A probe is an enrolled face itself; exclude the trivial self-match
+        scores[row_ids == np.arange(queries.shape[0])[:, None]] = -np.inf
+        if truth is not None:
+            scores = np.concatenate([truth[0], scores], axis=1)
+            row_ids = np.concatenate([truth[1], row_ids], axis=1)
+        keep = min(k, scores.shape[1])
+        top = np.argpartition(-scores, keep - 1, axis=1)[:, :keep]
+        return np.take_along_axis(scores, top, 1), np.take_along_axis(row_ids, top, 1)
+
+    def _estimate_recall(self, queries, truth_rows, k) -> dict:
+        view = self._view()
+        approx = self._score(queries, view)
+        approx[np.arange(queries.shape[0]), np.arange(queries.shape[0])] = -np.inf
+        # The shortlist search() re-ranks for an identify (per_user=True), so the figure describes that path
+        shortlist_size = min(k * settings.FACE_SEARCH_CANDIDATE_FACTOR * self.rerank_factor, approx.shape[1])
+        approx_top = np.argpartition(-approx, k - 1, axis=1)[:, :k]
+        shortlist = np.argpartition(-approx, shortlist_size - 1, axis=1)[:, :shortlist_size]
+        approx_hits = sum(len(set(a) & set(t)) for a, t in zip(approx_top, truth_rows))
+        # Re-ranking is exact within the shortlist, so its recall is shortlist coverage
+        rerank_hits = sum(len(set(s) & set(t)) for s, t in zip(shortlist, truth_rows))
+        total = truth_rows.size
+        return {
+            "recall_k": k,
+            "recall_probes": int(queries.shape[0]),
+            "approx_recall_at_k": round(approx_hits / total, 4),
+            "recall_at_k": round(rerank_hits / total, 4),
+        }
+
+
+# Compressed counterpart of face_index, used by backend="quantized"
+quantized_face_index = QuantizedFaceIndex()
@@ -0,0 +1,166 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+from uuid import UUID
+import numpy as np
+from sqlmodel import Session
+from app.core.config import settings
+from app.models.embedding_model import MODEL_ACTIVE, MODEL_BACKFILLING
+from app.services.embeddings import InvalidEmbeddingError, prepare_embedding
+
+logger = logging.getLogger(__name__)
+
+# Image file paths -> (n x dim) embeddings under one model version
+Embedder = Callable[[list[str]], np.ndarray]
+
+
+@dataclass
+class BackfillState:
+    cursor: Optional[UUID] = None  # last face id of the current pass
+    written: int = 0
+    failed: int = 0
+    failed_in_pass: int = 0
+    retry_at: float = 0.0
+    completed_at: Optional[float] = None
+
+
+class ReembeddingJob:
+    """Backfills embeddings for newer model versions from the stored face images.
+
+    Each step re-embeds one batch of faces that have no embedding under a
+    backfilling version, writes it in its own short transaction and then
+    sleeps, so uploads and searches are never starved. Queries keep using
+    the active version meanwhile; once a pass over face_data finds nothing
+    missing, the version is activated (workers pick it up on their next
+    refresh). Active versions stay in the loop, so faces uploaded with an
+    older model's embedding around the cutover are re-embedded too.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.FACE_REEMBED_BATCH_SIZE,
+        pause_seconds: float = settings.FACE_REEMBED_PAUSE_SECONDS,
+        retry_seconds: float = settings.FACE_REEMBED_RETRY_SECONDS,
+    ):
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.retry_seconds = retry_seconds
+        self.embedders: dict[str, Embedder] = {}
+        self.state: dict[str, BackfillState] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register_embedder(self, version: str, embedder: Embedder) -> None:
+        """Make ``version`` backfillable; without an embedder it is left alone."""
+        self.embedders[version] = embedder
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="face-reembedding", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    def run_once(self, session: Session) -> int:
+        """One batch for every version that needs it; returns faces processed."""
+        from app.crud import embedding_model as model_crud
+
+        processed = 0
+        for model in model_crud.get_models(session):
+            if (
+                model.status in (MODEL_BACKFILLING, MODEL_ACTIVE)
+                and model.version in self.embedders
+                and not model_crud.is_base_version(model.version)
+            ):
+                processed += self._step(session, model)
+        return processed
+
+    def stats(self) -> dict:
+        return {
+            version: {"written": state.written, "failed": state.failed, "complete": state.completed_at is not None}
+            for version, state in self.state.items()
+        }
+
+    def _step(self, session: Session, model) -> int:
+        from app.crud import embedding_model as model_crud
+
+        state = self.state.setdefault(model.version, BackfillState())
+        if time.monotonic() < state.retry_at:
+            return 0
+        rows = model_crud.get_faces_missing_embedding(session, model.version, state.cursor, self.batch_size)
+        if not rows:
+            if state.cursor is None:
+                # A whole pass from the start found nothing missing: full coverage
+                if state.completed_at is None:
+                    state.completed_at = time.monotonic()
+                if model.status == MODEL_BACKFILLING:
+                    model_crud.activate_model(session, model.version)
+                    logger.info(f"✅ Embedding model {model.version} fully backfilled and activated")
+                return 0
+            # End of a pass; faces that failed in it are retried after a while
+            state.cursor = None
+            if state.failed_in_pass:
+                state.retry_at = time.monotonic() + self.retry_seconds
+                state.failed_in_pass = 0
+            return 0
+        state.cursor = rows[-1].id
+        state.completed_at = None
+        face_ids, units, norms = [], [], []
+        for row, vector in zip(rows, self._embed(model.version, [row.file_path for row in rows])):
+            try:
+                if vector is None:
+                    raise InvalidEmbeddingError("image could not be embedded")
+                unit, norm = prepare_embedding(vector, model.dim)
+            except InvalidEmbeddingError as exc:
+                state.failed += 1
+                state.failed_in_pass += 1
+                logger.warning(f"⚠️ Face {row.id} not re-embedded for {model.version}: {exc}")
+                continue
+            face_ids.append(row.id)
+            units.append(unit)
+            norms.append(norm)
+        model_crud.upsert_face_embeddings(session, model.version, face_ids, units, norms)
+        session.commit()
+        state.written += len(face_ids)
+        return len(rows)
+
+    def _embed(self, version: str, paths: list[str]) -> list:
+        """Embed a batch; if it fails as a whole, one by one so a bad image only loses itself."""
+        embedder = self.embedders[version]
+        try:
+            return list(embedder(paths))
+        except Exception as exc:
+            logger.warning(f"⚠️ Batch embedding for {version} failed ({exc}); retrying per image")
+        vectors = []
+        for path in paths:
+            try:
+                vectors.append(embedder([path])[0])
+            except Exception:
+                vectors.append(None)
+        return vectors
+
+    def _run(self) -> None:
+        from app.core.database import SessionLocal
+
+        while not self._stop.is_set():
+            processed = 0
+            if self.embedders:
+                try:
+                    with SessionLocal() as session:
+                        processed = self.run_once(session)
+                except Exception as exc:
+                    logger.error(f"❌ Re-embedding step failed: {exc}")
+            # Busy: a short pause between batches; idle: check back now and then
+            self._stop.wait(self.pause_seconds if processed else max(self.pause_seconds, 30.0))
+
+
+# Started with the app; idles until an embedder is registered for a version
+reembedding_job = ReembeddingJob()
@@ -0,0 +1,314 @@
+import heapq
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from typing import NamedTuple, Optional
+from uuid import UUID
+import numpy as np
+from sqlalchemy import func
+from sqlmodel import Session, select
+from app.core.config import settings
+from app.services.face_index import FaceHit, FaceIndex
+
+logger = logging.getLogger(__name__)
+
+
+def shard_of(user_id, shards: int) -> int:
+    """Shard owning a user: low 32 bits of the UUID modulo the shard count.
+
+    Matches the SQL filter in crud.face.iter_face_arrays so a worker can
+    load its shard without reading anyone else's rows.
+    """
+    if not isinstance(user_id, UUID):
+        user_id = UUID(str(user_id))
+    return (user_id.int & 0xFFFFFFFF) % shards
+
+
+class ShardedHits(NamedTuple):
+    hits: list[list[FaceHit]]  # per probe, best first
+    failed_shards: int  # shards that missed the deadline, died or are still loading
+
+
+def _shard_main(conn, shard: int, shards: int, dim: int) -> None:
+    """Search worker process: load one shard, then serve requests from the pipe."""
+    from app.core.database import SessionLocal
+    from app.crud import face as face_crud
+
+    index = FaceIndex(dim=dim)
+    with SessionLocal() as session:
+        watermark = session.exec(select(func.now())).one()
+        index.load_arrays(face_crud.iter_face_arrays(session, dim=dim, shard=(shard, shards)), watermark)
+    conn.send(("ready", index.size))
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        kind = message[0]
+        if kind == "search":
+            _, request_id, queries, k, per_user = message
+            try:
+                conn.send((request_id, index.search_batch(queries, k, per_user)))
+            except Exception as exc:
+                conn.send((request_id, RuntimeError(f"Shard {shard} search failed: {exc}")))
+        elif kind == "stats":
+            conn.send((message[1], index.stats()))
+        elif kind == "add":
+            index.add(*message[1:])
+        elif kind == "remove_faces":
+            index.remove_faces(message[1])
+        elif kind == "remove_user":
+            index.remove_user(message[1])
+        elif kind == "stop":
+            return
+
+
+class _Shard:
+    """Coordinator-side handle of one worker process and its pipe."""
+
+    def __init__(
+        self, context, number: int, shards: int, dim: int, on_reply, on_exit,
+        write_buffer: int = settings.FACE_SHARD_WRITE_BUFFER,
+    ):
+        self.number = number
+        parent, child = context.Pipe()
+        self.process = context.Process(
+            target=_shard_main, args=(child, number, shards, dim), name=f"face-shard-{number}", daemon=True
+        )
+        self.process.start()
+        child.close()
+        self.conn = parent
+        self.size = 0
+        self.ready = threading.Event()
+        self.alive = True
+        self._send_lock = threading.Lock()
+        self._on_reply = on_reply
+        self._on_exit = on_exit
+        self._writes: queue.Queue = queue.Queue(maxsize=write_buffer)
+        self._overflowed = False
+        threading.Thread(target=self._read, name=f"face-shard-{number}-reader", daemon=True).start()
+        threading.Thread(target=self._write, name=f"face-shard-{number}-writer", daemon=True).start()
+
+    def send(self, message) -> bool:
+        if not self.alive:
+            return False
+        try:
+            with self._send_lock:
+                self.conn.send(message)
+            return True
+        except (OSError, ValueError):
+            self.alive = False
+            return False
+
+    def write(self, message) -> None:
+        """Queue an index update for the shard without blocking the caller.
+
+        Updates are held here while the shard is still loading (it only reads
+        its pipe afterwards) and sent in order by the writer thread once it is
+        ready; replaying ones the load already saw is harmless. When the
+        buffer is full the shard is restarted instead, since a fresh load
+        reads every committed write from the database.
+        """
+        if not self.alive or self._overflowed:
+            return
+        try:
+            self._writes.put_nowait(message)
+        except queue.Full:
+            self._overflowed = True
+            logger.warning(f"⚠️ Face shard {self.number} is {self._writes.maxsize} updates behind; reloading it")
+            self.process.terminate()
+
+    def _write(self) -> None:
+        while self.alive:
+            try:
+                message = self._writes.get(timeout=1)
+            except queue.Empty:
+                continue
+            while not self.ready.wait(timeout=1):
+                if not self.alive:
+                    return
+            if not self.send(message):
+                return
+
+    def _read(self) -> None:
+        while True:
+            try:
+                request_id, payload = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            if request_id == "ready":
+                self.size = payload
+                self.ready.set()
+                logger.info(f"✓ Face shard {self.number} ready: {payload} embeddings")
+            else:
+                self._on_reply(request_id, self.number, payload)
+        self.alive = False
+        self._on_exit(self)
+
+
+class ShardedFaceIndex:
+    """Scatter-gather exact search over face shards held by worker processes.
+
+    Users are partitioned by :func:`shard_of`, so every shard answers with
+    its own per-user top-k and the coordinator only merges k-best lists.
+    Each query is sent to all shards at once and waits at most ``timeout``;
+    shards that are slow, dead (restarted in the background) or still
+    loading are left out and counted in ``failed_shards``. Shards are whole
+    processes, so scoring runs on as many cores as there are shards.
+    """
+
+    def __init__(
+        self,
+        dim: int = settings.FACE_EMBEDDING_DIM,
+        shards: int = settings.FACE_SEARCH_SHARDS,
+        timeout: float = settings.FACE_SHARD_TIMEOUT_SECONDS,
+    ):
+        self.dim = dim
+        self.shards = shards or os.cpu_count() or 1
+        self.timeout = timeout
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._workers: list[_Shard] = []
+        self._pending: dict[tuple[int, int], Future] = {}
+        self._request_ids = itertools.count()
+        self._watermark: Optional[datetime] = None
+        self._stopping = False
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._workers)
+
+    @property
+    def watermark(self) -> Optional[datetime]:
+        return self._watermark
+
+    def ensure_loaded(self, session: Session) -> None:
+        """Start the worker processes; each loads its shard in the background."""
+        if self._workers:
+            return
+        with self._lock:
+            if self._workers:
+                return
+            self._stopping = False
+            self._watermark = session.exec(select(func.now())).one()
+            self._workers = [self._spawn(number) for number in range(self.shards)]
+        logger.info(f"🚀 Started {self.shards} face search shards")
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stopping = True
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.send(("stop",))
+        for worker in workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+    def add(self, face_id, user_id, face_type: str, embedding, norm: Optional[float] = None) -> None:
+        if self._workers:
+            vector = np.asarray(embedding, dtype=np.float32)
+            self._worker_of(user_id).write(("add", face_id, user_id, face_type, vector, norm))
+
+    def remove_faces(self, face_ids) -> None:
+        # The owning shards are unknown from face ids alone, so tell everyone
+        face_ids = list(face_ids)
+        for worker in self._workers:
+            worker.write(("remove_faces", face_ids))
+
+    def remove_user(self, user_id) -> None:
+        if self._workers:
+            self._worker_of(user_id).write(("remove_user", user_id))
+
+    def search(self, embedding, k: int, per_user: bool = True) -> tuple[list[FaceHit], int]:
+        """Top-k hits for one probe plus the number of shards missing from them."""
+        result = self.search_batch(np.asarray(embedding, dtype=np.float32).reshape(1, -1), k, per_user)
+        return result.hits[0], result.failed_shards
+
+    def search_batch(self, embeddings, k: int, per_user: bool = True) -> ShardedHits:
+        queries = np.ascontiguousarray(embeddings, dtype=np.float32)
+        replies = self._scatter(("search", queries, k, per_user))
+        merged = [
+            heapq.nlargest(k, itertools.chain.from_iterable(reply[i] for reply in replies.values()), key=_score)
+            for i in range(queries.shape[0])
+        ]
+        return ShardedHits(hits=merged, failed_shards=self.shards - len(replies))
+
+    def stats(self) -> dict:
+        replies = self._scatter(("stats",))
+        size = sum(reply["size"] for reply in replies.values())
+        # Each shard measures its own row overhead (the id -> row dict depends on its size)
+        total_bytes = sum(reply["size"] * reply["bytes_per_vector"] for reply in replies.values())
+        return {
+            "method": "sharded",
+            "size": size,
+            "bytes_per_vector": round(total_bytes / size) if size else self.dim * 4,
+            "memory_mb": round(total_bytes / 2**20, 2),
+            "shards": self.shards,
+            "shards_ready": len(replies),
+        }
+
+    def _scatter(self, message: tuple) -> dict[int, object]:
+        """Send a request to every ready shard; replies that beat the deadline, by shard."""
+        request_id = next(self._request_ids)
+        futures: dict[int, Future] = {}
+        for worker in list(self._workers):
+            if not worker.ready.is_set():
+                continue
+            future = Future()
+            self._pending[(request_id, worker.number)] = future
+            if worker.send((message[0], request_id) + message[1:]):
+                futures[worker.number] = future
+            else:
+                self._pending.pop((request_id, worker.number), None)
+        deadline = time.monotonic() + self.timeout
+        replies: dict[int, object] = {}
+        for number, future in futures.items():
+            try:
+                reply = future.result(timeout=max(deadline - time.monotonic(), 0))
+                if isinstance(reply, Exception):
+                    raise reply
+                replies[number] = reply
+            except Exception as exc:
+                logger.warning(f"⚠️ Face shard {number} left out: {str(exc) or 'timed out'}")
+            finally:
+                self._pending.pop((request_id, number), None)
+        return replies
+
+    def _on_reply(self, request_id: int, number: int, payload) -> None:
+        future = self._pending.get((request_id, number))
+        if future is not None and not future.done():
+            future.set_result(payload)
+
+    def _on_exit(self, worker: _Shard) -> None:
+        for key, future in list(self._pending.items()):
+            if key[1] == worker.number and not future.done():
+                future.set_exception(RuntimeError("shard process exited"))
+        if self._stopping:
+            return
+        logger.error(f"❌ Face shard {worker.number} exited (code {worker.process.exitcode}); restarting")
+        # Back off so a shard that cannot load (e.g. database down) doesn't spin
+        time.sleep(1)
+        with self._lock:
+            if not self._stopping and worker in self._workers:
+                self._workers[self._workers.index(worker)] = self._spawn(worker.number)
+
+    def _spawn(self, number: int) -> _Shard:
+        return _Shard(self._context, number, self.shards, self.dim, self._on_reply, self._on_exit)
+
+    def _worker_of(self, user_id) -> _Shard:
+        return self._workers[shard_of(user_id, self.shards)]
+
+
+def _score(hit: FaceHit) -> float:
+    return hit.score
+
+
+# Started on first use of the "sharded" search backend
+sharded_face_index = ShardedFaceIndex()
@@ -0,0 +1,216 @@
+import bisect
+import io
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional
+import numpy as np
+from app.core.config import settings
+from app.services.face_quality import FrameQuality, assess_gray
+
+logger = logging.getLogger(__name__)
+
+FACES_DIR = Path("uploads/faces")
+
+
+class VideoFrame(NamedTuple):
+    """One sampled frame: a small grayscale copy to score, and the full frame on demand."""
+    timestamp: float  # seconds from the start of the clip
+    gray: np.ndarray  # float32, short side about FACE_QUALITY_SIZE
+    encode: Callable[[], bytes]  # full-resolution JPEG; only called for frames that are kept
+
+
+class PoseFrame(NamedTuple):
+    face_type: str
+    timestamp: float
+    quality: FrameQuality
+    jpeg: bytes
+
+
+def parse_pose_marks(
+    value: Optional[str],
+    duration: float,
+    poses: Iterable[str] = settings.FACE_VIDEO_POSES,
+) -> list[tuple[float, str]]:
+    """(start second, pose) pairs sorted by start.
+
+    ``value`` is the client's timeline, "0:straight,2.5:left,5:right"; frames
+    before the first mark are ignored. Without it the clip is split into
+    equal segments in FACE_VIDEO_POSES order, the order the app prompts for.
+    Raises ValueError for a malformed timeline or an unknown pose.
+    """
+    poses = list(poses)
+    if not value:
+        if duration <= 0:
+            raise ValueError("clip duration is unknown; send pose_marks")
+        return [(duration * i / len(poses), pose) for i, pose in enumerate(poses)]
+    marks = []
+    for part in value.split(","):
+        start, _, pose = part.partition(":")
+        pose = pose.strip()
+        if pose not in poses:
+            raise ValueError(f"pose_marks: unknown pose {pose!r}, expected one of {', '.join(poses)}")
+        start = float(start)
+        if not np.isfinite(start) or start < 0:
+            raise ValueError("pose_marks: start times must be non-negative seconds")
+        marks.append((start, pose))
+    return sorted(marks)
+
+
+def pose_at(marks: list[tuple[float, str]], timestamp: float) -> Optional[str]:
+    """Pose of the segment containing ``timestamp``, or None before the first mark."""
+    index = bisect.bisect_right([start for start, _ in marks], timestamp) - 1
+    return marks[index][1] if index >= 0 else None
+
+
+def _open(path: str):
+    try:
+        import av
+    except ImportError:
+        raise RuntimeError("Video enrollment needs the av package (pip install av)")
+    try:
+        container = av.open(path)
+    except av.error.FFmpegError as exc:
+        raise ValueError(f"not a readable video: {exc}") from exc
+    if not container.streams.video:
+        container.close()
+        raise ValueError("the upload has no video stream")
+    return container, container.streams.video[0]
+
+
+def video_duration(path: str) -> float:
+    """Clip length in seconds from the container header, 0.0 when it is not recorded."""
+    container, stream = _open(path)
+    with container:
+        if stream.duration and stream.time_base:
+            return float(stream.duration * stream.time_base)
+        if container.duration:
+            return container.duration / 1_000_000  # AV_TIME_BASE
+    return 0.0
+
+
+def iter_sampled_frames(
+    path: str,
+    sample_fps: float = settings.FACE_VIDEO_SAMPLE_FPS,
+    max_seconds: float = settings.FACE_VIDEO_MAX_SECONDS,
+) -> Iterator[VideoFrame]:
+    """Decode a clip incrementally and yield about ``sample_fps`` frames per second.
+
+    Inter-coded frames still have to be decoded, but only the sampled ones
+    are scaled (by libswscale, straight to a small grayscale plane) and
+    converted, and each is released once it has been scored. Raises
+    RuntimeError when PyAV is not installed and ValueError for unreadable data.
+    """
+    container, stream = _open(path)
+    stream.thread_type = "AUTO"
+    interval = 1.0 / sample_fps
+    next_at = 0.0
+    with container:
+        for frame in container.decode(stream):
+            if frame.time is None:
+                continue
+            if frame.time > max_seconds:
+                break
+            if frame.time < next_at:
+                continue
+            next_at = frame.time + interval
+            scale = settings.FACE_QUALITY_SIZE / min(frame.width, frame.height)
+            gray = frame.reformat(
+                width=max(1, round(frame.width * min(scale, 1.0))),
+                height=max(1, round(frame.height * min(scale, 1.0))),
+                format="gray",
+            ).to_ndarray()
+            yield VideoFrame(float(frame.time), gray.astype(np.float32), _jpeg_encoder(frame))
+
+
+def _jpeg_encoder(frame) -> Callable[[], bytes]:
+    def encode() -> bytes:
+        from PIL import Image
+
+        image = frame.to_image()
+        # Phones record portrait clips sideways with a display rotation (counterclockwise degrees)
+        rotation = round(getattr(frame, "rotation", 0) or 0) % 360
+        if rotation in (90, 180, 270):
+            image = image.transpose(
+                {90: Image.Transpose.ROTATE_90, 180: Image.Transpose.ROTATE_180, 270: Image.Transpose.ROTATE_270}[rotation]
+            )
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=95)
+        return buffer.getvalue()
+
+    return encode
+
+
+def select_pose_frames(
+    frames: Iterable[VideoFrame],
+    marks: list[tuple[float, str]],
+    per_pose: int = settings.FACE_VIDEO_FRAMES_PER_POSE,
+    min_gap: float = settings.FACE_VIDEO_MIN_GAP_SECONDS,
+    min_score: float = settings.FACE_QUALITY_MIN_SCORE,
+) -> tuple[dict[str, list[PoseFrame]], int]:
+    """Best-scoring frames per pose, at least ``min_gap`` seconds apart, and the number sampled.
+
+    Frames under ``min_score`` are never kept. Each pose keeps a shortlist
+    of its ``per_pose * 4`` best frames while decoding, and spacing is
+    applied to that shortlist at the end, so a steadily improving stretch of
+    neighbouring frames cannot crowd out a good frame further away. A frame
+    is only encoded once it makes the shortlist, so memory stays bounded
+    however long the clip is.
+    """
+    shortlist_size = per_pose * 4
+    shortlists: dict[str, list[PoseFrame]] = {pose: [] for _, pose in marks}
+    sampled = 0
+    for frame in frames:
+        sampled += 1
+        pose = pose_at(marks, frame.timestamp)
+        if pose is None:
+            continue
+        quality = assess_gray(frame.gray, min_score=min_score)
+        shortlist = shortlists[pose]
+        if quality.score < min_score or (
+            len(shortlist) >= shortlist_size and shortlist[-1].quality.score >= quality.score
+        ):
+            continue
+        shortlist.append(PoseFrame(pose, frame.timestamp, quality, frame.encode()))
+        shortlist.sort(key=lambda c: c.quality.score, reverse=True)
+        del shortlist[shortlist_size:]
+    kept = {}
+    for pose, shortlist in shortlists.items():
+        kept[pose] = []
+        for candidate in shortlist:
+            if len(kept[pose]) == per_pose:
+                break
+            if all(abs(candidate.timestamp - other.timestamp) >= min_gap for other in kept[pose]):
+                kept[pose].append(candidate)
+    return kept, sampled
+
+
+def save_pose_frames(session, user_id, frames: Iterable[PoseFrame]) -> list:
+    """Store each kept frame like an image upload (file plus face_data row, no embedding yet).
+
+    Embeddings follow from server-side extraction when it is enabled.
+    """
+    from app.crud import face as face_crud
+
+    FACES_DIR.mkdir(parents=True, exist_ok=True)
+    records = []
+    for frame in frames:
+        filename = f"{user_id}_{int(time.time() * 1000)}_{frame.face_type}_{int(frame.timestamp * 1000)}.jpg"
+        filepath = FACES_DIR / filename
+        filepath.write_bytes(frame.jpeg)
+        try:
+            records.append(
+                face_crud.create_face_record(
+                    session,
+                    user_id=str(user_id),
+                    face_type=frame.face_type,
+                    file_path=str(filepath),
+                    file_name=filename,
+                    quality_score=frame.quality.score,
+                )
+            )
+        except Exception:
+            filepath.unlink(missing_ok=True)
+            raise
+        logger.info(f"✓ Video frame saved: {filepath} ({frame.face_type}, {frame.quality.score:.2f})")
+    return records
@@ -0,0 +1,194 @@
+import logging
+import math
+import wave
+from pathlib import Path
+from typing import NamedTuple, Optional
+import numpy as np
+from app.core.config import settings
+from app.core.file_storage import FileStorageManager
+
+logger = logging.getLogger(__name__)
+
+
+class DecodedAudio(NamedTuple):
+    samples: np.ndarray  # mono float32 in [-1, 1] at sample_rate
+    sample_rate: int
+    source_sample_rate: int
+    channels: int
+
+    @property
+    def seconds(self) -> float:
+        return len(self.samples) / self.sample_rate
+
+    @property
+    def rms(self) -> float:
+        return float(np.sqrt(np.mean(np.square(self.samples, dtype=np.float64)))) if len(self.samples) else 0.0
+
+
+def pcm_to_float(raw: bytes, width: int) -> np.ndarray:
+    """Little-endian PCM (8-bit unsigned, 16/24/32-bit signed) as float32 in [-1, 1]."""
+    if width == 1:
+        return (np.frombuffer(raw, np.uint8).astype(np.float32) - 128.0) / 128.0
+    if width == 2:
+        return np.frombuffer(raw, "<i2").astype(np.float32) / 32768.0
+    if width == 3:
+        triplets = np.frombuffer(raw, np.uint8).reshape(-1, 3).astype(np.int32)
+        values = triplets[:, 0] | (triplets[:, 1] << 8) | (triplets[:, 2] << 16)
+        return ((values ^ 0x800000) - 0x800000).astype(np.float32) / 8388608.0
+    if width == 4:
+        return (np.frombuffer(raw, "<i4") / 2147483648.0).astype(np.float32)
+    raise ValueError(f"unsupported WAV sample width: {width * 8} bits")
+
+
+class _Lowpass:
+    """Streaming windowed-sinc low-pass (zero phase) run ahead of downsampling.
+
+    Cuts at 90% of the target Nyquist frequency with a Hamming window
+    (about -50 dB stopband), so content the target rate cannot represent is
+    removed instead of aliasing into the voice band. The signal is extended
+    with its first and last values at the edges, and the output stays aligned
+    sample for sample with the input.
+    """
+
+    ZERO_CROSSINGS = 16  # per side of the sinc
+
+    def __init__(self, source_rate: int, sample_rate: int):
+        cutoff = 0.45 * sample_rate / source_rate  # cycles per source sample
+        self.delay = math.ceil(self.ZERO_CROSSINGS / (2 * cutoff))
+        n = np.arange(-self.delay, self.delay + 1)
+        taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(len(n))
+        self.taps = (taps / taps.sum()).astype(np.float32)
+        self.history: Optional[np.ndarray] = None
+
+    def feed(self, samples: np.ndarray) -> np.ndarray:
+        if self.history is None:
+            self.history = np.full(self.delay, samples[0], dtype=np.float32)
+        buffer = np.concatenate((self.history, samples))
+        if len(buffer) < len(self.taps):
+            self.history = buffer
+            return buffer[:0]
+        self.history = buffer[len(buffer) - (len(self.taps) - 1):]
+        return np.convolve(buffer, self.taps, mode="valid").astype(np.float32)
+
+    def flush(self) -> np.ndarray:
+        if self.history is None:
+            return np.empty(0, dtype=np.float32)
+        return self.feed(np.full(self.delay, self.history[-1], dtype=np.float32))
+
+
+class _LinearResampler:
+    """Linear interpolation from a stream of source samples into a preallocated output buffer."""
+
+    def __init__(self, step: float, out: np.ndarray):
+        self.step = step  # source samples per output sample
+        self.out = out
+        self.written = 0
+        self.start = 0  # source index of the next sample fed
+        self.previous: Optional[np.float32] = None  # last sample fed, for the next interpolation
+
+    def feed(self, samples: np.ndarray) -> None:
+        if not len(samples):
+            return
+        end = self.start + len(samples)
+        origin = self.start
+        if self.previous is not None:
+            samples = np.concatenate(([self.previous], samples))
+            origin -= 1
+        # Output samples that fall before the last sample fed can be interpolated now
+        stop = min(len(self.out), math.ceil((end - 1) / self.step))
+        if stop > self.written:
+            positions = np.arange(self.written, stop) * self.step - origin
+            index = np.minimum(positions.astype(np.int64), len(samples) - 2)
+            fraction = (positions - index).astype(np.float32)
+            self.out[self.written:stop] = samples[index] + (samples[index + 1] - samples[index]) * fraction
+            self.written = stop
+        self.previous = samples[-1]
+        self.start = end
+
+
+def decode_wav(
+    path: str,
+    sample_rate: int = settings.VOICE_SAMPLE_RATE,
+    max_seconds: float = settings.VOICE_MAX_SECONDS,
+    chunk_frames: int = settings.VOICE_DECODE_CHUNK_FRAMES,
+) -> DecodedAudio:
+    """Decode a PCM WAV file to mono float32 at ``sample_rate``, ``chunk_frames`` at a time.
+
+    The output buffer is sized once from the header. Each chunk is
+    downmixed, low-pass filtered when the file's rate is higher than
+    ``sample_rate``, and linearly resampled straight into that buffer. The
+    filter and interpolation state carries over to the next chunk. Peak
+    memory is therefore the decoded result plus one chunk, never the whole
+    file. Raises ValueError for data that is not a PCM WAV file or a clip
+    longer than ``max_seconds``.
+    """
+    try:
+        wav = wave.open(path, "rb")
+    except (wave.Error, EOFError) as exc:
+        raise ValueError(f"not a readable PCM WAV file: {exc}") from exc
+    with wav:
+        channels, width, source_rate, frames = (
+            wav.getnchannels(), wav.getsampwidth(), wav.getframerate(), wav.getnframes()
+        )
+        if source_rate <= 0 or channels <= 0:
+            raise ValueError("WAV header has no sample rate or channels")
+        if frames / source_rate > max_seconds:
+            raise ValueError(f"Sample is {frames / source_rate:.1f}s; the limit is {max_seconds:.0f}s")
+        resampler = _LinearResampler(
+            source_rate / sample_rate, np.empty(frames * sample_rate // source_rate, dtype=np.float32)
+        )
+        lowpass = _Lowpass(source_rate, sample_rate) if source_rate > sample_rate else None
+        frame_bytes = width * channels
+        while True:
+            raw = wav.readframes(chunk_frames)
+            raw = raw[: len(raw) - len(raw) % frame_bytes]
+            if not raw:
+                break
+            mono = pcm_to_float(raw, width).reshape(-1, channels).mean(axis=1, dtype=np.float32)
+            resampler.feed(lowpass.feed(mono) if lowpass else mono)
+        if lowpass:
+            resampler.feed(lowpass.flush())
+    # A short file ends early; the last output samples sit on the final frame
+    out = resampler.out[: resampler.start * sample_rate // source_rate]
+    out[resampler.written:] = resampler.previous if resampler.previous is not None else 0.0
+    return DecodedAudio(out, sample_rate, source_rate, channels)
+
+
+def save_voice_sample(session, user, temp_path: str, original_filename: str, audio: DecodedAudio):
+    """Move an uploaded sample into the user's voice directory, store its decoded copy and record it.
+
+    Keeps the newest VOICE_SAMPLES_PER_USER samples; older ones are deleted
+    with their files. Returns (sample, number removed).
+    """
+    from app.crud import voice as voice_crud
+
+    file_path = FileStorageManager.store_voice(str(user.id), temp_path, original_filename)
+    pcm_path = str(Path(file_path).with_suffix(".npy")).replace("\\", "/")
+    np.save(FileStorageManager.BASE_DIR / pcm_path, audio.samples)
+    try:
+        sample = voice_crud.create_sample(
+            session,
+            user_id=user.id,
+            file_path=file_path,
+            pcm_path=pcm_path,
+            sample_rate=audio.sample_rate,
+            source_sample_rate=audio.source_sample_rate,
+            channels=audio.channels,
+            duration_seconds=round(audio.seconds, 3),
+            rms=round(audio.rms, 5),
+        )
+    except Exception:
+        FileStorageManager.delete_file(file_path)
+        FileStorageManager.delete_file(pcm_path)
+        raise
+    removed = voice_crud.delete_oldest_samples(session, user.id, keep=settings.VOICE_SAMPLES_PER_USER)
+    for old in removed:
+        FileStorageManager.delete_file(old.file_path)
+        FileStorageManager.delete_file(old.pcm_path)
+    voice_dir = str(Path(file_path).parent).replace("\\", "/")
+    if user.voice_data_path != voice_dir:
+        user.voice_data_path = voice_dir
+        session.add(user)
+        session.commit()
+    logger.info(f"🎙️ Voice sample saved for user {user.id}: {audio.seconds:.1f}s, {len(removed)} old sample(s) replaced")
+    return sample, len(removed)
@@ -0,0 +1,222 @@
+"""Bulk export/import of face_data rows (embeddings included) via PostgreSQL COPY.
+
+    python face_embeddings_copy.py export dumps/faces
+    python face_embeddings_copy.py import dumps/faces
+
+A dump is a directory of chunk files in PostgreSQL's binary COPY format
+(embeddings travel as packed float4, not decimal text) plus a manifest.json.
+Chunks are keyset ranges of face_data.id, so memory stays bounded to one
+COPY buffer and an interrupted export or import resumes at the next chunk.
+Image files under uploads/ are not part of the dump.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.core.config import settings
+from app.core.database import engine
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+IMPORT_PROGRESS = "import_progress.json"
+# Fixed column order of every chunk file
+COLUMNS = (
+    "id",
+    "user_id",
+    "face_type",
+    "file_path",
+    "file_name",
+    "embedding",
+    "embedding_norm",
+    "uploaded_at",
+    "created_at",
+)
+COLUMN_LIST = ", ".join(COLUMNS)
+
+
+def _read_json(path: str, default):
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_json(path: str, data) -> None:
+    # Write-then-rename so a crash never leaves a truncated manifest behind
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _report(done: int, total: int, started: float, label: str) -> None:
+    elapsed = max(time.monotonic() - started, 1e-6)
+    print(f"   {label}: {done}/{total} rows ({done / elapsed:,.0f} rows/s)", flush=True)
+
+
+def export_faces(directory: str, chunk_size: int) -> None:
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST)
+    manifest = _read_json(
+        manifest_path,
+        {"version": FORMAT_VERSION, "columns": list(COLUMNS), "dim": settings.FACE_EMBEDDING_DIM, "chunks": []},
+    )
+    if manifest["columns"] != list(COLUMNS):
+        raise SystemExit(f"❌ {manifest_path} was written with different columns")
+    last_id = manifest["chunks"][-1]["last_id"] if manifest["chunks"] else None
+    done = sum(c["rows"] for c in manifest["chunks"])
+    if last_id:
+        print(f"↻ Resuming export after {last_id} ({done} rows already dumped)")
+
+    conn = engine.raw_connection()
+    try:
+        conn.set_session(isolation_level="REPEATABLE READ")
+        cur = conn.cursor()
+        cur.execute("SELECT count(*) FROM face_data")
+        total = cur.fetchone()[0]
+        conn.commit()
+        started = time.monotonic()
+        while True:
+            # Bounds and COPY share one snapshot, so the recorded count is exact
+            cur.execute(
+                """
+                SELECT max(id::text), count(*) FROM (
+                    SELECT id FROM face_data
+                    WHERE %(last)s::uuid IS NULL OR id > %(last)s::uuid
+                    ORDER BY id LIMIT %(n)s
+                ) AS chunk
+                """,
+                {"last": last_id, "n": chunk_size},
+            )
+            chunk_last, rows = cur.fetchone()
+            if not rows:
+                conn.commit()
+                break
+            name = f"chunk_{len(manifest['chunks']):06d}.pgcopy"
+            copy_sql = cur.mogrify(
+                f"COPY (SELECT {COLUMN_LIST} FROM face_data "
+                "WHERE (%(last)s::uuid IS NULL OR id > %(last)s::uuid) AND id <= %(upper)s::uuid "
+                "ORDER BY id) TO STDOUT WITH (FORMAT binary)",
+                {"last": last_id, "upper": chunk_last},
+            ).decode()
+            with open(os.path.join(directory, name), "wb") as f:
+                cur.copy_expert(copy_sql, f)
+            conn.commit()
+            manifest["chunks"].append({"file": name, "after_id": last_id, "last_id": chunk_last, "rows": rows})
+            last_id = chunk_last
+            _write_json(manifest_path, manifest)
+            done += rows
+            _report(done, total, started, name)
+    finally:
+        conn.close()
+    print(f"✅ Exported {done} face rows to {directory}")
+
+
+def import_faces(directory: str, restart: bool, rebuild_templates: bool) -> None:
+    manifest = _read_json(os.path.join(directory, MANIFEST), None)
+    if manifest is None:
+        raise SystemExit(f"❌ No {MANIFEST} in {directory}")
+    if manifest["version"] != FORMAT_VERSION or manifest["columns"] != list(COLUMNS):
+        raise SystemExit("❌ Dump format does not match this tool version")
+    if manifest["dim"] != settings.FACE_EMBEDDING_DIM:
+        raise SystemExit(f"❌ Dump holds {manifest['dim']}-d embeddings, database expects {settings.FACE_EMBEDDING_DIM}")
+
+    progress_path = os.path.join(directory, IMPORT_PROGRESS)
+    progress = {"chunks": []} if restart else _read_json(progress_path, {"chunks": []})
+    imported = set(progress["chunks"])
+    total = sum(c["rows"] for c in manifest["chunks"])
+    done = sum(c["rows"] for c in manifest["chunks"] if c["file"] in imported)
+    if imported:
+        print(f"↻ Resuming import: {len(imported)} chunks already loaded")
+
+    poses = "UNION ALL SELECT user_id, face_type, sum(embedding), count(*) FROM face_data " \
+        "WHERE embedding IS NOT NULL AND user_id IN (SELECT DISTINCT user_id FROM face_import) " \
+        "GROUP BY user_id, face_type" if settings.FACE_TEMPLATE_PER_POSE else ""
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        started = time.monotonic()
+        inserted_total = 0
+        for chunk in manifest["chunks"]:
+            if chunk["file"] in imported:
+                continue
+            cur.execute(
+                f"CREATE TEMP TABLE face_import ON COMMIT DROP AS "
+                f"SELECT {COLUMN_LIST} FROM face_data WITH NO DATA"
+            )
+            with open(os.path.join(directory, chunk["file"]), "rb") as f:
+                cur.copy_expert(f"COPY face_import ({COLUMN_LIST}) FROM STDIN WITH (FORMAT binary)", f)
+            # Same invariants as the API write path: unit-length vectors with
+            # their original norm, zero vectors dropped. Rows of users missing
+            # here and ids already present are skipped, so re-runs are no-ops.
+            cur.execute(
+                f"""
+                INSERT INTO face_data ({COLUMN_LIST}, updated_at)
+                SELECT i.id, i.user_id, i.face_type, i.file_path, i.file_name,
+                       CASE WHEN vector_norm(i.embedding) > 0 THEN l2_normalize(i.embedding) END,
+                       CASE WHEN vector_norm(i.embedding) > 0
+                            THEN coalesce(i.embedding_norm, vector_norm(i.embedding)) END,
+                       i.uploaded_at, i.created_at, now()
+                FROM face_import i JOIN users u ON u.id = i.user_id
+                ON CONFLICT (id) DO NOTHING
+                """
+            )
+            inserted = cur.rowcount
+            if rebuild_templates and inserted:
+                cur.execute(
+                    "DELETE FROM face_templates WHERE user_id IN (SELECT DISTINCT user_id FROM face_import)"
+                )
+                cur.execute(
+                    f"""
+                    INSERT INTO face_templates (id, user_id, face_type, embedding, embedding_sum, frame_count)
+                    SELECT gen_random_uuid(), user_id, pose, l2_normalize(total), total, n
+                    FROM (
+                        SELECT user_id, 'all' AS pose, sum(embedding) AS total, count(*) AS n
+                        FROM face_data
+                        WHERE embedding IS NOT NULL AND user_id IN (SELECT DISTINCT user_id FROM face_import)
+                        GROUP BY user_id
+                        {poses}
+                    ) AS frames
+                    """
+                )
+            conn.commit()
+            imported.add(chunk["file"])
+            progress["chunks"].append(chunk["file"])
+            _write_json(progress_path, progress)
+            done += chunk["rows"]
+            inserted_total += inserted
+            skipped = chunk["rows"] - inserted
+            _report(done, total, started, f"{chunk['file']} (+{inserted}, {skipped} skipped)")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    print(f"✅ Imported {inserted_total} new face rows from {directory}")
+    print("   Restart the API (or reload its face indexes) to pick up the new rows")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_cmd = commands.add_parser("export", help="Dump face_data to a directory of binary COPY chunks")
+    export_cmd.add_argument("directory")
+    export_cmd.add_argument("--chunk-size", type=int, default=50000)
+    import_cmd = commands.add_parser("import", help="Load a dump into face_data")
+    import_cmd.add_argument("directory")
+    import_cmd.add_argument("--restart", action="store_true", help="Ignore import_progress.json and reload every chunk")
+    import_cmd.add_argument(
+        "--no-templates", action="store_true", help="Skip rebuilding face_templates for imported users"
+    )
+    args = parser.parse_args()
+    if args.command == "export":
+        export_faces(args.directory, args.chunk_size)
+    else:
+        import_faces(args.directory, args.restart, not args.no_templates)
+
+
+if __name__ == "__main__":
+    main()
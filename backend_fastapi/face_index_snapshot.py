@@ -0,0 +1,37 @@
+"""Build or refresh the memory-mapped face index snapshot used for warm starts.
+
+    python face_index_snapshot.py            # catch up the current snapshot and rewrite it
+    python face_index_snapshot.py --full     # rebuild from face_data from scratch
+
+Run it periodically (e.g. from cron) so API workers only have to catch up a
+few rows past the snapshot's watermark when they start.
+"""
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.face_index import FaceIndex
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=settings.FACE_INDEX_SNAPSHOT_DIR, help="Snapshot directory")
+    parser.add_argument("--full", action="store_true", help="Ignore the existing snapshot and reload every row")
+    args = parser.parse_args()
+    if not args.dir:
+        raise SystemExit("❌ No snapshot directory configured (FACE_INDEX_SNAPSHOT_DIR)")
+    os.makedirs(args.dir, exist_ok=True)
+
+    index = FaceIndex()
+    with SessionLocal() as session:
+        if args.full or not index.load_snapshot(session, args.dir):
+            index.load(session)
+    path = index.save_snapshot(args.dir)
+    print(f"✅ Snapshot with {index.size} embeddings written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Apply the per-pose frame retention policy to faces enrolled before it existed.
+
+    python face_retention.py --dry-run         # report what would be pruned
+    python face_retention.py                   # prune, keeping FACE_RETENTION_PER_POSE per pose
+    python face_retention.py --keep 3          # a tighter budget than the configured one
+
+New uploads are pruned as they arrive (see app.services.face_retention);
+this catches up users whose retries piled up earlier. Running API workers
+drop the pruned faces from their indexes through the change feed.
+"""
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud import face as face_crud
+from app.services import face_retention
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keep", type=int, default=settings.FACE_RETENTION_PER_POSE, help="Frames kept per pose")
+    parser.add_argument(
+        "--min-distance",
+        type=float,
+        default=settings.FACE_RETENTION_MIN_DISTANCE,
+        help="Cosine distance under which a frame counts as a near-duplicate",
+    )
+    parser.add_argument("--model-version", default=None, help="Embedding model version to compare frames under")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be pruned")
+    args = parser.parse_args()
+    if args.keep <= 0:
+        raise SystemExit("❌ --keep must be at least 1")
+
+    pruned = 0
+    with SessionLocal() as session:
+        poses = face_crud.get_multi_frame_poses(session, args.model_version)
+        print(f"🔍 {len(poses)} user poses with more than one frame")
+        for pose in poses:
+            removed = face_retention.prune_user_frames(
+                session,
+                pose.user_id,
+                pose.face_type,
+                args.model_version,
+                keep=args.keep,
+                min_distance=args.min_distance,
+                dry_run=args.dry_run,
+            )
+            if removed:
+                print(f"   {pose.user_id} {pose.face_type}: {len(removed)} of {pose.frames} frames")
+            pruned += len(removed)
+    verb = "would be pruned" if args.dry_run else "pruned"
+    print(f"✅ {pruned} frames {verb}")
+
+
+if __name__ == "__main__":
+    main()
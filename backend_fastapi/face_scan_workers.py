@@ -0,0 +1,43 @@
+"""Run scan workers outside the API, e.g. on a dedicated box with many cores.
+
+    python face_scan_workers.py                          # one worker per CPU
+    python face_scan_workers.py --workers 8
+    python face_scan_workers.py --feed-dir /data/frames  # also queue <content_id>.npy files dropped there
+
+This is the usual way to run scans, since API workers only start their own
+pool with FACE_SCAN_ENABLED. Workers claim queued jobs from scan_jobs, so
+they share the queue with any such pools. Stop with Ctrl-C.
+"""
+import argparse
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.core.config import settings
+from app.services.face_scan import ScanWorkerPool
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (0: one per CPU)")
+    parser.add_argument("--feed-dir", default=settings.FACE_SCAN_FEED_DIR, help="Directory of frame files to queue")
+    parser.add_argument("--poll-seconds", type=float, default=settings.FACE_SCAN_POLL_SECONDS)
+    args = parser.parse_args()
+
+    pool = ScanWorkerPool(workers=args.workers, poll_seconds=args.poll_seconds, feed_dir=args.feed_dir)
+    pool.start()
+    print(f"🚀 {pool.workers} scan workers running" + (f", watching {pool.feed_dir}" if pool.feed_dir else ""))
+    try:
+        while True:
+            time.sleep(60)
+            stats = pool.stats()
+            print(f"📊 {stats['workers_alive']}/{stats['workers']} workers alive, {stats['fed']} files queued")
+    except KeyboardInterrupt:
+        print("🛑 Stopping scan workers")
+    finally:
+        pool.stop()
+
+
+if __name__ == "__main__":
+    main()
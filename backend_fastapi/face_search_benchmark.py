@@ -0,0 +1,464 @@
+"""Face search benchmark: recall@k vs latency vs memory as enrollment grows.
+
+    python face_search_benchmark.py --sizes 10000,100000,1000000 --backends exact,int8,pq,pgvector
+
+Synthetic users are drawn around shared "lookalike" centroids, so there are
+near neighbours to confuse, and each is enrolled like face_data: a few
+frames in each of the straight/left/right poses. Probes are fresh frames of
+enrolled users; ground truth is an exact per-user top-k computed chunk by
+chunk. For every size and backend the run records build time, memory,
+recall@k, single-query p50/p99 latency and QPS under concurrency, and
+writes everything to a JSON file for comparing runs.
+
+The pgvector backend loads an UNLOGGED scratch table in DATABASE_URL
+(dropped afterwards unless --keep-table) and queries it through the same
+inner-product HNSW index as face_data. The int8/pq backends report
+code-only recall; the API additionally re-ranks against stored vectors.
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import NamedTuple, Optional
+from uuid import UUID
+import numpy as np
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.core.config import settings
+from app.services import pgcopy
+from app.services.face_index import UUID_DTYPE, FaceIndex
+from app.services.quantization import QuantizedFaceIndex
+
+POSES = ("straight", "left", "right")
+USERS_PER_CHUNK = 2000
+
+
+def _unit(rows: np.ndarray) -> np.ndarray:
+    return rows / np.linalg.norm(rows, axis=-1, keepdims=True)
+
+
+def _uuid_keys(values: np.ndarray) -> np.ndarray:
+    """Integers -> the 16-byte UUIDs (UUID(int=value)) the indexes store."""
+    keys = np.zeros(len(values), dtype=[("high", ">u8"), ("low", ">u8")])
+    keys["low"] = values
+    return keys.view(UUID_DTYPE)
+
+
+class FaceChunk(NamedTuple):
+    face_ids: np.ndarray  # int64
+    user_ids: np.ndarray  # int64, each user's frames are consecutive
+    poses: np.ndarray  # uint8 index into POSES
+    vectors: np.ndarray  # (faces x dim) float32, unit-length
+
+
+class BenchRow(NamedTuple):
+    id: UUID
+    user_id: UUID
+    face_type: str
+    embedding: np.ndarray
+    embedding_norm: float
+
+
+class SyntheticFaces:
+    """Deterministic clustered enrollment: regenerated chunk by chunk, never held whole."""
+
+    def __init__(
+        self,
+        users: int,
+        dim: int,
+        frames_per_pose: int,
+        seed: int,
+        users_per_cluster: int = 50,
+        spread: float = 0.6,
+        pose_shift: float = 0.35,
+        noise: float = 0.5,
+    ):
+        self.users = users
+        self.dim = dim
+        self.frames_per_user = frames_per_pose * len(POSES)
+        self.seed = seed
+        self.spread = spread
+        self.pose_shift = pose_shift
+        self.noise = noise
+        rng = np.random.default_rng([seed, 0])
+        self.clusters = _unit(rng.standard_normal((max(users // users_per_cluster, 1), dim), dtype=np.float32))
+        self.pose_directions = _unit(rng.standard_normal((len(POSES), dim), dtype=np.float32))
+        self.frame_poses = np.repeat(np.arange(len(POSES), dtype=np.uint8), frames_per_pose)
+
+    @property
+    def faces(self) -> int:
+        return self.users * self.frames_per_user
+
+    def chunks(self):
+        for chunk in range(-(-self.users // USERS_PER_CHUNK)):
+            yield self.chunk(chunk)
+
+    def chunk(self, chunk: int) -> FaceChunk:
+        users, centers = self._centers(chunk)
+        rng = np.random.default_rng([self.seed, 2, chunk])
+        poses = np.tile(self.frame_poses, len(users))
+        vectors = self._frames(np.repeat(centers, self.frames_per_user, axis=0), poses, rng)
+        user_ids = np.repeat(users, self.frames_per_user)
+        face_ids = user_ids * self.frames_per_user + np.tile(np.arange(self.frames_per_user), len(users))
+        return FaceChunk(face_ids, user_ids, poses, vectors)
+
+    def probes(self, count: int) -> tuple[np.ndarray, np.ndarray]:
+        """Fresh frames of random enrolled users: (probe vectors, their user ids)."""
+        rng = np.random.default_rng([self.seed, 3])
+        users = np.sort(rng.choice(self.users, size=count, replace=count > self.users))
+        centers = np.empty((count, self.dim), dtype=np.float32)
+        for chunk in np.unique(users // USERS_PER_CHUNK):
+            chunk_users, chunk_centers = self._centers(int(chunk))
+            mask = users // USERS_PER_CHUNK == chunk
+            centers[mask] = chunk_centers[users[mask] - chunk_users[0]]
+        poses = rng.integers(0, len(POSES), size=count).astype(np.uint8)
+        vectors = self._frames(centers, poses, rng)
+        order = rng.permutation(count)
+        return vectors[order], users[order]
+
+    def _centers(self, chunk: int) -> tuple[np.ndarray, np.ndarray]:
+        first = chunk * USERS_PER_CHUNK
+        users = np.arange(first, min(first + USERS_PER_CHUNK, self.users), dtype=np.int64)
+        rng = np.random.default_rng([self.seed, 1, chunk])
+        offsets = _unit(rng.standard_normal((len(users), self.dim), dtype=np.float32))
+        return users, _unit(self.clusters[users % len(self.clusters)] + self.spread * offsets)
+
+    def _frames(self, centers: np.ndarray, poses: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        noise = _unit(rng.standard_normal(centers.shape, dtype=np.float32))
+        return _unit(centers + self.pose_shift * self.pose_directions[poses] + self.noise * noise).astype(np.float32)
+
+
+def ground_truth(data: SyntheticFaces, probes: np.ndarray, k: int) -> np.ndarray:
+    """Exact top-k user ids per probe (best frame per user), streamed over chunks."""
+    best_scores = np.empty((len(probes), 0), dtype=np.float32)
+    best_users = np.empty((len(probes), 0), dtype=np.int64)
+    for chunk in data.chunks():
+        scores = (probes @ chunk.vectors.T).reshape(len(probes), -1, data.frames_per_user).max(axis=2)
+        users = np.broadcast_to(chunk.user_ids[:: data.frames_per_user], scores.shape)
+        best_scores = np.concatenate([best_scores, scores], axis=1)
+        best_users = np.concatenate([best_users, users], axis=1)
+        if best_scores.shape[1] > k:
+            keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+            best_scores = np.take_along_axis(best_scores, keep, axis=1)
+            best_users = np.take_along_axis(best_users, keep, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return np.take_along_axis(best_users, order, axis=1)
+
+
+def _bench_rows(data: SyntheticFaces):
+    for chunk in data.chunks():
+        for face_id, user_id, pose, vector in zip(chunk.face_ids, chunk.user_ids, chunk.poses, chunk.vectors):
+            yield BenchRow(UUID(int=int(face_id)), UUID(int=int(user_id)), POSES[pose], vector, 1.0)
+
+
+class ExactBackend:
+    """In-process float32 FaceIndex (the "exact" identify backend)."""
+
+    name = "exact"
+
+    def __init__(self, args):
+        self.index = FaceIndex(dim=args.dim)
+
+    def build(self, data: SyntheticFaces) -> dict:
+        self.index.load_rows(_bench_rows(data))
+        return {}
+
+    def search(self, probe: np.ndarray, k: int) -> list[int]:
+        return [hit.user_id.int for hit in self.index.search(probe, k)]
+
+    def memory_mb(self) -> float:
+        return self.index.stats()["memory_mb"]
+
+    def close(self) -> None:
+        pass
+
+
+class QuantizedBackend(ExactBackend):
+    """QuantizedFaceIndex codes only (no database re-ranking)."""
+
+    def __init__(self, args, method: str):
+        self.name = method
+        self.index = QuantizedFaceIndex(dim=args.dim, method=method)
+
+    def build(self, data: SyntheticFaces) -> dict:
+        self.index.load_rows(_bench_rows(data))
+        return {"index_recall": self.index.recall}
+
+
+class _ChunkStream(io.RawIOBase):
+    """File-like view over an iterator of byte blocks, for copy_expert."""
+
+    def __init__(self, blocks):
+        self._blocks = iter(blocks)
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        while not self._buffer:
+            try:
+                self._buffer = next(self._blocks)
+            except StopIteration:
+                return 0
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+class PgvectorBackend:
+    """Scratch copy of the face_data layout in Postgres behind an HNSW inner-product index."""
+
+    name = "pgvector"
+
+    def __init__(self, args):
+        from app.core.database import engine
+
+        self.engine = engine
+        self.dim = args.dim
+        self.table = args.pg_table
+        self.keep_table = args.keep_table
+        self.ef_search = args.ef_search
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            from pgvector.psycopg2 import register_vector
+
+            raw = self.engine.raw_connection()
+            raw.detach()
+            conn = raw.driver_connection
+            conn.autocommit = True
+            register_vector(conn)
+            conn.cursor().execute(f"SET hnsw.ef_search = {int(self.ef_search)}")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def build(self, data: SyntheticFaces) -> dict:
+        cur = self._connection().cursor()
+        cur.execute(f"DROP TABLE IF EXISTS {self.table}")
+        cur.execute(
+            f"""
+            CREATE UNLOGGED TABLE {self.table} (
+                id uuid PRIMARY KEY,
+                user_id uuid NOT NULL,
+                face_type smallint NOT NULL,
+                embedding vector({self.dim}) NOT NULL
+            )
+            """
+        )
+        layout = pgcopy.tuple_dtype(
+            [("id", "uuid"), ("user_id", "uuid"), ("face_type", "int2"), ("embedding", pgcopy.vector_field(self.dim))]
+        )
+
+        def blocks():
+            yield pgcopy.COPY_HEADER
+            for chunk in data.chunks():
+                yield pgcopy.encode_tuples(
+                    layout,
+                    {
+                        "id": _uuid_keys(chunk.face_ids),
+                        "user_id": _uuid_keys(chunk.user_ids),
+                        "face_type": chunk.poses,
+                        "embedding": chunk.vectors,
+                    },
+                )
+            yield pgcopy.COPY_TRAILER
+
+        started = time.perf_counter()
+        cur.copy_expert(f"COPY {self.table} FROM STDIN WITH (FORMAT binary)", _ChunkStream(blocks()))
+        loaded = time.perf_counter()
+        cur.execute(
+            f"CREATE INDEX ON {self.table} USING hnsw (embedding vector_ip_ops) WITH (m = 16, ef_construction = 64)"
+        )
+        cur.execute(f"ANALYZE {self.table}")
+        return {
+            "copy_seconds": round(loaded - started, 3),
+            "index_seconds": round(time.perf_counter() - loaded, 3),
+            "ef_search": self.ef_search,
+        }
+
+    def search(self, probe: np.ndarray, k: int) -> list[int]:
+        cur = self._connection().cursor()
+        cur.execute(
+            f"SELECT user_id FROM {self.table} ORDER BY embedding <#> %s LIMIT %s",
+            (probe, k * settings.FACE_SEARCH_CANDIDATE_FACTOR),
+        )
+        users = []
+        for (user_id,) in cur.fetchall():
+            value = UUID(str(user_id)).int
+            if value not in users:
+                users.append(value)
+                if len(users) == k:
+                    break
+        return users
+
+    def memory_mb(self) -> float:
+        cur = self._connection().cursor()
+        cur.execute(
+            "SELECT sum(pg_relation_size(indexrelid)) FROM pg_index WHERE indrelid = %s::regclass", (self.table,)
+        )
+        return round((cur.fetchone()[0] or 0) / 2**20, 2)
+
+    def close(self) -> None:
+        if not self.keep_table:
+            self._connection().cursor().execute(f"DROP TABLE IF EXISTS {self.table}")
+        for conn in self._connections:
+            conn.close()
+
+
+BACKENDS = {
+    "exact": ExactBackend,
+    "int8": lambda args: QuantizedBackend(args, "int8"),
+    "pq": lambda args: QuantizedBackend(args, "pq"),
+    "pgvector": PgvectorBackend,
+}
+
+
+def _rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource  # POSIX only
+    except ImportError:
+        return None
+    # Peak rather than current RSS; KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_backend(backend, data: SyntheticFaces, probes: np.ndarray, truth: np.ndarray, args) -> dict:
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    extra = backend.build(data)
+    build_seconds = time.perf_counter() - started
+    rss_after = _rss_mb()
+
+    for probe in probes[: min(10, len(probes))]:
+        backend.search(probe, args.k)  # warm caches and connections
+    latencies = []
+    recalls = []
+    for probe, expected in zip(probes, truth):
+        started = time.perf_counter()
+        found = backend.search(probe, args.k)
+        latencies.append(time.perf_counter() - started)
+        recalls.append(len(set(found[: args.k]) & set(expected.tolist())) / len(expected))
+
+    rounds = max(1, args.qps_queries // len(probes))
+    workload = [probe for _ in range(rounds) for probe in probes]
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        started = time.perf_counter()
+        list(pool.map(lambda probe: backend.search(probe, args.k), workload))
+        qps = len(workload) / (time.perf_counter() - started)
+
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "backend": backend.name,
+        "identities": data.users,
+        "faces": data.faces,
+        "k": args.k,
+        "recall_at_k": round(float(np.mean(recalls)), 4),
+        "latency_ms_p50": round(float(np.percentile(latencies_ms, 50)), 3),
+        "latency_ms_p99": round(float(np.percentile(latencies_ms, 99)), 3),
+        "latency_ms_mean": round(float(latencies_ms.mean()), 3),
+        "qps": round(qps, 1),
+        "concurrency": args.concurrency,
+        "build_seconds": round(build_seconds, 3),
+        "index_memory_mb": backend.memory_mb(),
+        "rss_delta_mb": round(rss_after - rss_before, 1) if rss_before is not None else None,
+        **extra,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True, cwd=os.path.dirname(__file__) or "."
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000", help="Comma-separated identity counts")
+    parser.add_argument("--backends", default="exact,int8,pgvector", help=f"Any of {','.join(BACKENDS)}")
+    parser.add_argument("--dim", type=int, default=settings.FACE_EMBEDDING_DIM)
+    parser.add_argument("--frames-per-pose", type=int, default=1)
+    parser.add_argument("--queries", type=int, default=200, help="Probes timed one by one for recall and latency")
+    parser.add_argument("--qps-queries", type=int, default=1000, help="Searches issued for the concurrent QPS run")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef-search", type=int, default=settings.FACE_SEARCH_EF_SEARCH)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pg-table", default="face_data_benchmark")
+    parser.add_argument("--keep-table", action="store_true")
+    parser.add_argument("--output", help="JSON results file (default: benchmark_results/face_search_<time>.json)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    backends = args.backends.split(",")
+    unknown = [name for name in backends if name not in BACKENDS]
+    if unknown:
+        raise SystemExit(f"❌ Unknown backends: {', '.join(unknown)}")
+    output = args.output or os.path.join("benchmark_results", f"face_search_{datetime.utcnow():%Y%m%d_%H%M%S}.json")
+    report = {
+        "run": {
+            "started_at": datetime.utcnow().isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": [],
+    }
+
+    for size in sizes:
+        data = SyntheticFaces(size, args.dim, args.frames_per_pose, args.seed)
+        probes, _ = data.probes(args.queries)
+        started = time.perf_counter()
+        truth = ground_truth(data, probes, args.k)
+        print(f"📐 {size} identities / {data.faces} faces: ground truth in {time.perf_counter() - started:.1f}s")
+        for name in backends:
+            backend = BACKENDS[name](args)
+            try:
+                result = run_backend(backend, data, probes, truth, args)
+            finally:
+                backend.close()
+                del backend
+                gc.collect()
+            report["results"].append(result)
+            print(
+                f"   {name:<9} recall@{args.k}={result['recall_at_k']:.3f}  "
+                f"p50={result['latency_ms_p50']:.2f}ms p99={result['latency_ms_p99']:.2f}ms  "
+                f"qps={result['qps']:.0f}  build={result['build_seconds']:.1f}s  "
+                f"index={result['index_memory_mb']}MB",
+                flush=True,
+            )
+            # Persist after every backend so a long run that dies keeps what it measured
+            os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+            with open(output, "w") as f:
+                json.dump(report, f, indent=2)
+    print(f"✅ Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Offline FAR/FRR/EER evaluation of the enrolled faces, to pick a match threshold.
+
+    python face_threshold_eval.py                          # from the face index snapshot
+    python face_threshold_eval.py --from-db --workers 8    # stream face_data instead
+    python face_threshold_eval.py --max-impostor-pairs 0   # score every impostor pair
+
+Every pair of frames of the same user is a genuine pair, every other pair an
+impostor pair. Scores are folded into histograms block by block (see
+app.services.face_evaluation), so the full N x N matrix is never built.
+Above --max-impostor-pairs the impostor blocks are sampled, which keeps a
+million faces to a few minutes on a CPU-only box.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.core.config import settings
+from app.services import face_evaluation
+from app.services.face_index import SNAPSHOT_POINTER, UUID_DTYPE
+
+
+def _from_snapshot(directory: str):
+    """(vectors .npy path, labels) from the current snapshot, or None."""
+    try:
+        with open(os.path.join(directory, SNAPSHOT_POINTER)) as f:
+            path = os.path.join(directory, f.read().strip())
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    size = meta["size"]
+    user_ids = np.load(os.path.join(path, "user_ids.npy"), mmap_mode="r")[:size]
+    _, labels = np.unique(np.asarray(user_ids).view("S16"), return_inverse=True)
+    print(f"📂 Snapshot {path}: {size} faces")
+    # Rows past size are spare capacity; the evaluator only reads labelled rows
+    return os.path.join(path, "vectors.npy"), labels
+
+
+def _from_database(scratch: str):
+    """Stream face_data into a scratch .npy; (path, labels)."""
+    from app.core.database import SessionLocal
+    from app.crud import face as face_crud
+
+    with SessionLocal() as session:
+        count = face_crud.count_embedded_faces(session)
+        path = os.path.join(scratch, "vectors.npy")
+        vectors = np.lib.format.open_memmap(
+            path, mode="w+", dtype=np.float32, shape=(count, settings.FACE_EMBEDDING_DIM)
+        )
+        user_ids = np.zeros(count, dtype=UUID_DTYPE)
+        filled = 0
+        for chunk in face_crud.iter_face_arrays(session):
+            # Rows inserted since the count are left out
+            end = min(filled + len(chunk.ids), count)
+            vectors[filled:end] = chunk.embeddings[: end - filled]
+            user_ids[filled:end] = chunk.user_ids[: end - filled]
+            filled = end
+            if filled == count:
+                break
+    vectors.flush()
+    del vectors
+    _, labels = np.unique(user_ids[:filled].view("S16"), return_inverse=True)
+    print(f"🗄️ Loaded {filled} faces from the database")
+    return path, labels
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snapshot", default=settings.FACE_INDEX_SNAPSHOT_DIR, help="Face index snapshot directory")
+    parser.add_argument("--from-db", action="store_true", help="Read face_data even if a snapshot exists")
+    parser.add_argument("--block-size", type=int, default=face_evaluation.DEFAULT_BLOCK_SIZE)
+    parser.add_argument(
+        "--max-impostor-pairs",
+        type=int,
+        default=1_000_000_000,
+        help="Sample impostor blocks above this many pairs (0 = score them all)",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--bins", type=int, default=face_evaluation.DEFAULT_BINS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threshold", type=float, default=settings.FACE_VERIFY_THRESHOLD, help="Threshold to report")
+    parser.add_argument("--output", help="Write histograms and rates to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        source = None if args.from_db or not args.snapshot else _from_snapshot(args.snapshot)
+        vectors, labels = source or _from_database(scratch)
+        if len(labels) < 2:
+            raise SystemExit("❌ Need at least two enrolled faces")
+        started = time.perf_counter()
+        result = face_evaluation.evaluate(
+            vectors,
+            labels,
+            block_size=args.block_size,
+            max_impostor_pairs=args.max_impostor_pairs or None,
+            workers=args.workers,
+            bins=args.bins,
+            seed=args.seed,
+        )
+    elapsed = time.perf_counter() - started
+
+    at = face_evaluation.rates_at(result, args.threshold)
+    print(
+        f"✅ {result['faces']} faces / {result['identities']} identities in {elapsed:.1f}s: "
+        f"{result['genuine_pairs']} genuine, {result['impostor_pairs']} impostor pairs "
+        f"({result['impostor_blocks_fraction']:.2%} of impostor blocks)"
+    )
+    print(f"📊 EER {result['eer']:.4%} at threshold {result['eer_threshold']:.4f}")
+    print(f"🎯 Threshold {args.threshold:.4f}: FAR {at['far']:.6%}, FRR {at['frr']:.4%}")
+    for point in result["roc"]:
+        if point["threshold"] is None:
+            print(f"   FAR {point['far']:.0e}: not enough impostor pairs")
+        else:
+            print(f"   FAR {point['far']:.0e}: threshold {point['threshold']:.4f}, TAR {point['tar']:.4%}")
+
+    if args.output:
+        report = {
+            key: value.tolist() if isinstance(value, np.ndarray) else value
+            for key, value in result.items()
+            if key not in ("thresholds", "far", "frr")
+        }
+        report.update(at_threshold=at, bins=args.bins, block_size=args.block_size, seconds=round(elapsed, 2))
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
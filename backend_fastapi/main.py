@@ -4,10 +4,23 @@ from sqlmodel import SQLModel
 from app.core.config import settings
 from app.core.database import engine
 from app.core.file_storage import FileStorageManager
+from app.core.upload_limits import UploadLimitMiddleware
 from app.api.routes import api_router
 # Import all models to ensure they are registered with SQLModel
 from app.models.user import User
 from app.models.face import FaceData
+from app.models.face_template import FaceTemplate
+from app.models.face_change import FaceDataChange
+from app.models.embedding_model import EmbeddingModel, FaceEmbedding
+from app.models.face_duplicate import FaceDuplicate
+from app.models.scan import ScanJob, ScanMatch
+from app.models.voice import VoiceSample
+from app.services.duplicate_detection import duplicate_checker
+from app.services.face_changes import face_change_feed
+from app.services.face_extraction import extraction_pool, stored_image_embedder
+from app.services.face_scan import scan_worker_pool
+from app.services.reembedding import reembedding_job
+from app.services.sharded_index import sharded_face_index
 
 # Create FastAPI app
 app = FastAPI(
@@ -22,6 +35,28 @@ def on_startup():
     # Create all tables in the database
     SQLModel.metadata.create_all(engine)
     FileStorageManager.initialize()
+    if settings.FACE_CHANGE_FEED_ENABLED:
+        face_change_feed.start()
+    if settings.FACE_REEMBED_ENABLED:
+        reembedding_job.start()
+    if settings.FACE_DUPLICATE_CHECK_ENABLED:
+        duplicate_checker.start()
+    if settings.FACE_SCAN_ENABLED:
+        scan_worker_pool.start()
+    if settings.FACE_EXTRACTOR_BACKEND:
+        extraction_pool.start()
+        stored_image_embedder.start()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    face_change_feed.stop()
+    reembedding_job.stop()
+    duplicate_checker.stop()
+    sharded_face_index.stop()
+    scan_worker_pool.stop()
+    stored_image_embedder.stop()
+    extraction_pool.stop()
 
 # Add CORS middleware
 app.add_middleware(
@@ -32,6 +67,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Stop oversized uploads while they stream in, before the form parser spools them
+app.add_middleware(
+    UploadLimitMiddleware,
+    paths=["/api/auth/upload-face-video", "/api/voice/samples"],
+    max_bytes=FileStorageManager.MAX_FILE_SIZE,
+)
+
 # Include API routes
 app.include_router(api_router)
 
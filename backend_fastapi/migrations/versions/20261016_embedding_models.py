@@ -0,0 +1,84 @@
+"""Tag face embeddings with a model version and store other versions side by side
+
+Revision ID: 20261016_embedding_models
+Revises: 20261016_face_data_changes
+Create Date: 2026-10-16 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector
+
+# revision identifiers, used by Alembic.
+revision = "20261016_embedding_models"
+down_revision = "20261016_face_data_changes"
+branch_labels = None
+depends_on = None
+
+# Version of the vectors already in face_data.embedding
+BASE_VERSION = "v1"
+BASE_DIM = 1536
+
+
+def upgrade() -> None:
+    op.create_table(
+        "embedding_models",
+        sa.Column("version", sa.String(32), primary_key=True),
+        sa.Column("dim", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("activated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.execute(
+        f"INSERT INTO embedding_models (version, dim, status, activated_at) "
+        f"VALUES ('{BASE_VERSION}', {BASE_DIM}, 'active', now())"
+    )
+    # A constant default is catalog-only on PostgreSQL 11+: no table rewrite
+    op.add_column(
+        "face_data",
+        sa.Column("embedding_model", sa.String(32), server_default=BASE_VERSION, nullable=True),
+    )
+    op.create_table(
+        "face_embeddings",
+        sa.Column(
+            "face_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("face_data.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("model_version", sa.String(32), sa.ForeignKey("embedding_models.version"), primary_key=True),
+        sa.Column("embedding", Vector(), nullable=False),
+        sa.Column("embedding_norm", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION face_embeddings_publish_changes() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO face_data_changes (face_id, user_id, op)
+            SELECT n.face_id, f.user_id, 'U' FROM new_rows n JOIN face_data f ON f.id = n.face_id;
+            PERFORM pg_notify('face_data_changes', '');
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for event in ("insert", "update"):
+        op.execute(
+            f"""
+            CREATE TRIGGER face_embeddings_changes_{event} AFTER {event.upper()} ON face_embeddings
+                REFERENCING NEW TABLE AS new_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION face_embeddings_publish_changes()
+            """
+        )
+
+
+def downgrade() -> None:
+    for event in ("insert", "update"):
+        op.execute(f"DROP TRIGGER IF EXISTS face_embeddings_changes_{event} ON face_embeddings")
+    op.execute("DROP FUNCTION IF EXISTS face_embeddings_publish_changes()")
+    # Dropping the table also drops the per-version partial indexes
+    op.drop_table("face_embeddings")
+    op.drop_column("face_data", "embedding_model")
+    op.drop_table("embedding_models")
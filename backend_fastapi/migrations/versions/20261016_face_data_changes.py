@@ -0,0 +1,62 @@
+"""Publish face_data writes to a change feed table with NOTIFY
+
+Revision ID: 20261016_face_data_changes
+Revises: 20261016_normalize_face_embeddings
+Create Date: 2026-10-16 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20261016_face_data_changes"
+down_revision = "20261016_normalize_face_embeddings"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "face_data_changes",
+        sa.Column("seq", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("face_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("op", sa.String(1), nullable=False),
+        sa.Column("changed_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    op.create_index("ix_face_data_changes_changed_at", "face_data_changes", ["changed_at"], unique=False)
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION face_data_publish_changes() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO face_data_changes (face_id, user_id, op)
+                SELECT id, user_id, 'D' FROM old_rows;
+            ELSE
+                INSERT INTO face_data_changes (face_id, user_id, op)
+                SELECT id, user_id, 'U' FROM new_rows;
+            END IF;
+            PERFORM pg_notify('face_data_changes', '');
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    transitions = {"insert": "NEW TABLE AS new_rows", "update": "NEW TABLE AS new_rows", "delete": "OLD TABLE AS old_rows"}
+    for event, transition in transitions.items():
+        op.execute(
+            f"""
+            CREATE TRIGGER face_data_changes_{event} AFTER {event.upper()} ON face_data
+                REFERENCING {transition}
+                FOR EACH STATEMENT EXECUTE FUNCTION face_data_publish_changes()
+            """
+        )
+
+
+def downgrade() -> None:
+    for event in ("insert", "update", "delete"):
+        op.execute(f"DROP TRIGGER IF EXISTS face_data_changes_{event} ON face_data")
+    op.execute("DROP FUNCTION IF EXISTS face_data_publish_changes()")
+    op.drop_index("ix_face_data_changes_changed_at", table_name="face_data_changes")
+    op.drop_table("face_data_changes")
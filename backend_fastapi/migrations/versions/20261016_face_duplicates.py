@@ -0,0 +1,54 @@
+"""Add face_duplicates review table for enrollment-time duplicate checks
+
+Revision ID: 20261016_face_duplicates
+Revises: 20261016_embedding_models
+Create Date: 2026-10-16 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20261016_face_duplicates"
+down_revision = "20261016_embedding_models"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "face_duplicates",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column(
+            "face_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("face_data.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column(
+            "matched_face_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("face_data.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "matched_user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("reviewed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint("face_id", "matched_user_id", name="uq_face_duplicates_face_matched_user"),
+    )
+    op.create_index("ix_face_duplicates_user_id", "face_duplicates", ["user_id"], unique=False)
+    op.create_index("ix_face_duplicates_matched_user_id", "face_duplicates", ["matched_user_id"], unique=False)
+    op.create_index("ix_face_duplicates_status", "face_duplicates", ["status"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_face_duplicates_status", table_name="face_duplicates")
+    op.drop_index("ix_face_duplicates_matched_user_id", table_name="face_duplicates")
+    op.drop_index("ix_face_duplicates_user_id", table_name="face_duplicates")
+    op.drop_table("face_duplicates")
@@ -0,0 +1,32 @@
+"""Add HNSW index on face_data.embedding for 1:N identification
+
+Revision ID: 20261016_face_embedding_hnsw
+Revises: remove_zoho_id_from_users
+Create Date: 2026-10-16 00:00:00
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261016_face_embedding_hnsw"
+down_revision = "remove_zoho_id_from_users"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    # Cosine ops: identification ranks by cosine distance and reports the
+    # inner product alongside, so a single graph serves both scores.
+    op.create_index(
+        "ix_face_data_embedding_hnsw",
+        "face_data",
+        ["embedding"],
+        postgresql_using="hnsw",
+        postgresql_with={"m": 16, "ef_construction": 64},
+        postgresql_ops={"embedding": "vector_cosine_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_face_data_embedding_hnsw", table_name="face_data")
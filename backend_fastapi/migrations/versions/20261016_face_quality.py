@@ -0,0 +1,23 @@
+"""Add face_data.quality_score for upload-time frame quality gating
+
+Revision ID: 20261016_face_quality
+Revises: 20261016_scan_jobs
+Create Date: 2026-10-16 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261016_face_quality"
+down_revision = "20261016_scan_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("face_data", sa.Column("quality_score", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("face_data", "quality_score")
@@ -0,0 +1,66 @@
+"""Add face_templates table of per-user (and per-pose) enrollment centroids
+
+Revision ID: 20261016_face_templates
+Revises: 20261016_face_embedding_hnsw
+Create Date: 2026-10-16 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector
+
+# revision identifiers, used by Alembic.
+revision = "20261016_face_templates"
+down_revision = "20261016_face_embedding_hnsw"
+branch_labels = None
+depends_on = None
+
+EMBEDDING_DIM = 1536
+
+
+def upgrade() -> None:
+    op.create_table(
+        "face_templates",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("face_type", sa.String(), nullable=False),
+        sa.Column("embedding", Vector(EMBEDDING_DIM), nullable=False),
+        sa.Column("embedding_sum", Vector(EMBEDDING_DIM), nullable=False),
+        sa.Column("frame_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.UniqueConstraint("user_id", "face_type", name="uq_face_templates_user_pose"),
+    )
+    op.create_index("ix_face_templates_user_id", "face_templates", ["user_id"], unique=False)
+    op.create_index(
+        "ix_face_templates_embedding_hnsw",
+        "face_templates",
+        ["embedding"],
+        postgresql_using="hnsw",
+        postgresql_with={"m": 16, "ef_construction": 64},
+        postgresql_ops={"embedding": "vector_cosine_ops"},
+    )
+    # Backfill templates from frames enrolled before this table existed. Both the
+    # overall and the per-pose templates are written whatever FACE_TEMPLATE_PER_POSE
+    # says, so the result does not depend on who runs the migration; identify only
+    # reads the overall one.
+    op.execute(
+        """
+        INSERT INTO face_templates (id, user_id, face_type, embedding, embedding_sum, frame_count)
+        SELECT gen_random_uuid(), user_id, pose, l2_normalize(total), total, n
+        FROM (
+            SELECT user_id, 'all' AS pose, sum(l2_normalize(embedding)) AS total, count(*) AS n
+            FROM face_data WHERE embedding IS NOT NULL GROUP BY user_id
+            UNION ALL
+            SELECT user_id, face_type, sum(l2_normalize(embedding)), count(*)
+            FROM face_data WHERE embedding IS NOT NULL GROUP BY user_id, face_type
+        ) AS frames
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_face_templates_embedding_hnsw", table_name="face_templates")
+    op.drop_index("ix_face_templates_user_id", table_name="face_templates")
+    op.drop_table("face_templates")
@@ -0,0 +1,51 @@
+"""Store face embeddings unit-length with their norm; index by inner product
+
+Revision ID: 20261016_normalize_face_embeddings
+Revises: 20261016_face_templates
+Create Date: 2026-10-16 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261016_normalize_face_embeddings"
+down_revision = "20261016_face_templates"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("face_data", sa.Column("embedding_norm", sa.Float(), nullable=True))
+    # pgvector already rejects NaN/Inf; zero vectors can't be normalized or ranked
+    op.execute("UPDATE face_data SET embedding = NULL WHERE vector_norm(embedding) = 0")
+    op.execute(
+        """
+        UPDATE face_data
+        SET embedding_norm = vector_norm(embedding), embedding = l2_normalize(embedding)
+        WHERE embedding IS NOT NULL
+        """
+    )
+    op.drop_index("ix_face_data_embedding_hnsw", table_name="face_data")
+    op.create_index(
+        "ix_face_data_embedding_hnsw_ip",
+        "face_data",
+        ["embedding"],
+        postgresql_using="hnsw",
+        postgresql_with={"m": 16, "ef_construction": 64},
+        postgresql_ops={"embedding": "vector_ip_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_face_data_embedding_hnsw_ip", table_name="face_data")
+    op.create_index(
+        "ix_face_data_embedding_hnsw",
+        "face_data",
+        ["embedding"],
+        postgresql_using="hnsw",
+        postgresql_with={"m": 16, "ef_construction": 64},
+        postgresql_ops={"embedding": "vector_cosine_ops"},
+    )
+    # Embeddings stay unit-length; cosine ranking is unaffected by the lost norms
+    op.drop_column("face_data", "embedding_norm")
@@ -0,0 +1,69 @@
+"""Add scan_jobs and scan_matches for suspect media scanning
+
+Revision ID: 20261016_scan_jobs
+Revises: 20261016_face_duplicates
+Create Date: 2026-10-16 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20261016_scan_jobs"
+down_revision = "20261016_face_duplicates"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scan_jobs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("content_id", sa.String(), nullable=False),
+        sa.Column(
+            "submitted_by",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        sa.Column("source", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("frames", sa.Integer(), nullable=False),
+        sa.Column("frames_path", sa.String(), nullable=False),
+        sa.Column("model_version", sa.String(length=32), nullable=True),
+        sa.Column("threshold", sa.Float(), nullable=False),
+        sa.Column("matches", sa.Integer(), nullable=True),
+        sa.Column("scan_seconds", sa.Float(), nullable=True),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_scan_jobs_content_id", "scan_jobs", ["content_id"], unique=False)
+    op.create_index("ix_scan_jobs_status", "scan_jobs", ["status"], unique=False)
+    op.create_table(
+        "scan_matches",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column(
+            "job_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("scan_jobs.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column(
+            "face_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("face_data.id", ondelete="SET NULL"), nullable=True
+        ),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("best_frame", sa.Integer(), nullable=False),
+        sa.Column("frames_matched", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.UniqueConstraint("job_id", "user_id", name="uq_scan_matches_job_user"),
+    )
+    op.create_index("ix_scan_matches_user_id", "scan_matches", ["user_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_scan_matches_user_id", table_name="scan_matches")
+    op.drop_table("scan_matches")
+    op.drop_index("ix_scan_jobs_status", table_name="scan_jobs")
+    op.drop_index("ix_scan_jobs_content_id", table_name="scan_jobs")
+    op.drop_table("scan_jobs")
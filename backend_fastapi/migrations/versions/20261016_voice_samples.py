@@ -0,0 +1,43 @@
+"""Add voice_samples for voice enrollment uploads
+
+Revision ID: 20261016_voice_samples
+Revises: 20261016_face_quality
+Create Date: 2026-10-16 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20261016_voice_samples"
+down_revision = "20261016_face_quality"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "voice_samples",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("file_path", sa.String(), nullable=False),
+        sa.Column("pcm_path", sa.String(), nullable=False),
+        sa.Column("sample_rate", sa.Integer(), nullable=False),
+        sa.Column("source_sample_rate", sa.Integer(), nullable=False),
+        sa.Column("channels", sa.Integer(), nullable=False),
+        sa.Column("duration_seconds", sa.Float(), nullable=False),
+        sa.Column("rms", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+    )
+    op.create_index("ix_voice_samples_user_id", "voice_samples", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_voice_samples_user_id", table_name="voice_samples")
+    op.drop_table("voice_samples")
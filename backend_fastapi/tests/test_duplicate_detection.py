@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+from uuid import uuid4
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from app.api import faces
+from app.api.deps import get_current_operator
+from app.services.duplicate_detection import DuplicateChecker, EnrolledFace
+from app.services.face_index import FaceIndex
+
+
+def _capture_flags(monkeypatch):
+    written = []
+    monkeypatch.setattr(
+        "app.crud.face_duplicate.add_duplicates", lambda session, rows: written.extend(rows) or len(rows)
+    )
+    return written
+
+
+def test_check_flags_other_users_above_threshold_with_one_batched_search(monkeypatch):
+    index = FaceIndex(dim=3)
+    index._loaded = True
+    uploader, twin, stranger = uuid4(), uuid4(), uuid4()
+    new_face, twin_face = uuid4(), uuid4()
+    probe = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+    index.add(new_face, uploader, "straight", probe)
+    index.add(twin_face, twin, "left", [0.95, 0.3, 0.0])
+    index.add(uuid4(), stranger, "straight", [0.0, 1.0, 0.0])
+    searches = []
+    original = index.search_batch
+    monkeypatch.setattr(index, "search_batch", lambda q, k: searches.append(len(q)) or original(q, k))
+    monkeypatch.setattr("app.services.duplicate_detection.embedding_versions.loaded_index", lambda version: index)
+    written = _capture_flags(monkeypatch)
+    checker = DuplicateChecker(threshold=0.9, top_k=3)
+
+    other = EnrolledFace(uuid4(), stranger, np.array([0.0, 0.0, 1.0], dtype=np.float32), None)
+    flagged = checker.check(None, [EnrolledFace(new_face, uploader, probe, None), other])
+
+    assert searches == [2]
+    assert [(f["face_id"], f["matched_face_id"], f["matched_user_id"]) for f in flagged] == [
+        (new_face, twin_face, twin)
+    ]
+    assert written == flagged
+    assert checker.stats()["checked"] == 2 and checker.stats()["flagged"] == 1
+
+
+def test_check_without_exact_index_uses_ann_and_skips_own_frames(monkeypatch):
+    uploader, twin = uuid4(), uuid4()
+    twin_face = uuid4()
+    rows = [
+        SimpleNamespace(id=uuid4(), user_id=uploader, face_type="straight", score=1.0, inner_product=1.0),
+        SimpleNamespace(id=uuid4(), user_id=uploader, face_type="left", score=0.97, inner_product=0.97),
+        SimpleNamespace(id=twin_face, user_id=twin, face_type="right", score=0.93, inner_product=0.93),
+        SimpleNamespace(id=uuid4(), user_id=twin, face_type="left", score=0.91, inner_product=0.91),
+    ]
+    monkeypatch.setattr("app.services.duplicate_detection.embedding_versions.loaded_index", lambda version: None)
+    monkeypatch.setattr("app.crud.face.search_similar_faces", lambda session, embedding, **kwargs: rows)
+    _capture_flags(monkeypatch)
+
+    flagged = DuplicateChecker(threshold=0.9).check(None, [EnrolledFace(uuid4(), uploader, np.ones(4), None)])
+
+    assert [(f["matched_face_id"], f["score"]) for f in flagged] == [(twin_face, 0.93)]
+
+
+def test_next_batch_drains_up_to_batch_size():
+    checker = DuplicateChecker(batch_size=3, batch_wait=0.01)
+    assert checker.submit(uuid4(), uuid4(), np.ones(4)) is False  # not started: nothing queued
+    for _ in range(5):
+        checker._queue.put(EnrolledFace(uuid4(), uuid4(), np.ones(4), None))
+
+    assert [len(checker._next_batch()) for _ in range(2)] == [3, 2]
+
+
+def test_duplicate_review_is_limited_to_operators(monkeypatch):
+    operator, member = SimpleNamespace(id=uuid4()), SimpleNamespace(id=uuid4())
+    monkeypatch.setattr("app.api.deps.settings.OPERATOR_USER_IDS", [str(operator.id).upper()])
+
+    assert get_current_operator(operator) is operator
+    with pytest.raises(HTTPException) as denied:
+        get_current_operator(member)
+    assert denied.value.status_code == 403
+    for endpoint in (faces.list_face_duplicates, faces.review_face_duplicate):
+        routes = [r for r in faces.router.routes if getattr(r, "endpoint", None) is endpoint]
+        assert get_current_operator in [d.call for d in routes[0].dependant.dependencies]
@@ -0,0 +1,161 @@
+import threading
+from types import SimpleNamespace
+from uuid import UUID
+import numpy as np
+import pytest
+from pydantic import ValidationError
+from app.api import faces
+from app.api.deps import get_current_operator
+from app.crud import embedding_model as model_crud
+from app.models.embedding_model import MODEL_ACTIVE, MODEL_BACKFILLING
+from app.services import embedding_versions as versions_module
+from app.services.embedding_versions import EmbeddingVersions, ModelVersion
+from app.services.face_changes import FaceChangeFeed
+from app.services.face_index import FaceIndex
+from app.services.reembedding import ReembeddingJob
+
+
+class _Session:
+    def __init__(self):
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+
+def _fake_models(monkeypatch, faces, stored, activated):
+    """face_data as {id: file_path}; stored/activated collect the writes."""
+
+    def missing(session, version, after_id, limit):
+        ids = sorted(f for f in faces if f not in stored and (after_id is None or f > after_id))
+        return [SimpleNamespace(id=f, file_path=faces[f]) for f in ids[:limit]]
+
+    def upsert(session, version, face_ids, units, norms):
+        stored.update(zip(face_ids, units))
+
+    monkeypatch.setattr("app.crud.embedding_model.get_faces_missing_embedding", missing)
+    monkeypatch.setattr("app.crud.embedding_model.upsert_face_embeddings", upsert)
+    monkeypatch.setattr("app.crud.embedding_model.activate_model", lambda session, version: activated.append(version))
+
+
+def test_reembedding_backfills_in_batches_then_activates(monkeypatch):
+    faces = {UUID(int=i): f"face-{i}.jpg" for i in range(1, 6)}
+    stored, activated = {}, []
+    _fake_models(monkeypatch, faces, stored, activated)
+    job = ReembeddingJob(batch_size=2, pause_seconds=0, retry_seconds=0)
+    job.register_embedder("v2", lambda paths: np.ones((len(paths), 3)) * 2)
+    model = SimpleNamespace(version="v2", dim=3, status=MODEL_BACKFILLING)
+    session = _Session()
+
+    assert [job._step(session, model) for _ in range(3)] == [2, 2, 1]
+    assert activated == []  # queries stay on the old version mid-backfill
+    assert job._step(session, model) == 0  # end of pass
+    job._step(session, model)  # a clean pass from the start: full coverage
+    assert activated == ["v2"]
+    assert set(stored) == set(faces)
+    assert np.allclose(stored[UUID(int=1)], np.ones(3) / np.sqrt(3))
+    assert session.commits == 3
+
+
+def test_reembedding_isolates_bad_images_and_blocks_cutover(monkeypatch):
+    faces = {UUID(int=i): f"face-{i}.jpg" for i in range(1, 4)}
+    stored, activated = {}, []
+    _fake_models(monkeypatch, faces, stored, activated)
+
+    def embedder(paths):
+        if "face-2.jpg" in paths:
+            raise OSError("unreadable image")
+        return np.ones((len(paths), 3))
+
+    job = ReembeddingJob(batch_size=10, pause_seconds=0, retry_seconds=3600)
+    job.register_embedder("v2", embedder)
+    model = SimpleNamespace(version="v2", dim=3, status=MODEL_BACKFILLING)
+
+    assert job._step(_Session(), model) == 3
+    assert set(stored) == {UUID(int=1), UUID(int=3)}
+    job._step(_Session(), model)  # pass ends with a failure: wait before retrying
+    assert job._step(_Session(), model) == 0
+    assert activated == []
+    assert job.stats()["v2"] == {"written": 2, "failed": 1, "complete": False}
+
+
+def test_cutover_keeps_serving_old_version_until_new_index_loads(monkeypatch):
+    monkeypatch.setattr(versions_module.face_change_feed, "indexes", [])
+    versions = EmbeddingVersions(refresh_seconds=0)
+    models = [SimpleNamespace(version="v2", dim=4, status=MODEL_ACTIVE)]
+    monkeypatch.setattr("app.crud.embedding_model.get_models", lambda session: models)
+    monkeypatch.setattr("app.crud.embedding_model.get_active_model", lambda session: models[-1])
+    assert versions.current(None) == ModelVersion("v2", 4)
+    old_index = versions.index_for(ModelVersion("v2", 4))
+    old_index._loaded = True
+
+    loading = threading.Event()
+    warmed = []
+
+    def warm(target):
+        loading.wait(5)
+        warmed.append(target)
+        versions._serving = target
+
+    monkeypatch.setattr(versions, "_warm", warm)
+    models.append(SimpleNamespace(version="v3", dim=8, status=MODEL_ACTIVE))
+    assert versions.current(None).version == "v2"
+    assert versions.current(None).version == "v2"  # one warm-up at a time
+    loading.set()
+    versions._warming.join(5)
+    assert warmed == [ModelVersion("v3", 8)]
+    assert versions.current(None).version == "v3"
+    assert versions.resolve(None, "v2") == ModelVersion("v2", 4)
+
+
+def test_change_feed_reads_each_version_for_its_own_index(monkeypatch):
+    base, v2 = FaceIndex(dim=4), FaceIndex(dim=2, model_version="v2")
+    base._loaded = v2._loaded = True
+    user, face = UUID(int=1), UUID(int=2)
+    reads = []
+
+    def get_faces_by_ids(session, ids, model_version=None):
+        reads.append(model_version)
+        dim = 2 if model_version else 4
+        return [SimpleNamespace(id=face, user_id=user, face_type="straight", embedding=np.ones(dim), embedding_norm=1.0)]
+
+    monkeypatch.setattr("app.crud.face.get_faces_by_ids", get_faces_by_ids)
+    FaceChangeFeed([base, v2]).apply(None, [SimpleNamespace(seq=1, face_id=face, user_id=user, op="U")])
+
+    assert sorted(reads, key=str) == [None, "v2"]
+    assert base.size == 1 and v2.size == 1
+
+
+def test_versioned_upload_stores_its_vector_in_face_embeddings(monkeypatch):
+    from app.crud import face as face_crud
+    from app.models.embedding_model import FaceEmbedding
+
+    added = []
+    session = SimpleNamespace(add=added.append, flush=lambda: None, commit=lambda: None, refresh=lambda row: None)
+    ignore = SimpleNamespace(add=lambda *args, **kwargs: None, bump=lambda: None, invalidate=lambda user_id: None)
+    for name in ("embedding_versions", "identify_cache", "user_face_cache"):
+        monkeypatch.setattr(face_crud, name, ignore)
+    monkeypatch.setattr(face_crud.duplicate_checker, "submit", lambda *args, **kwargs: None)
+    monkeypatch.setattr(face_crud.face_retention, "prune_after_write", lambda *args: None)
+
+    face_crud.create_face_record(
+        session, "00000000-0000-0000-0000-000000000001", "left", "a.jpg", "a.jpg",
+        embedding=np.full(8, 2.0), model_version="v2", dim=8,
+    )
+
+    face, version_row = added
+    assert face.embedding is None and face.embedding_model == "v2"
+    assert isinstance(version_row, FaceEmbedding) and version_row.model_version == "v2"
+    assert version_row.embedding is not None and np.isclose(np.linalg.norm(version_row.embedding), 1.0)
+    assert np.isclose(version_row.embedding_norm, 2.0 * np.sqrt(8))
+
+
+def test_model_registration_is_operator_only_and_capped_at_the_hnsw_limit():
+    routes = [r for r in faces.router.routes if getattr(r, "endpoint", None) is faces.register_embedding_model]
+    assert get_current_operator in [d.call for d in routes[0].dependant.dependencies]
+    faces.EmbeddingModelCreate(version="v2", dim=model_crud.MAX_INDEXED_DIM)
+    with pytest.raises(ValidationError):
+        faces.EmbeddingModelCreate(version="v2", dim=model_crud.MAX_INDEXED_DIM + 1)
+    # Rejected before any DDL is issued
+    with pytest.raises(ValueError):
+        model_crud.register_model(None, "v2", model_crud.MAX_INDEXED_DIM + 1)
@@ -0,0 +1,76 @@
+import base64
+import json
+import numpy as np
+import pytest
+from app.services.embeddings import EmbeddingDecodeError, InvalidEmbeddingError, decode_embedding, prepare_embedding, prepare_embeddings
+
+
+def test_decode_embedding_encodings_agree():
+    vector = np.linspace(-1, 1, 8, dtype=np.float32)
+    raw = vector.astype("<f4").tobytes()
+
+    from_json = decode_embedding(json.dumps(vector.tolist()), "json")
+    from_base64 = decode_embedding(base64.b64encode(raw).decode(), "base64", dim=8)
+    from_binary = decode_embedding(raw, "binary", dim=8)
+    from_half = decode_embedding(vector.astype("<f2").tobytes(), "binary", "float16", dim=8)
+
+    assert from_binary.dtype == np.float32
+    np.testing.assert_array_equal(from_json, vector)
+    np.testing.assert_array_equal(from_base64, vector)
+    np.testing.assert_array_equal(from_binary, vector)
+    np.testing.assert_allclose(from_half, vector, atol=1e-3)
+
+
+def test_decode_embedding_rejects_wrong_size():
+    with pytest.raises(EmbeddingDecodeError):
+        decode_embedding(b"\x00" * 10, "binary", dim=8)
+    with pytest.raises(EmbeddingDecodeError):
+        decode_embedding(b"\x00" * 32, "binary", "float64", dim=8)
+    # A text field sent with binary encoding, e.g. the embedding_file part left out
+    with pytest.raises(EmbeddingDecodeError, match="requires embedding_file"):
+        decode_embedding("\x00" * 32, "binary", dim=8)
+
+
+def test_prepare_embeddings_normalizes_and_keeps_norms():
+    vectors = np.array([[3.0, 4.0, 0.0, 0.0], [0.0, 0.0, 0.0, 2.0]], dtype=np.float32)
+    unit, norms = prepare_embeddings(vectors, dim=4)
+
+    np.testing.assert_allclose(norms, [5.0, 2.0])
+    np.testing.assert_allclose(np.linalg.norm(unit, axis=1), 1.0, rtol=1e-6)
+    np.testing.assert_allclose(unit[0], [0.6, 0.8, 0.0, 0.0], rtol=1e-6)
+
+
+@pytest.mark.parametrize(
+    "vector",
+    [
+        [0.0, 0.0, 0.0, 0.0],
+        [1.0, float("nan"), 0.0, 0.0],
+        [1.0, float("inf"), 0.0, 0.0],
+        [1.0, 2.0, 3.0],
+    ],
+)
+def test_prepare_embedding_rejects_invalid_vectors(vector):
+    with pytest.raises(InvalidEmbeddingError):
+        prepare_embedding(vector, dim=4)
+
+
+def test_create_face_record_stores_the_unit_vector(monkeypatch):
+    from types import SimpleNamespace
+    from app.crud import face as face_crud
+
+    added = []
+    session = SimpleNamespace(add=added.append, commit=lambda: None, refresh=lambda row: None)
+    ignore = SimpleNamespace(add=lambda *args, **kwargs: None, bump=lambda: None, invalidate=lambda user_id: None)
+    for name in ("face_index", "quantized_face_index", "sharded_face_index", "identify_cache", "user_face_cache"):
+        monkeypatch.setattr(face_crud, name, ignore)
+    monkeypatch.setattr(face_crud.template_crud, "add_frame_to_templates", lambda *args: None)
+    monkeypatch.setattr(face_crud.duplicate_checker, "submit", lambda *args, **kwargs: None)
+    monkeypatch.setattr(face_crud.face_retention, "prune_after_write", lambda *args: None)
+
+    face = face_crud.create_face_record(
+        session, "00000000-0000-0000-0000-000000000001", "straight", "a.jpg", "a.jpg", embedding=np.full(1536, 3.0)
+    )
+
+    assert added == [face]
+    assert face.embedding is not None and np.isclose(np.linalg.norm(face.embedding), 1.0)
+    assert np.isclose(face.embedding_norm, 3.0 * np.sqrt(1536))
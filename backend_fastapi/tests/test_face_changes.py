@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+from uuid import uuid4
+import numpy as np
+from app.services.face_changes import FaceChangeFeed
+from app.services.face_index import FaceIndex
+
+
+def _change(seq, face_id, user_id, op="U"):
+    return SimpleNamespace(seq=seq, face_id=face_id, user_id=user_id, op=op)
+
+
+def test_apply_upserts_current_rows_and_removes_deleted(monkeypatch):
+    index = FaceIndex(dim=4)
+    index._loaded = True
+    user = uuid4()
+    kept, deleted, cleared = uuid4(), uuid4(), uuid4()
+    index.add(deleted, user, "straight", np.ones(4))
+    index.add(cleared, user, "left", -np.ones(4))
+    rows = [
+        SimpleNamespace(id=kept, user_id=user, face_type="right", embedding=np.eye(4)[0], embedding_norm=2.0),
+        SimpleNamespace(id=cleared, user_id=user, face_type="left", embedding=None, embedding_norm=None),
+    ]
+    monkeypatch.setattr("app.crud.face.get_faces_by_ids", lambda session, ids: [r for r in rows if r.id in ids])
+    feed = FaceChangeFeed([index])
+
+    changes = [
+        _change(1, kept, user),
+        _change(2, deleted, user),
+        _change(3, deleted, user, "D"),
+        _change(4, cleared, user),
+    ]
+    feed.apply(None, changes)
+
+    assert index.size == 1
+    hit = index.search(np.eye(4)[0], 1)[0]
+    assert hit.face_id == kept
+    assert abs(hit.inner_product - 2.0) < 1e-6
+
+
+def test_advance_tracks_and_expires_gaps():
+    feed = FaceChangeFeed([], gap_seconds=60)
+    feed.last_seq = 10
+    feed._advance([11, 14])
+    assert feed.last_seq == 14
+    assert set(feed._gaps) == {12, 13}
+    feed._advance([12])
+    assert set(feed._gaps) == {13}
+    feed.gap_seconds = 0
+    feed._advance([])
+    assert feed._gaps == {}
+    assert feed.last_seq == 14
+
+
+def test_run_waits_on_the_listening_connection(monkeypatch):
+    import contextlib
+    import os
+
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b"x")  # a pending NOTIFY
+    feed = FaceChangeFeed([], poll_seconds=5)
+    errors, closed = [], []
+
+    class Conn:
+        def __init__(self):
+            self.notifies = ["face_data_changes"]
+
+        def fileno(self):
+            return read_fd
+
+        def cursor(self):
+            return SimpleNamespace(execute=lambda sql: None)
+
+        def poll(self):
+            feed._stop.set()
+
+    raw = SimpleNamespace(driver_connection=Conn(), detach=lambda: None, close=lambda: closed.append(True))
+    monkeypatch.setattr("app.services.face_changes.engine.raw_connection", lambda: raw)
+    monkeypatch.setattr("app.services.face_changes.SessionLocal", lambda: contextlib.nullcontext(None))
+    monkeypatch.setattr(
+        "app.services.face_changes.logger.error", lambda message: errors.append(message) or feed._stop.set()
+    )
+    monkeypatch.setattr(feed, "poll", lambda session: 0)
+    monkeypatch.setattr(feed, "_prune", lambda session: None)
+    try:
+        feed._run()
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+
+    assert errors == []
+    assert closed == [True] and raw.driver_connection.notifies == []
@@ -0,0 +1,57 @@
+import numpy as np
+from app.services.face_evaluation import (
+    error_rates,
+    evaluate,
+    genuine_histogram,
+    impostor_histogram,
+    plan_blocks,
+)
+
+
+def _faces(users=30, frames=4, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(users, dim))
+    labels = np.repeat(np.arange(users), frames)
+    vectors = centers[labels] + 0.6 * rng.normal(size=(len(labels), dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    order = rng.permutation(len(labels))
+    return vectors[order].astype(np.float32), labels[order]
+
+
+def test_blockwise_histograms_match_all_pairs():
+    vectors, labels = _faces()
+    bins = 200
+    scores = vectors @ vectors.T
+    i, j = np.triu_indices(len(labels), k=1)
+    same = labels[i] == labels[j]
+    edges = np.linspace(-1, 1, bins + 1)
+    expected_genuine = np.histogram(scores[i, j][same], edges)[0]
+    expected_impostor = np.histogram(scores[i, j][~same], edges)[0]
+
+    blocks, fraction = plan_blocks(len(labels), 16, None)
+    assert fraction == 1.0
+    assert np.array_equal(genuine_histogram(vectors, labels, bins), expected_genuine)
+    assert np.array_equal(impostor_histogram(vectors, labels, blocks, 16, bins), expected_impostor)
+
+
+def test_sampled_blocks_and_error_rates():
+    vectors, labels = _faces(users=60)
+    blocks, fraction = plan_blocks(len(labels), 16, max_pairs=4 * 16 * 16, seed=1)
+    assert len(blocks) == 4 and 0 < fraction < 1
+    assert all(row <= col for row, col in blocks)
+
+    result = evaluate(vectors, labels, block_size=16, bins=400)
+    assert result["genuine_pairs"] == 60 * 6
+    assert result["impostor_pairs"] == len(labels) * (len(labels) - 1) // 2 - 60 * 6
+    assert 0 <= result["eer"] < 0.5
+    assert np.all(np.diff(result["far"]) <= 0) and np.all(np.diff(result["frr"]) >= 0)
+
+
+def test_error_rates_separable_scores_have_zero_eer():
+    genuine = np.zeros(10, dtype=np.int64)
+    impostor = np.zeros(10, dtype=np.int64)
+    genuine[8] = 5
+    impostor[2] = 50
+    rates = error_rates(genuine, impostor)
+    assert rates["eer"] == 0.0
+    assert -0.6 < rates["eer_threshold"] <= 0.6
@@ -0,0 +1,90 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+from uuid import uuid4
+import numpy as np
+import pytest
+from app.services.face_extraction import ExtractionPool, HashExtractor, StoredImageEmbedder
+
+
+def test_hash_extractor_is_deterministic_per_image():
+    extractor = HashExtractor("v1", dim=32)
+
+    first = extractor.embed([b"face-a", b"face-b"])
+    again = extractor.embed([b"face-a"])
+
+    assert first.shape == (2, 32) and first.dtype == np.float32
+    assert np.array_equal(first[0], again[0])
+    assert not np.allclose(first[0], first[1])
+    with pytest.raises(ValueError):
+        extractor.preprocess(b"")
+
+
+def test_pool_batches_requests_and_fails_bad_images_alone(tmp_path):
+    stored = tmp_path / "face.jpg"
+    stored.write_bytes(b"stored-face")
+    pool = ExtractionPool(backend="hash", version="v1", dim=16, workers=1, max_batch=8, max_wait_ms=50)
+    pool.start()
+    try:
+        images = [f"frame-{i}".encode() for i in range(12)]
+        futures = [pool.submit(image) for image in images]
+        bad = pool.submit(b"")
+        from_path = pool.embed([str(stored)])
+        vectors = np.stack([future.result(timeout=60) for future in futures])
+        with pytest.raises(ValueError):
+            bad.result(timeout=60)
+    finally:
+        pool.stop()
+
+    extractor = HashExtractor("v1", dim=16)
+    assert np.array_equal(vectors, extractor.embed(images))
+    assert np.array_equal(from_path[0], extractor.embed([b"stored-face"])[0])
+    stats = pool.stats()
+    assert (stats["embedded"], stats["failed"]) == (13, 1)
+    assert stats["mean_batch_size"] > 1
+
+
+def test_pool_replaces_its_workers_after_one_dies():
+    pool = ExtractionPool(backend="hash", version="v1", dim=16, workers=1, max_batch=4, max_wait_ms=10)
+    pool.start()
+    try:
+        pool.embed([b"warm-up"])
+        for process in pool._executor._processes.values():
+            process.kill()
+        with pytest.raises(BrokenProcessPool):
+            pool.embed([b"in-flight"])
+        # Batches after the crash run on a fresh pool instead of failing forever
+        vector = pool.embed([b"after"])
+    finally:
+        pool.stop()
+
+    assert np.array_equal(vector, HashExtractor("v1", dim=16).embed([b"after"]))
+    assert pool.stats()["worker_pool_restarts"] == 1
+
+
+def test_stored_image_embedder_writes_unit_vectors_and_skips_failures(monkeypatch):
+    ok, missing = uuid4(), uuid4()
+    rows = [SimpleNamespace(id=ok, file_path="ok.jpg"), SimpleNamespace(id=missing, file_path="gone.jpg")]
+    written = {}
+
+    def submit(path):
+        future = Future()
+        if path == "ok.jpg":
+            future.set_result(np.full(1536, 2.0, dtype=np.float32))
+        else:
+            future.set_exception(ValueError("could not decode image"))
+        return future
+
+    def set_face_embeddings(session, face_ids, units, norms):
+        written.update(face_ids=face_ids, units=units, norms=norms)
+        return len(face_ids)
+
+    monkeypatch.setattr("app.crud.face.get_faces_without_embedding", lambda session, after, limit: rows)
+    monkeypatch.setattr("app.crud.face.set_face_embeddings", set_face_embeddings)
+    embedder = StoredImageEmbedder(SimpleNamespace(submit=submit))
+
+    assert embedder.run_once(None) == 2
+    assert written["face_ids"] == [ok]
+    assert np.isclose(np.linalg.norm(written["units"][0]), 1.0)
+    assert np.isclose(written["norms"][0], 2.0 * np.sqrt(1536))
+    assert (embedder.written, embedder.failed, embedder.cursor) == (1, 1, missing)
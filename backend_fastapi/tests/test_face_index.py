@@ -0,0 +1,185 @@
+import tracemalloc
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+import numpy as np
+from app.services.face_index import FaceIndex, face_arrays_from_rows
+
+
+def _index(dim=8):
+    index = FaceIndex(dim=dim)
+    index._loaded = True
+    return index
+
+
+def test_search_returns_best_face_per_user():
+    index = _index()
+    rng = np.random.default_rng(0)
+    users = [uuid4() for _ in range(4)]
+    for i in range(12):
+        index.add(uuid4(), users[i % 4], "straight", rng.normal(size=8))
+    query = rng.normal(size=8)
+
+    hits = index.search(query, 3)
+    assert len(hits) == 3
+    assert len({hit.user_id for hit in hits}) == 3
+    assert [h.score for h in hits] == sorted((h.score for h in hits), reverse=True)
+
+    faces = index.search(query, 12, per_user=False)
+    assert faces[0].score == hits[0].score
+    assert len(faces) == 12
+
+
+def test_add_and_remove_keep_index_in_sync():
+    index = _index()
+    user, other = uuid4(), uuid4()
+    face = uuid4()
+    index.add(face, user, "left", np.ones(8))
+    index.add(uuid4(), other, "right", -np.ones(8))
+    index.add(face, user, "left", np.ones(8))  # upsert, not a duplicate row
+    assert index.size == 2
+
+    index.remove_user(user)
+    assert index.size == 1
+    assert index.search(np.ones(8), 5)[0].user_id == other
+
+
+def test_search_batch_matches_single_probe_search():
+    index = _index(dim=16)
+    rng = np.random.default_rng(1)
+    users = [uuid4() for _ in range(20)]
+    for i in range(200):
+        index.add(uuid4(), users[i % 20], "straight", rng.normal(size=16))
+    probes = rng.normal(size=(9, 16))
+
+    batched = index.search_batch(probes, 5)
+    chunked = [hits for chunk in index.iter_search_batch(probes, 5, batch_size=4) for hits in chunk]
+    assert len(batched) == len(chunked) == 9
+    for probe, hits, chunk_hits in zip(probes, batched, chunked):
+        single = index.search(probe, 5)
+        assert [h.face_id for h in hits] == [h.face_id for h in single]
+        assert [h.face_id for h in chunk_hits] == [h.face_id for h in single]
+
+
+class _NowSession:
+    def exec(self, statement):
+        return SimpleNamespace(one=lambda: datetime.now(timezone.utc))
+
+
+def test_snapshot_round_trip_catches_up_and_drops_deleted(tmp_path, monkeypatch):
+    index = _index()
+    index._watermark = datetime.now(timezone.utc)
+    rng = np.random.default_rng(2)
+    users = [uuid4() for _ in range(3)]
+    faces = [uuid4() for _ in range(6)]
+    for i, face in enumerate(faces):
+        index.add(face, users[i % 3], "straight", rng.normal(size=8))
+    index.save_snapshot(str(tmp_path))
+
+    new_face = SimpleNamespace(
+        id=uuid4(), user_id=users[0], face_type="left", embedding=rng.normal(size=8), embedding_norm=None
+    )
+    monkeypatch.setattr("app.crud.face.get_faces_updated_since", lambda session, since: [new_face])
+    monkeypatch.setattr("app.crud.face.get_embedded_face_ids", lambda session: faces[1:] + [new_face.id])
+
+    warm = FaceIndex(dim=8)
+    assert warm.load_snapshot(_NowSession(), str(tmp_path))
+    assert warm.loaded
+    assert warm.size == 6
+    assert isinstance(warm._view()["_vectors"], np.ndarray)
+    probe = rng.normal(size=8)
+    expected = [h.face_id for h in index.search(probe, 10, per_user=False) if h.face_id != faces[0]]
+    got = [h.face_id for h in warm.search(probe, 10, per_user=False) if h.face_id != new_face.id]
+    assert got == expected
+    assert warm.search(new_face.embedding, 1, per_user=False)[0].face_id == new_face.id
+
+
+def test_removals_keep_snapshot_columns_mapped_and_are_compacted_into_the_next_snapshot(tmp_path, monkeypatch):
+    index = _index()
+    index._watermark = datetime.now(timezone.utc)
+    rng = np.random.default_rng(5)
+    users = [uuid4() for _ in range(5)]
+    faces = [uuid4() for _ in range(10)]
+    for i, face in enumerate(faces):
+        index.add(face, users[i % 5], "straight", rng.normal(size=8))
+    index.save_snapshot(str(tmp_path))
+    monkeypatch.setattr("app.crud.face.get_faces_updated_since", lambda session, since: [])
+    monkeypatch.setattr("app.crud.face.get_embedded_face_ids", lambda session: faces)
+    warm = FaceIndex(dim=8)
+    warm.load_snapshot(_NowSession(), str(tmp_path))
+    mapped = warm._vectors
+
+    warm.remove_faces([faces[0]])
+    warm.remove_user(users[1])
+
+    # Deletions only flag rows: the copy-on-write mapping is neither copied nor written
+    assert warm._vectors is mapped and isinstance(mapped, np.memmap)
+    assert warm.size == 7
+    gone = {faces[0], faces[1], faces[6]}
+    hits = warm.search(rng.normal(size=8), 10, per_user=False)
+    assert len(hits) == 7 and not gone & {h.face_id for h in hits}
+    assert warm.search(index._vectors[1], 5)[0].user_id != users[1]
+
+    monkeypatch.setattr("app.crud.face.get_embedded_face_ids", lambda session: [f for f in faces if f not in gone])
+    warm.save_snapshot(str(tmp_path))
+    fresh = FaceIndex(dim=8)
+    fresh.load_snapshot(_NowSession(), str(tmp_path))
+    assert (fresh.size, fresh._size, fresh._dead) == (7, 7, 0)
+
+
+def test_load_snapshot_without_snapshot_returns_false(tmp_path):
+    index = FaceIndex(dim=8)
+    assert not index.load_snapshot(_NowSession(), str(tmp_path))
+    assert not index.loaded
+
+
+def test_load_arrays_matches_row_by_row_load():
+    rng = np.random.default_rng(3)
+    users = [uuid4() for _ in range(5)]
+    rows = [
+        SimpleNamespace(
+            id=uuid4(),
+            user_id=users[i % 5],
+            face_type=("straight", "left", "right")[i % 3],
+            embedding=rng.normal(size=8),
+            embedding_norm=float(i + 1),
+        )
+        for i in range(20)
+    ]
+    by_rows = FaceIndex(dim=8)
+    by_rows.load_rows(rows)
+    by_arrays = FaceIndex(dim=8)
+    by_arrays.load_arrays([face_arrays_from_rows(rows[:7]), face_arrays_from_rows(rows[7:])], capacity=20)
+
+    assert by_arrays.size == 20 and by_arrays.loaded
+    query = rng.normal(size=8)
+    expected = by_rows.search(query, 20, per_user=False)
+    hits = by_arrays.search(query, 20, per_user=False)
+    assert [(h.face_id, h.user_id, h.face_type) for h in hits] == [(h.face_id, h.user_id, h.face_type) for h in expected]
+    assert np.allclose([h.inner_product for h in hits], [h.inner_product for h in expected], atol=1e-5)
+    by_arrays.remove_faces([rows[0].id])
+    assert by_arrays.size == 19
+
+
+def test_stats_memory_includes_the_face_id_lookup():
+    rng = np.random.default_rng(6)
+    rows = [
+        SimpleNamespace(
+            id=uuid4(), user_id=uuid4(), face_type="straight", embedding=rng.normal(size=8), embedding_norm=None
+        )
+        for _ in range(5000)
+    ]
+    chunk = face_arrays_from_rows(rows)
+    index = FaceIndex(dim=8)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        index.load_arrays([chunk], capacity=len(rows))
+        measured = (tracemalloc.get_traced_memory()[0] - before) / len(rows)
+    finally:
+        tracemalloc.stop()
+
+    bytes_per_vector = index.stats()["bytes_per_vector"]
+    # The columns alone are 8 * 4 + 38 bytes; the dict more than doubles that
+    assert bytes_per_vector > 2 * (8 * 4 + 38)
+    assert abs(bytes_per_vector - measured) < 0.1 * measured
@@ -0,0 +1,83 @@
+import io
+import numpy as np
+from PIL import Image
+from app.services import face_extraction
+from app.services.face_preprocessing import (
+    ARCFACE_TEMPLATE,
+    PreprocessPool,
+    crop_transforms,
+    decode_image,
+    preprocess_batch,
+    warp_batch,
+)
+
+
+def _jpeg(width, height, seed=0):
+    pixels = np.random.default_rng(seed).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def test_landmark_alignment_recovers_similarity_transform():
+    angles, scales = np.array([0.0, 0.4, -1.2]), np.array([1.0, 2.5, 0.7])
+    shifts = np.array([[0.0, 0.0], [100.0, 80.0], [-5.0, 40.0]])
+    rotations = np.stack([[[np.cos(a), -np.sin(a)], [np.sin(a), np.cos(a)]] for a in angles]) * scales[:, None, None]
+    landmarks = np.einsum("nij,kj->nki", rotations, ARCFACE_TEMPLATE) + shifts[:, None]
+
+    matrices = crop_transforms(np.full((3, 2), 640), 112, landmarks=landmarks)
+
+    assert np.allclose(matrices[:, :, :2], rotations)
+    assert np.allclose(matrices[:, :, 2], shifts)
+
+
+def test_warp_batch_resamples_images_of_different_sizes_at_once():
+    first = (np.arange(200 * 300 * 3).reshape(200, 300, 3) % 251).astype(np.uint8)
+    second = (np.arange(60 * 40 * 3).reshape(60, 40, 3) % 7).astype(np.uint8)
+    matrices = np.array([[[1, 0, 10], [0, 1, 20]], [[2, 0, 0], [0, 2, 0]]], dtype=np.float64)
+
+    crops = warp_batch([first, second], matrices, 32)
+
+    assert np.allclose(crops[0], first[20:52, 10:42])
+    # Halving lands each crop pixel between four source pixels: their average
+    assert np.allclose(crops[1, 0, 0], second[0:2, 0:2].astype(np.float32).mean(axis=(0, 1)))
+
+
+def test_large_jpeg_decodes_at_reduced_size_and_bad_images_fail_alone():
+    data = _jpeg(1600, 2000)
+    matrix = crop_transforms([[1600, 2000]], 112)[0]
+
+    pixels, adjusted = decode_image(data, matrix)
+    inputs, errors = preprocess_batch([data, b"not an image"], 112)
+
+    assert pixels.shape == (250, 200, 3)
+    assert np.isclose(adjusted[0, 0], 200 / 112)
+    assert inputs.shape == (2, 3, 112, 112)
+    assert errors[0] is None and errors[1].startswith("could not decode")
+    assert np.abs(inputs[0]).max() <= 1.0 and not inputs[1].any()
+
+
+class _PixelExtractor:
+    def infer(self, batch):
+        return batch.reshape(len(batch), -1)[:, :4].copy()
+
+
+def test_preprocess_pool_fills_shared_buffer_read_by_inference(monkeypatch):
+    images = [_jpeg(120, 90, seed) for seed in range(5)] + [b""]
+    pool = PreprocessPool(size=32, workers=2, max_batch=8, slots=1)
+    pool.start()
+    try:
+        batch = pool.submit(images).result(timeout=60)
+        expected, errors = preprocess_batch(images, 32)
+        assert [error is None for error in batch.errors] == [error is None for error in errors]
+        assert np.allclose(batch.pixels, expected, atol=1e-5)
+
+        monkeypatch.setattr(face_extraction, "_worker_extractor", _PixelExtractor())
+        results, _ = face_extraction._embed_shared(batch.slot.name, batch.buffer_shape, batch.errors)
+        batch.release()
+        assert pool.stats()["free_buffers"] == 1
+    finally:
+        pool.stop()
+
+    assert all(np.allclose(result, expected[i].reshape(-1)[:4]) for i, result in enumerate(results[:5]))
+    assert isinstance(results[5], str)
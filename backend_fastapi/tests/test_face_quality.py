@@ -0,0 +1,50 @@
+import io
+import numpy as np
+import pytest
+from PIL import Image, ImageFilter
+from app.services.face_quality import assess_frame, exposure_score, laplacian_variance, parse_box
+
+
+def _jpeg(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def _pattern(width=800, height=600, scale=1.0):
+    y, x = np.mgrid[0:height, 0:width]
+    gray = 128 + 90 * np.sin(x / 9.0) * np.cos(y / 11.0)
+    return Image.fromarray(np.clip(gray * scale, 0, 255).astype(np.uint8)).convert("RGB")
+
+
+def test_sharp_frame_passes_and_blurred_or_dark_frames_score_lower():
+    sharp = assess_frame(_jpeg(_pattern()))
+    blurred = assess_frame(_jpeg(_pattern().filter(ImageFilter.GaussianBlur(12))))
+    dark = assess_frame(_jpeg(_pattern(scale=0.15)))
+
+    assert sharp.score > 0.8 and sharp.problems == []
+    assert blurred.sharpness < sharp.sharpness and "blurry" in blurred.problems
+    assert dark.exposure < 0.35 and "badly exposed" in dark.problems
+    assert max(blurred.score, dark.score) < sharp.score
+
+
+def test_face_box_size_counts_only_when_given():
+    data = _jpeg(_pattern())
+
+    assert assess_frame(data).face_size is None
+    small = assess_frame(data, box=(10, 10, 20, 24))
+    assert small.face_size == 0.25 and "face too small" in small.problems
+    assert assess_frame(data, box=(0, 0, 400, 400)).face_size == 1.0
+
+
+def test_components_and_parsing_edge_cases():
+    flat = np.full((64, 64), 128, dtype=np.float32)
+    assert laplacian_variance(flat) == 0.0
+    assert exposure_score(flat) > 0.99
+    assert exposure_score(np.zeros((64, 64), dtype=np.float32)) == 0.0
+    assert parse_box(None) is None
+    assert parse_box("1,2,30,40") == (1.0, 2.0, 30.0, 40.0)
+    with pytest.raises(ValueError):
+        parse_box("1,2,0,40")
+    with pytest.raises(ValueError):
+        assess_frame(b"not an image")
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+from uuid import uuid4
+import numpy as np
+from app.services import face_retention
+from app.services.face_retention import select_frames
+
+
+def _unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_select_frames_keeps_best_distinct_frames_up_to_keep():
+    vectors = [_unit(1, 0, 0), _unit(1, 0.01, 0), _unit(0, 1, 0), _unit(0, 0, 1), _unit(1, 1, 0)]
+    quality = [0.9, 1.2, 1.0, 0.5, 0.8]
+
+    mask = select_frames(vectors, quality, keep=3, min_distance=0.05)
+
+    # Frame 0 is a near-duplicate of the better frame 1; frame 3 is over the budget
+    assert mask.tolist() == [False, True, True, False, True]
+
+
+def test_select_frames_breaks_quality_ties_towards_earlier_rows():
+    vectors = [_unit(1, 0, 0), _unit(1, 0.001, 0)]
+
+    assert select_frames(vectors, [1.0, 1.0], keep=5, min_distance=0.05).tolist() == [True, False]
+    assert not select_frames(vectors, [1.0, 1.0], keep=0).any()
+
+
+def test_prune_user_frames_deletes_pruned_rows_and_files(monkeypatch, tmp_path):
+    user_id = uuid4()
+    rows = [
+        SimpleNamespace(id=uuid4(), embedding=_unit(1, 0, 0), embedding_norm=1.1, quality_score=None),
+        SimpleNamespace(id=uuid4(), embedding=_unit(1, 0.01, 0), embedding_norm=1.3, quality_score=None),
+        SimpleNamespace(id=uuid4(), embedding=_unit(0, 1, 0), embedding_norm=None, quality_score=None),
+    ]
+    image = tmp_path / "frame.jpg"
+    image.write_bytes(b"jpeg")
+    deleted = []
+    monkeypatch.setattr("app.crud.face.get_pose_frames", lambda session, user, face_type, version: rows)
+    monkeypatch.setattr(
+        "app.crud.face.delete_faces",
+        lambda session, face_ids: deleted.extend(face_ids) or [str(image), str(tmp_path / "gone.jpg")],
+    )
+
+    assert face_retention.prune_user_frames(None, user_id, "straight", keep=5, dry_run=True) == [rows[0].id]
+    assert deleted == [] and image.exists()
+
+    pruned = face_retention.prune_user_frames(None, user_id, "straight", keep=1)
+
+    assert pruned == deleted == [rows[0].id, rows[2].id]
+    assert not image.exists()
+
+
+def test_prune_user_frames_prefers_measured_quality_over_norm(monkeypatch):
+    rows = [
+        SimpleNamespace(id=uuid4(), embedding=_unit(1, 0, 0), embedding_norm=9.0, quality_score=None),
+        SimpleNamespace(id=uuid4(), embedding=_unit(0, 1, 0), embedding_norm=1.0, quality_score=0.4),
+        SimpleNamespace(id=uuid4(), embedding=_unit(0, 0, 1), embedding_norm=1.0, quality_score=0.9),
+    ]
+    monkeypatch.setattr("app.crud.face.get_pose_frames", lambda session, user, face_type, version: rows)
+
+    pruned = face_retention.prune_user_frames(None, uuid4(), "straight", keep=2, dry_run=True)
+
+    assert pruned == [rows[0].id]
+
+
+def test_prune_after_write_never_prunes_the_face_just_written(monkeypatch):
+    # The new upload is both the weakest frame and a near-duplicate of the best one
+    rows = [
+        SimpleNamespace(id=uuid4(), embedding=_unit(1, 0.01, 0), embedding_norm=1.0, quality_score=0.2),
+        SimpleNamespace(id=uuid4(), embedding=_unit(1, 0, 0), embedding_norm=1.0, quality_score=0.9),
+        SimpleNamespace(id=uuid4(), embedding=_unit(0, 1, 0), embedding_norm=1.0, quality_score=0.5),
+    ]
+    deleted = []
+    monkeypatch.setattr("app.crud.face.get_pose_frames", lambda session, user, face_type, version: rows)
+    monkeypatch.setattr("app.crud.face.delete_faces", lambda session, face_ids: deleted.extend(face_ids) or [])
+
+    assert select_frames([r.embedding for r in rows], [0.2, 0.9, 0.5], keep=2, pinned=[0]).tolist() == [
+        True, False, True
+    ]
+    face_retention.prune_user_frames(None, uuid4(), "straight", keep=2, keep_ids=[rows[0].id])
+
+    assert deleted == [rows[1].id]
+
+
+def test_prune_after_write_logs_failures_instead_of_raising(monkeypatch):
+    rolled_back = []
+
+    def get_pose_frames(session, user_id, face_type, model_version=None):
+        raise RuntimeError("lock timeout")
+
+    monkeypatch.setattr("app.crud.face.get_pose_frames", get_pose_frames)
+    session = SimpleNamespace(rollback=lambda: rolled_back.append(True))
+
+    face_retention.prune_after_write(session, uuid4(), "straight", [uuid4()])
+
+    assert rolled_back == [True]
@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+from uuid import uuid4
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from app.api import scans
+from app.services import face_scan
+from app.services.embedding_versions import BASE_MODEL
+from app.services.face_index import FaceIndex
+
+
+def _unit(rng, dim):
+    vector = rng.normal(size=dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _index_with_users(dim=16, users=6, faces_per_user=3, seed=0):
+    rng = np.random.default_rng(seed)
+    index = FaceIndex(dim=dim)
+    index._loaded = True
+    enrolled = {}
+    for _ in range(users):
+        user = uuid4()
+        enrolled[user] = [_unit(rng, dim) for _ in range(faces_per_user)]
+        for vector in enrolled[user]:
+            index.add(uuid4(), user, "straight", vector)
+    return index, enrolled
+
+
+def test_match_users_agrees_with_brute_force_over_blocks():
+    index, enrolled = _index_with_users()
+    rng = np.random.default_rng(1)
+    users = list(enrolled)
+    # Frames close to two of the users, plus noise
+    frames = np.stack(
+        [enrolled[users[0]][0] + 0.05 * _unit(rng, 16) for _ in range(4)]
+        + [enrolled[users[3]][2] + 0.05 * _unit(rng, 16) for _ in range(2)]
+        + [_unit(rng, 16) for _ in range(7)]
+    )
+
+    found = index.match_users(frames, threshold=0.9, batch_size=5)
+
+    units = frames / np.linalg.norm(frames, axis=1, keepdims=True)
+    expected = {}
+    for user, vectors in enrolled.items():
+        scores = units @ np.stack(vectors).T
+        if (scores >= 0.9).any():
+            expected[user] = (scores.max(), int(scores.max(axis=1).argmax()), int((scores >= 0.9).any(axis=1).sum()))
+    assert {m.user_id for m in found} == set(expected) >= {users[0], users[3]}
+    for match in found:
+        score, probe, count = expected[match.user_id]
+        assert np.isclose(match.score, score, atol=1e-5)
+        assert (match.probe, match.probes_matched) == (probe, count)
+    assert [m.score for m in found] == sorted((m.score for m in found), reverse=True)
+
+
+def test_run_scan_records_matches_and_removes_frames(tmp_path, monkeypatch):
+    index, enrolled = _index_with_users(seed=2)
+    user = next(iter(enrolled))
+    path = face_scan.save_frames(uuid4(), np.stack([enrolled[user][1]] * 3), str(tmp_path))
+    finished = {}
+    monkeypatch.setattr(face_scan.embedding_versions, "resolve", lambda session, version: BASE_MODEL)
+    monkeypatch.setattr(face_scan.embedding_versions, "index_for", lambda model: index)
+    monkeypatch.setattr(
+        "app.crud.scan.finish_job", lambda session, job_id, matches, seconds: finished.update(matches=matches)
+    )
+    job = SimpleNamespace(id=uuid4(), content_id="clip", frames=3, frames_path=path, threshold=0.99, model_version=None)
+
+    assert face_scan.run_scan(None, job) == 1
+    [match] = finished["matches"]
+    assert match["user_id"] == user and match["frames_matched"] == 3
+    assert not tmp_path.joinpath(path).exists()
+
+
+def test_run_scan_fails_job_with_wrong_dimension(tmp_path, monkeypatch):
+    index, _ = _index_with_users()
+    path = face_scan.save_frames(uuid4(), np.ones((2, 8), dtype=np.float32), str(tmp_path))
+    failed = []
+    monkeypatch.setattr(face_scan.embedding_versions, "resolve", lambda session, version: BASE_MODEL)
+    monkeypatch.setattr(face_scan.embedding_versions, "index_for", lambda model: index)
+    monkeypatch.setattr("app.crud.scan.fail_job", lambda session, job_id, error: failed.append(error))
+    job = SimpleNamespace(id=uuid4(), content_id="clip", frames=2, frames_path=path, threshold=0.5, model_version=None)
+
+    assert face_scan.run_scan(None, job) == 0
+    assert failed and "shape" in failed[0]
+
+
+def test_scans_are_visible_only_to_their_submitter_and_operators(monkeypatch):
+    owner, other, operator = (SimpleNamespace(id=uuid4()) for _ in range(3))
+    job = SimpleNamespace(id=uuid4(), submitted_by=owner.id)
+    listed = []
+    monkeypatch.setattr(scans.scan_crud, "get_job", lambda session, job_id: job if job_id == job.id else None)
+    monkeypatch.setattr(scans.scan_crud, "get_matches", lambda session, job_id: [])
+    monkeypatch.setattr(
+        scans.scan_crud, "get_jobs", lambda session, status, content, limit, offset, by: listed.append(by) or []
+    )
+    monkeypatch.setattr("app.api.deps.settings.OPERATOR_USER_IDS", [str(operator.id)])
+
+    assert scans.get_scan_matches(job.id, None, owner) == []
+    assert scans.get_scan_matches(job.id, None, operator) == []
+    with pytest.raises(HTTPException) as hidden:
+        scans.get_scan_matches(job.id, None, other)
+    assert hidden.value.status_code == 404
+    scans.list_scan_jobs(None, None, 100, 0, None, other)
+    scans.list_scan_jobs(None, None, 100, 0, None, operator)
+    assert listed == [other.id, None]
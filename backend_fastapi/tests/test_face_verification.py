@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+from uuid import uuid4
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from app.api import faces
+from app.schemas.face import FaceVerifyRequest
+from app.services.embedding_versions import ModelVersion
+from app.services.face_verification import UserFaceCache
+
+
+def _fake_faces(monkeypatch, rows_by_user, calls):
+    def get_user_embeddings(session, user_id):
+        calls.append(user_id)
+        return rows_by_user.get(user_id, [])
+
+    monkeypatch.setattr("app.crud.face.get_user_embeddings", get_user_embeddings)
+
+
+def test_verify_scores_best_frame_and_caches(monkeypatch):
+    user = uuid4()
+    straight, left = np.eye(4, dtype=np.float32)[:2]
+    rows = {
+        user: [
+            SimpleNamespace(id=uuid4(), face_type="straight", embedding=straight),
+            SimpleNamespace(id=uuid4(), face_type="left", embedding=left),
+        ]
+    }
+    calls = []
+    _fake_faces(monkeypatch, rows, calls)
+    cache = UserFaceCache(capacity=8, ttl=60)
+
+    result = cache.verify(None, user, left)
+    assert result.face_type == "left"
+    assert abs(result.score - 1.0) < 1e-6
+    assert result.frames == 2
+    cache.verify(None, user, straight)
+    assert calls == [user]
+    assert cache.stats()["hits"] == 1
+
+    cache.invalidate(user)
+    cache.verify(None, user, straight)
+    assert calls == [user, user]
+
+
+def test_verify_unknown_user_and_lru_eviction(monkeypatch):
+    calls = []
+    _fake_faces(monkeypatch, {}, calls)
+    cache = UserFaceCache(capacity=2, ttl=60)
+    users = [uuid4() for _ in range(3)]
+
+    assert cache.verify(None, users[0], np.ones(4, dtype=np.float32) / 2) is None
+    for user in users:
+        cache.get(None, user)
+    assert cache.stats()["size"] == 2
+    cache.get(None, users[0])
+    assert calls.count(users[0]) == 2
+
+
+def test_verify_endpoint_checks_only_the_callers_faces_at_the_server_threshold(monkeypatch):
+    caller, other, operator = (SimpleNamespace(id=uuid4()) for _ in range(3))
+    checked = []
+    monkeypatch.setattr(faces, "_resolve_model", lambda session, version: ModelVersion("v1", 4))
+    monkeypatch.setattr(
+        faces.user_face_cache,
+        "verify",
+        lambda session, user_id, probe, version: checked.append(user_id)
+        or SimpleNamespace(score=0.5, face_id=uuid4(), face_type="straight"),
+    )
+    monkeypatch.setattr("app.api.deps.settings.OPERATOR_USER_IDS", [str(operator.id)])
+    monkeypatch.setattr(faces.settings, "FACE_VERIFY_THRESHOLD", 0.6)
+    probe = [1.0, 0.0, 0.0, 0.0]
+
+    with pytest.raises(HTTPException) as denied:
+        faces.verify_face(FaceVerifyRequest(embedding=probe, user_id=str(other.id)), None, caller)
+    assert denied.value.status_code == 403
+    # A client-sent threshold is ignored
+    own = faces.verify_face(FaceVerifyRequest(embedding=probe, threshold=0.1), None, caller)
+    assert (own.match, own.threshold) == (False, 0.6)
+    faces.verify_face(FaceVerifyRequest(embedding=probe, user_id=str(other.id)), None, operator)
+    assert checked == [caller.id, other.id]
@@ -0,0 +1,55 @@
+from app.core.config import settings
+
+
+def _login(client, monkeypatch, sub="google-face", email="face@example.com"):
+    def fake_verify(token, client_id):
+        return {"sub": sub, "email": email, "name": "Face User"}
+
+    monkeypatch.setattr("app.api.auth.verify_google_id_token", fake_verify)
+    login = client.post("/api/auth/google", json={"id_token": "fake"})
+    assert login.status_code == 200
+    return {"Authorization": f"Bearer {login.json()['token']}"}
+
+
+def test_identify_rejects_wrong_dimension(client, monkeypatch):
+    headers = _login(client, monkeypatch)
+    response = client.post(
+        "/api/faces/identify", json={"embedding": [0.1, 0.2], "top_k": 3}, headers=headers
+    )
+    assert response.status_code == 422
+
+
+def test_identify_returns_matches(client, monkeypatch):
+    headers = _login(client, monkeypatch)
+    embedding = [0.0] * settings.FACE_EMBEDDING_DIM
+    embedding[0] = 1.0
+    response = client.post(
+        "/api/faces/identify",
+        json={"embedding": embedding, "top_k": 3, "ef_search": 80},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert len(response.json()["matches"]) <= 3
+
+
+def test_identify_templates_backend(client, monkeypatch):
+    headers = _login(client, monkeypatch)
+    embedding = [0.0] * settings.FACE_EMBEDDING_DIM
+    embedding[1] = 1.0
+    response = client.post(
+        "/api/faces/identify",
+        json={"embedding": embedding, "top_k": 2, "backend": "templates"},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert len(response.json()["matches"]) <= 2
+
+
+def test_identify_rejects_zero_embedding(client, monkeypatch):
+    headers = _login(client, monkeypatch)
+    response = client.post(
+        "/api/faces/identify",
+        json={"embedding": [0.0] * settings.FACE_EMBEDDING_DIM, "top_k": 3},
+        headers=headers,
+    )
+    assert response.status_code == 422
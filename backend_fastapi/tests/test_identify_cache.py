@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+from uuid import uuid4
+import numpy as np
+from app.services.face_changes import FaceChangeFeed
+from app.services.identify_cache import IdentifyCache
+
+
+def _probe(seed, dim=64):
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _near(probe, cosine, seed):
+    noise = _probe(seed, len(probe))
+    noise -= (noise @ probe) * probe
+    return cosine * probe + np.sqrt(1 - cosine**2) * noise / np.linalg.norm(noise)
+
+
+def test_perturbed_probe_of_the_same_face_hits_but_other_faces_and_params_miss():
+    cache = IdentifyCache(capacity=1000, ttl=60)
+    hits = 0
+    for seed in range(50):
+        probe = _probe(seed, dim=1536)
+        key = cache.key(probe, "exact", "v1", 5)
+        cache.put(key, cache.generation, seed)
+        # A re-encoded frame: cosine 0.97, noise well above the old rounding step in every component
+        hits += cache.get(cache.key(_near(probe, 0.97, seed + 1000), "exact", "v1", 5))[0] == seed
+        assert cache.get(cache.key(probe, "exact", "v1", 10))[0] is None
+        assert cache.get(cache.key(_probe(seed + 2000, dim=1536), "exact", "v1", 5))[0] is None
+    assert hits >= 45
+
+
+def test_bump_invalidates_and_drops_results_computed_before_it():
+    cache = IdentifyCache(capacity=10, ttl=60)
+    key = cache.key(_probe(0), "exact")
+    result, generation = cache.get(key)
+    assert result is None
+    cache.put(key, generation, "matches")
+    assert cache.get(key)[0] == "matches"
+
+    _, generation = cache.get(cache.key(_probe(1), "exact"))
+    cache.bump()
+    # A search that started before the write must not be cached after it
+    cache.put(cache.key(_probe(1), "exact"), generation, "stale")
+
+    assert cache.get(key)[0] is None
+    assert cache.get(cache.key(_probe(1), "exact"))[0] is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["generation"], stats["size"]) == (1, 4, 1, 0)
+
+
+def test_capacity_evicts_least_recently_used_and_ttl_expires():
+    cache = IdentifyCache(capacity=2, ttl=60)
+    keys = [cache.key(_probe(i)) for i in range(3)]
+    for i in range(2):
+        cache.put(keys[i], 0, i)
+    cache.get(keys[0])
+    cache.put(keys[2], 0, 2)
+
+    assert cache.get(keys[1])[0] is None
+    assert cache.get(keys[0])[0] == 0
+    cache.ttl = 0
+    assert cache.get(keys[2])[0] is None
+
+
+def test_change_feed_apply_bumps_result_cache(monkeypatch):
+    monkeypatch.setattr("app.crud.face.get_faces_by_ids", lambda session, ids: [])
+    cache = IdentifyCache()
+    feed = FaceChangeFeed([], result_cache=cache)
+
+    feed.apply(None, [SimpleNamespace(seq=1, face_id=uuid4(), user_id=uuid4(), op="D")])
+
+    assert cache.generation == 1
+
+
+def test_local_enrollment_bumps_only_after_the_indexes_have_the_face(monkeypatch):
+    from app.crud import face as face_crud
+
+    events = []
+    session = SimpleNamespace(add=lambda row: None, commit=lambda: None, refresh=lambda row: None)
+    index = SimpleNamespace(add=lambda *args, **kwargs: events.append("index"))
+    for name in ("face_index", "quantized_face_index", "sharded_face_index"):
+        monkeypatch.setattr(face_crud, name, index)
+    monkeypatch.setattr(face_crud.identify_cache, "bump", lambda: events.append("bump"))
+    monkeypatch.setattr(face_crud.template_crud, "add_frame_to_templates", lambda *args: None)
+    monkeypatch.setattr(face_crud.duplicate_checker, "submit", lambda *args, **kwargs: None)
+    monkeypatch.setattr(face_crud.face_retention, "prune_after_write", lambda *args: None)
+
+    face_crud.create_face_record(session, str(uuid4()), "straight", "a.jpg", "a.jpg", embedding=_probe(1, 1536))
+
+    assert events == ["index", "index", "index", "bump"]
@@ -0,0 +1,114 @@
+import struct
+from types import SimpleNamespace
+from uuid import uuid4
+import numpy as np
+import pytest
+from app.crud import face as face_crud
+from app.services import pgcopy
+
+
+def test_encode_tuples_matches_copy_binary_layout():
+    face_id = uuid4()
+    layout = pgcopy.tuple_dtype([("id", "uuid"), ("face_type", "int2"), ("embedding", pgcopy.vector_field(3))])
+    data = pgcopy.encode_tuples(
+        layout,
+        {
+            "id": np.frombuffer(face_id.bytes, dtype="V16"),
+            "face_type": np.array([2]),
+            "embedding": np.array([[0.5, -1.0, 2.0]], dtype=np.float32),
+        },
+    )
+    expected = (
+        struct.pack(">h", 3)
+        + struct.pack(">i", 16) + face_id.bytes
+        + struct.pack(">ih", 2, 2)
+        + struct.pack(">ihh3f", 16, 3, 0, 0.5, -1.0, 2.0)
+    )
+    assert data == expected
+    assert layout.itemsize == len(expected)
+
+
+def _face_layout(dim):
+    return pgcopy.tuple_dtype(
+        [
+            ("id", "uuid"),
+            ("user_id", "uuid"),
+            ("face_type", "int2"),
+            ("embedding", pgcopy.vector_field(dim)),
+            ("embedding_norm", "float4"),
+        ]
+    )
+
+
+def _face_stream(layout, ids, user_ids, codes, embeddings, norms):
+    columns = {
+        "id": np.frombuffer(b"".join(i.bytes for i in ids), dtype="V16"),
+        "user_id": np.frombuffer(b"".join(u.bytes for u in user_ids), dtype="V16"),
+        "face_type": np.array(codes),
+        "embedding": np.asarray(embeddings, dtype=np.float32),
+        "embedding_norm": np.asarray(norms, dtype=np.float32),
+    }
+    body = pgcopy.encode_tuples(layout, columns) if len(ids) else b""
+    return pgcopy.COPY_HEADER + body + pgcopy.COPY_TRAILER
+
+
+def test_decode_tuples_round_trips_and_rejects_nulls():
+    layout = _face_layout(3)
+    ids, users = [uuid4(), uuid4()], [uuid4(), uuid4()]
+    data = _face_stream(layout, ids, users, [1, 2], [[1, 2, 3], [4, 5, 6]], [0.5, 2.0])
+
+    records = pgcopy.decode_tuples(layout, data)
+
+    assert records["id"][1].tobytes() == ids[1].bytes
+    assert records["embedding"].tolist() == [[1, 2, 3], [4, 5, 6]]
+    assert records["embedding_norm"].tolist() == [0.5, 2.0]
+    # A NULL embedding_norm: length -1 and no value, 4 bytes short
+    null = data[:-10] + struct.pack(">i", -1) + pgcopy.COPY_TRAILER
+    with pytest.raises(ValueError):
+        pgcopy.decode_tuples(layout, null)
+
+
+class _FakeCursor:
+    def __init__(self, streams):
+        self.streams = list(streams)
+        self.closed = False
+
+    def mogrify(self, sql, params):
+        return sql.encode()
+
+    def copy_expert(self, sql, target):
+        # psycopg2 writes the stream in pieces
+        data = self.streams.pop(0)
+        for start in range(0, len(data), 7):
+            target.write(data[start : start + 7])
+
+    def close(self):
+        self.closed = True
+
+
+def test_iter_face_arrays_decodes_chunks_and_resolves_new_face_types():
+    layout = _face_layout(2)
+    ids = sorted((uuid4() for _ in range(3)), key=str)
+    user = uuid4()
+    streams = [
+        _face_stream(layout, ids[:2], [user, user], [1, 2], [[1, 0], [0, 1]], [1.5, 2.5]),
+        # Code 0: a face type created after the distinct read
+        _face_stream(layout, ids[2:], [user], [0], [[3, 4]], [5.0]),
+    ]
+    cursor = _FakeCursor(streams)
+    # The distinct face types, then the type of the face with code 0
+    replies = [["straight", "left"], [(ids[2], "up")]]
+    session = SimpleNamespace(
+        connection=lambda: SimpleNamespace(connection=SimpleNamespace(cursor=lambda: cursor)),
+        exec=lambda statement: SimpleNamespace(all=lambda: replies.pop(0)),
+    )
+
+    chunks = list(face_crud.iter_face_arrays(session, dim=2, chunk_size=2))
+
+    assert [len(c.ids) for c in chunks] == [2, 1]
+    assert chunks[0].ids[1].tobytes() == ids[1].bytes
+    assert chunks[0].embeddings.dtype == np.float32 and chunks[0].embeddings.tolist() == [[1, 0], [0, 1]]
+    assert [chunks[0].face_type_names[c] for c in chunks[0].face_types] == ["left", "straight"]
+    assert chunks[1].face_type_names[chunks[1].face_types[0]] == "up"
+    assert chunks[1].norms.tolist() == [5.0]
+    assert cursor.closed
@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+from uuid import uuid4
+import numpy as np
+from app.services.quantization import ProductQuantizer, QuantizedFaceIndex, ScalarQuantizer
+
+
+def _unit(rows):
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def test_scalar_quantizer_scores_close_to_exact():
+    rng = np.random.default_rng(0)
+    vectors = _unit(rng.normal(size=(500, 32)).astype(np.float32))
+    queries = _unit(rng.normal(size=(4, 32)).astype(np.float32))
+    quantizer = ScalarQuantizer(32)
+    quantizer.train(vectors)
+    approx = quantizer.score(quantizer.encode(vectors), queries)
+    assert np.abs(approx - queries @ vectors.T).max() < 0.05
+
+
+def test_product_quantizer_codes_are_one_byte_per_subvector():
+    rng = np.random.default_rng(0)
+    vectors = _unit(rng.normal(size=(600, 32)).astype(np.float32))
+    quantizer = ProductQuantizer(32, subvectors=8)
+    quantizer.train(vectors)
+    codes = quantizer.encode(vectors)
+    assert codes.shape == (600, 8) and codes.dtype == np.uint8
+    scores = quantizer.score(codes, vectors[:5])
+    # every vector should rank itself near the top
+    assert all(i in np.argsort(-scores[i])[:10] for i in range(5))
+
+
+def test_quantized_index_approximate_search_and_stats():
+    index = QuantizedFaceIndex(dim=16, method="int8", rerank_factor=2)
+    index._loaded = True
+    rng = np.random.default_rng(2)
+    users = [uuid4() for _ in range(10)]
+    for i in range(50):
+        index.add(uuid4(), users[i % 10], "straight", rng.normal(size=16))
+    assert len(index.search(rng.normal(size=16), 3)) == 3
+    stats = index.stats()
+    assert stats["bytes_per_vector"] < stats["float32_bytes_per_vector"]
+
+
+def test_quantized_index_load_rows_estimates_recall():
+    rng = np.random.default_rng(3)
+    users = [uuid4() for _ in range(40)]
+    rows = [
+        SimpleNamespace(id=uuid4(), user_id=users[i % 40], face_type="straight", embedding=v, embedding_norm=None)
+        for i, v in enumerate(rng.normal(size=(400, 16)).astype(np.float32))
+    ]
+    index = QuantizedFaceIndex(dim=16, method="int8")
+    index.load_rows(rows)
+    assert index.loaded
+    assert index.size == 400
+    assert 0 <= index.recall["approx_recall_at_k"] <= 1
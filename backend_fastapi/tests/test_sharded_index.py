@@ -0,0 +1,121 @@
+import threading
+import time
+from unittest import mock
+from uuid import uuid4
+import numpy as np
+from app.services.face_index import FaceIndex
+from app.services.sharded_index import ShardedFaceIndex, _Shard, shard_of
+
+
+class _InlineShard:
+    """Stands in for a worker process: answers from a local FaceIndex, or never."""
+
+    def __init__(self, coordinator, number, index, responsive=True):
+        self.number = number
+        self.index = index
+        self.ready = threading.Event()
+        self.ready.set()
+        self.responsive = responsive
+        self.coordinator = coordinator
+
+    def send(self, message):
+        if message[0] == "search" and self.responsive:
+            _, request_id, queries, k, per_user = message
+            self.coordinator._on_reply(request_id, self.number, self.index.search_batch(queries, k, per_user))
+        return True
+
+
+def _sharded(shards, rows, unresponsive=(), timeout=0.2):
+    coordinator = ShardedFaceIndex(dim=8, shards=shards, timeout=timeout)
+    indexes = [FaceIndex(dim=8) for _ in range(shards)]
+    for index in indexes:
+        index.load_rows([])
+    for face_id, user_id, vector in rows:
+        indexes[shard_of(user_id, shards)].add(face_id, user_id, "straight", vector)
+    coordinator._workers = [
+        _InlineShard(coordinator, i, index, i not in unresponsive) for i, index in enumerate(indexes)
+    ]
+    return coordinator
+
+
+def test_scatter_gather_matches_single_index():
+    rng = np.random.default_rng(3)
+    users = [uuid4() for _ in range(30)]
+    rows = [(uuid4(), users[i % 30], rng.normal(size=8)) for i in range(120)]
+    single = FaceIndex(dim=8)
+    single.load_rows([])
+    for face_id, user_id, vector in rows:
+        single.add(face_id, user_id, "straight", vector)
+    coordinator = _sharded(4, rows)
+
+    probe = rng.normal(size=8)
+    hits, failed = coordinator.search(probe, 10)
+    assert failed == 0
+    assert [h.face_id for h in hits] == [h.face_id for h in single.search(probe, 10)]
+
+
+def test_slow_shard_yields_partial_results():
+    rng = np.random.default_rng(4)
+    users = [uuid4() for _ in range(12)]
+    rows = [(uuid4(), users[i % 12], rng.normal(size=8)) for i in range(24)]
+    coordinator = _sharded(3, rows, unresponsive={1}, timeout=0.05)
+
+    hits, failed = coordinator.search(rng.normal(size=8), 12)
+    assert failed == 1
+    assert hits
+    assert all(shard_of(h.user_id, 3) != 1 for h in hits)
+    assert not coordinator._pending
+
+
+class _RecordingConn:
+    """Parent end of a shard pipe that records sends and never replies until closed."""
+
+    def __init__(self):
+        self.sent = []
+        self.closed = threading.Event()
+
+    def send(self, message):
+        self.sent.append(message)
+
+    def recv(self):
+        self.closed.wait()
+        raise EOFError
+
+    def close(self):
+        self.closed.set()
+
+
+def _loading_shard(write_buffer):
+    conn = _RecordingConn()
+    context = mock.Mock()
+    context.Pipe.return_value = (conn, mock.Mock())
+    shard = _Shard(context, 0, 1, 8, on_reply=None, on_exit=lambda worker: None, write_buffer=write_buffer)
+    return shard, conn
+
+
+def test_writes_to_a_loading_shard_are_buffered_and_flushed_on_ready():
+    shard, conn = _loading_shard(write_buffer=100)
+    try:
+        for i in range(50):
+            shard.write(("remove_user", i))
+        time.sleep(0.05)
+        assert conn.sent == []
+
+        shard.ready.set()
+        deadline = time.monotonic() + 5
+        while len(conn.sent) < 50 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert conn.sent == [("remove_user", i) for i in range(50)]
+    finally:
+        conn.close()
+
+
+def test_write_buffer_overflow_reloads_the_shard_instead_of_blocking():
+    shard, conn = _loading_shard(write_buffer=2)
+    try:
+        for i in range(5):
+            shard.write(("remove_user", i))
+        shard.process.terminate.assert_called_once()
+        assert conn.sent == []
+    finally:
+        conn.close()
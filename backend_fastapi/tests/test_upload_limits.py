@@ -0,0 +1,67 @@
+import asyncio
+from fastapi import FastAPI, File, UploadFile
+from app.core.upload_limits import FORM_OVERHEAD_BYTES, UploadLimitMiddleware
+
+LIMIT = 1024 * 1024
+BOUNDARY = "limitboundary"
+
+
+def _app():
+    app = FastAPI()
+    seen = []
+
+    @app.post("/upload")
+    def upload(file: UploadFile = File(...)):
+        seen.append(len(file.file.read()))
+        return {"size": seen[-1]}
+
+    return UploadLimitMiddleware(app, paths=["/upload"], max_bytes=LIMIT), seen
+
+
+def _post(app, path, size, declare_length=True, chunk=64 * 1024):
+    """Send a multipart upload of ``size`` bytes; returns (status, bytes the app pulled from the client)."""
+    body = (
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="clip.mp4"\r\n'
+        "Content-Type: video/mp4\r\n\r\n"
+    ).encode() + b"x" * size + f"\r\n--{BOUNDARY}--\r\n".encode()
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    if declare_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+    scope = {"type": "http", "method": "POST", "path": path, "headers": headers, "query_string": b""}
+    pulled, messages = [0], []
+
+    async def receive():
+        start = pulled[0]
+        pulled[0] = min(len(body), start + chunk)
+        return {"type": "http.request", "body": body[start:pulled[0]], "more_body": pulled[0] < len(body)}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    starts = [m for m in messages if m["type"] == "http.response.start"]
+    assert len(starts) == 1
+    return starts[0]["status"], pulled[0]
+
+
+def test_small_uploads_and_other_paths_pass_through():
+    app, seen = _app()
+
+    assert _post(app, "/upload", 1000)[0] == 200
+    assert _post(app, "/upload", 1000, declare_length=False)[0] == 200
+    assert seen == [1000, 1000]
+    # Not a limited path: the middleware stays out of the way
+    assert _post(app, "/elsewhere", LIMIT + FORM_OVERHEAD_BYTES + 1)[0] == 404
+
+
+def test_oversized_uploads_get_413_without_reading_the_whole_body():
+    app, seen = _app()
+    size = 4 * LIMIT
+
+    status, pulled = _post(app, "/upload", size)
+    assert (status, pulled) == (413, 0)
+
+    status, pulled = _post(app, "/upload", size, declare_length=False)
+    assert status == 413
+    assert LIMIT < pulled <= LIMIT + FORM_OVERHEAD_BYTES + 64 * 1024
+    assert seen == []
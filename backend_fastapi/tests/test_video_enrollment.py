@@ -0,0 +1,52 @@
+import io
+import numpy as np
+import pytest
+from app.core.file_storage import FileStorageManager
+from app.services.video_enrollment import VideoFrame, parse_pose_marks, pose_at, select_pose_frames
+
+
+def test_pose_marks_default_to_capture_order_segments():
+    marks = parse_pose_marks(None, 9.0)
+
+    assert marks == [(0.0, "straight"), (3.0, "left"), (6.0, "right")]
+    assert [pose_at(marks, t) for t in (0.0, 2.9, 3.0, 8.9)] == ["straight", "straight", "left", "right"]
+    explicit = parse_pose_marks("4:left, 1.5:straight", 0.0)
+    assert explicit == [(1.5, "straight"), (4.0, "left")]
+    assert pose_at(explicit, 1.0) is None
+    with pytest.raises(ValueError):
+        parse_pose_marks("0:up", 9.0)
+    with pytest.raises(ValueError):
+        parse_pose_marks(None, 0.0)
+
+
+def test_selection_keeps_best_spaced_frames_and_encodes_only_those():
+    rng = np.random.default_rng(0)
+    encoded = []
+
+    def frame(timestamp, contrast):
+        gray = np.clip(127.5 + contrast * rng.standard_normal((128, 160)), 0, 255).astype(np.float32)
+        return VideoFrame(timestamp, gray, lambda: encoded.append(timestamp) or f"jpeg-{timestamp}".encode())
+
+    # Sharpness grows through the "straight" segment; "left" is all flat and must stay empty
+    frames = [frame(t / 10, 0.2 + t * 0.2) for t in range(10)] + [frame(1.0 + t / 10, 0.0) for t in range(5)]
+    kept, sampled = select_pose_frames(frames, [(0.0, "straight"), (1.0, "left")], per_pose=2, min_gap=0.25)
+
+    assert sampled == 15
+    assert kept["left"] == []
+    timestamps = [pose_frame.timestamp for pose_frame in kept["straight"]]
+    assert timestamps == [0.9, 0.6]
+    assert kept["straight"][0].jpeg == b"jpeg-0.9"
+    assert kept["straight"][0].quality.score >= kept["straight"][1].quality.score
+    assert len(encoded) < 10 and 0.0 not in encoded
+
+
+def test_save_temp_streams_and_enforces_size_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(FileStorageManager, "TEMP_DIR", tmp_path)
+    monkeypatch.setattr(FileStorageManager, "MAX_FILE_SIZE", 1000)
+
+    ok, path = FileStorageManager.save_temp(io.BytesIO(b"x" * 1000), "clip.MOV", chunk_size=64)
+    assert ok and open(path, "rb").read() == b"x" * 1000
+    ok, error = FileStorageManager.save_temp(io.BytesIO(b"x" * 1001), "clip.mp4", chunk_size=64)
+    assert not ok and "exceeds" in error
+    assert not FileStorageManager.save_temp(io.BytesIO(b""), "clip.exe")[0]
+    assert len(list(tmp_path.iterdir())) == 1
@@ -0,0 +1,80 @@
+import wave
+import numpy as np
+import pytest
+from app.services.voice_samples import decode_wav, pcm_to_float
+
+
+def _write_wav(path, frames, rate, width=2):
+    frames = np.atleast_2d(frames.T).T  # (n, channels)
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(frames.shape[1])
+        wav.setsampwidth(width)
+        wav.setframerate(rate)
+        wav.writeframes(_pcm(frames.ravel(), width))
+
+
+def test_decode_downmixes_and_resamples_the_same_for_any_chunk_size(tmp_path):
+    t = np.arange(48000 * 2) / 48000
+    tone = 0.5 * np.sin(2 * np.pi * 440 * t)
+    path = tmp_path / "stereo.wav"
+    _write_wav(path, np.stack([tone, tone * 0.5], axis=1), 48000)
+
+    audio = decode_wav(str(path), sample_rate=16000, chunk_frames=1000)
+    whole = decode_wav(str(path), sample_rate=16000, chunk_frames=1 << 20)
+
+    assert (audio.sample_rate, audio.source_sample_rate, audio.channels) == (16000, 48000, 2)
+    assert audio.samples.dtype == np.float32 and len(audio.samples) == 32000
+    assert np.allclose(audio.samples, whole.samples, atol=1e-6)
+    expected = 0.375 * np.sin(2 * np.pi * 440 * np.arange(32000) / 16000)
+    # The anti-alias filter only disturbs the first samples, where the clip starts abruptly
+    assert np.abs(audio.samples - expected)[10:-10].max() < 1e-3
+    assert audio.seconds == 2.0 and abs(audio.rms - 0.375 / np.sqrt(2)) < 1e-3
+
+
+def test_pcm_widths_and_odd_rates_decode_to_the_same_signal(tmp_path):
+    signal = np.linspace(-0.9, 0.9, 2205)
+    for width in (1, 2, 3, 4):
+        assert np.allclose(pcm_to_float(_pcm(signal, width), width), signal, atol=1 / 64)
+    path = tmp_path / "cd.wav"
+    _write_wav(path, signal, 22050, width=3)
+
+    audio = decode_wav(str(path), sample_rate=16000, chunk_frames=333)
+
+    assert len(audio.samples) == 1600
+    # A ramp survives the low-pass and linear interpolation exactly, chunk seams included
+    positions = np.arange(1600) * 22050 / 16000
+    assert np.allclose(audio.samples, np.interp(positions, np.arange(2205), signal), atol=1e-4)
+
+
+def test_content_above_the_target_nyquist_is_filtered_not_aliased(tmp_path):
+    t = np.arange(48000) / 48000
+    path = tmp_path / "hiss.wav"
+    # 12 kHz cannot exist at 16 kHz; plain decimation would fold it to 4 kHz at full level
+    _write_wav(path, 0.5 * np.sin(2 * np.pi * 12000 * t) + 0.25 * np.sin(2 * np.pi * 1000 * t), 48000)
+
+    audio = decode_wav(str(path), sample_rate=16000, chunk_frames=4096)
+
+    voice = 0.25 * np.sin(2 * np.pi * 1000 * np.arange(16000) / 16000)
+    assert np.abs(audio.samples - voice)[50:-50].max() < 0.005
+
+
+def test_rejects_non_wav_and_overlong_samples(tmp_path):
+    junk = tmp_path / "junk.wav"
+    junk.write_bytes(b"ID3 not a wav at all")
+    long = tmp_path / "long.wav"
+    _write_wav(long, np.zeros(8000 * 3), 8000)
+
+    with pytest.raises(ValueError):
+        decode_wav(str(junk))
+    with pytest.raises(ValueError):
+        decode_wav(str(long), max_seconds=2.0)
+    with pytest.raises(ValueError):
+        pcm_to_float(b"\0" * 8, 8)
+
+
+def _pcm(signal, width):
+    scale = {1: 127, 2: 32767, 3: 8388607, 4: 2147483647}[width]
+    ints = np.round(signal * scale).astype(np.int64)
+    if width == 1:
+        return (ints + 128).astype(np.uint8).tobytes()
+    return b"".join(int(v).to_bytes(width, "little", signed=True) for v in ints.ravel())